@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+二进制 AST 格式
+
+把 ast_dump.NodeTable 的各列（parent、first_child、next_sibling、depth、类型、
+文本、BB、标志位、位置）按定长数组原样写入文件，节点文本放在驻留字符串表中。
+读取时整个文件 mmap 进来，各列用 memoryview.cast 直接映射，不为每个节点分配对象，
+文本在访问时才解码。
+
+可以与文本 dump 双向转换。写回文本时使用规范格式
+`<2*深度个空格>-> 文本 (类型)  (BB:n) (a, b, c, d, e)`，与 TreeAccessor 的打印格式一致，
+原来被分隔行隔开的树之间写一行 'Print Tree:'。二进制格式只保存节点，所以转换是按节点
+无损的（重新解析写回的文本得到同样的父子关系、深度、文本、类型、BB 和位置），但不是按字节
+无损的：空行、'segment N'、'xxx' 等分隔行都不保留，缩进按深度重写。写回的文本再转换一次
+结果不变。
+
+文件格式：
+    MAGIC (8) | 头部长度 (4，小端) | JSON 头部 | 填充到 8 字节对齐 | 各列数据（每列 8 字节对齐）
+JSON 头部记录节点数、字节序、类型名表和各列的 [类型码, 偏移, 字节数]；
+文本表由 text_offsets 列（'Q'，文本数+1 项）和 text_blob 列（UTF-8 字节）组成。
+
+用法:
+    python ast_binary.py encode <AST dump> <二进制文件>
+    python ast_binary.py decode <二进制文件> <AST dump>
+    python ast_binary.py info <二进制文件>
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+import time
+from array import array
+
+from ast_dump import HAS_BB, HAS_LOC, NO_INDEX, NodeTable
+import run_stats
+
+MAGIC = b'ASTB0001'
+FORMAT_VERSION = 1
+ALIGN = 8
+
+# NodeTable 中按节点存放的列
+NODE_COLUMNS = ('parent', 'first_child', 'next_sibling', 'depth',
+                'type_id', 'text_id', 'bb', 'flags', 'loc')
+
+
+def _pad(n):
+    return (-n) % ALIGN
+
+
+def save_binary(table, output_file):
+    """
+    把节点表写成二进制文件（先写临时文件再替换）
+
+    Returns:
+        int: 写入的字节数
+    """
+    blob = bytearray()
+    offsets = array('Q', [0])
+    for text in table.texts:
+        blob += text.encode('utf-8', 'surrogateescape')
+        offsets.append(len(blob))
+
+    columns = [(name, getattr(table, name)) for name in NODE_COLUMNS]
+    columns.append(('text_offsets', offsets))
+    columns.append(('text_blob', array('B', blob)))
+
+    layout = {}
+    offset = 0
+    for name, col in columns:
+        nbytes = len(col) * col.itemsize
+        layout[name] = [col.typecode, offset, nbytes]
+        offset += nbytes + _pad(nbytes)
+
+    header = json.dumps({
+        'version': FORMAT_VERSION,
+        'nodes': len(table),
+        'byteorder': sys.byteorder,
+        'types': table.types,
+        'columns': layout,
+    }, ensure_ascii=False).encode('utf-8')
+    prefix = len(MAGIC) + 4 + len(header)
+
+    tmp_path = output_file + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header)))
+        f.write(header)
+        f.write(b'\0' * _pad(prefix))
+        for name, col in columns:
+            col.tofile(f)
+            f.write(b'\0' * _pad(len(col) * col.itemsize))
+        size = f.tell()
+    os.replace(tmp_path, output_file)
+    return size
+
+
+class BinaryAST:
+    """
+    mmap 映射的二进制 AST，访问接口与 NodeTable 相同
+
+    各列为 memoryview（字节序与本机不同时退化为复制后的 array），
+    使用完后调用 close() 或用 with 语句释放映射。
+    """
+
+    __slots__ = NODE_COLUMNS + ('types', 'text_offsets', 'text_blob', '_f', '_mm', '_views')
+
+    def __init__(self, path):
+        self._f = open(path, 'rb')
+        try:
+            self._mm = mmap.mmap(self._f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._f.close()
+            raise ValueError(f"不是二进制 AST 文件: {path}")
+        self._views = []
+        mm = self._mm
+        if mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f"不是二进制 AST 文件: {path}")
+        (header_len,) = struct.unpack_from('<I', mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(mm[start:start + header_len].decode('utf-8'))
+        if header.get('version') != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"不支持的二进制 AST 版本: {header.get('version')}")
+        base = start + header_len
+        base += _pad(base)
+
+        self.types = header['types']
+        swap = header['byteorder'] != sys.byteorder
+        whole = memoryview(mm)
+        self._views.append(whole)
+        for name, (code, offset, nbytes) in header['columns'].items():
+            raw = whole[base + offset:base + offset + nbytes]
+            if swap and code not in ('B', 'b'):
+                col = array(code)
+                col.frombytes(raw)
+                col.byteswap()
+            else:
+                col = raw.cast(code)
+                self._views.append(raw)
+                self._views.append(col)
+            setattr(self, name, col)
+
+    def close(self):
+        for view in reversed(self._views):
+            view.release()
+        self._views = []
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.parent)
+
+    def text(self, i):
+        text_id = self.text_id[i]
+        start, end = self.text_offsets[text_id], self.text_offsets[text_id + 1]
+        return bytes(self.text_blob[start:end]).decode('utf-8', 'surrogateescape')
+
+    def type_name(self, i):
+        return self.types[self.type_id[i]]
+
+    def get_bb(self, i):
+        return self.bb[i] if self.flags[i] & HAS_BB else None
+
+    def get_loc(self, i):
+        if not self.flags[i] & HAS_LOC:
+            return None
+        return tuple(self.loc[5 * i:5 * i + 5])
+
+    def children(self, i):
+        """依次产出节点 i 的子节点序号"""
+        child = self.first_child[i]
+        while child != NO_INDEX:
+            yield child
+            child = self.next_sibling[child]
+
+    def roots(self):
+        return [i for i, p in enumerate(self.parent) if p == NO_INDEX]
+
+    def subtree_end(self, i):
+        """节点 i 的子树在表中的结束位置（不含）"""
+        depth = self.depth[i]
+        n = len(self.parent)
+        j = i + 1
+        while j < n and self.depth[j] > depth:
+            j += 1
+        return j
+
+
+def format_node(table, i):
+    """按规范文本格式输出节点 i（不含换行）"""
+    parts = [' ' * (2 * table.depth[i]), '-> ', table.text(i)]
+    node_type = table.type_name(i)
+    if node_type:
+        parts.append(f" ({node_type})")
+    bb = table.get_bb(i)
+    if bb is not None:
+        parts.append(f"  (BB:{bb})")
+    loc = table.get_loc(i)
+    if loc is not None:
+        parts.append(f" ({', '.join(map(str, loc))})")
+    return ''.join(parts)
+
+
+def iter_text_lines(table):
+    """
+    产出规范格式的文本行
+
+    根节点与前一个根节点不是兄弟（原来被分隔行隔开）时，先产出一行 'Print Tree:'。
+    原文中的分隔行本身（'Print Tree:'、'segment N'、'xxx' 等）和空行不在节点表中，
+    不会原样写回：连续的多个分隔行只对应一行 'Print Tree:'。
+    """
+    prev_root = NO_INDEX
+    for i in range(len(table)):
+        if table.parent[i] == NO_INDEX:
+            if prev_root == NO_INDEX or table.next_sibling[prev_root] != i:
+                yield "Print Tree:\n"
+            prev_root = i
+        yield format_node(table, i) + "\n"
+
+
+def encode_file(input_file, output_file):
+    """文本 dump -> 二进制文件，返回 (节点数, 写入字节数)"""
+    table = NodeTable.from_file(input_file, encoding='utf-8')
+    return len(table), save_binary(table, output_file)
+
+
+def decode_file(input_file, output_file):
+    """二进制文件 -> 规范格式文本 dump，返回节点数"""
+    with BinaryAST(input_file) as table, open(output_file, 'w', encoding='utf-8',
+                                              errors='surrogateescape') as out_f:
+        out_f.writelines(iter_text_lines(table))
+        return len(table)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="二进制 AST 格式")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_encode = sub.add_parser('encode', help="文本 dump 转为二进制")
+    p_encode.add_argument('input', help="AST dump")
+    p_encode.add_argument('output', help="二进制文件")
+
+    p_decode = sub.add_parser('decode', help="二进制转为规范格式文本 dump")
+    p_decode.add_argument('input', help="二进制文件")
+    p_decode.add_argument('output', help="AST dump")
+
+    p_info = sub.add_parser('info', help="查看二进制文件")
+    p_info.add_argument('input', help="二进制文件")
+
+    for p in (p_encode, p_decode, p_info):
+        run_stats.add_stats_argument(p)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if not os.path.isfile(args.input):
+        print(f"错误: 文件不存在: {args.input}")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        if args.command == 'encode':
+            with run_stats.phase('encode'):
+                nodes, size = encode_file(args.input, args.output)
+            run_stats.count_file('bytes_read', args.input)
+            run_stats.count(bytes_written=size, lines=nodes, files_created=1)
+            print(f"已写入 {nodes} 个节点（{size / 1024:.1f} KB）到: {args.output}")
+        elif args.command == 'decode':
+            with run_stats.phase('decode'):
+                nodes = decode_file(args.input, args.output)
+            run_stats.count_file('bytes_read', args.input)
+            run_stats.count_file('bytes_written', args.output)
+            run_stats.count(lines=nodes, files_created=1)
+            print(f"已写出 {nodes} 个节点到: {args.output}")
+        else:
+            with run_stats.phase('info'), BinaryAST(args.input) as table:
+                load_time = time.perf_counter() - start
+                print(f"文件: {args.input}")
+                print("-" * 50)
+                print(f"节点数: {len(table)}")
+                print(f"根节点数: {len(table.roots())}")
+                print(f"不同类型数: {len(table.types)}")
+                print(f"不同文本数: {len(table.text_offsets) - 1}")
+                print(f"文件大小: {os.path.getsize(args.input) / 1024:.1f} KB")
+                print(f"加载耗时: {load_time * 1000:.2f} 毫秒")
+            return
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+    print(f"耗时: {time.perf_counter() - start:.2f} 秒")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+AST dump 流式解析器
+
+解析形如 `  -> text (TYPE)  (BB:n) (a, b, c, d, e)` 的缩进格式 dump，
+一次顺序读取即可构建紧凑的列式节点表（NodeTable），供各脚本复用。
+节点的各个字段存放在 array 中，文本和类型名做驻留（intern），
+不再为每一行保留一个 Python 字符串。
+
+用法: python ast_dump.py <AST dump文件>
+"""
+
+import argparse
+import sys
+from array import array
+from collections import Counter
+
+import run_stats
+
+# flags 列中的标志位
+HAS_BB = 1
+HAS_LOC = 2
+
+NO_INDEX = -1
+
+
+def parse_line(line):
+    """
+    解析一行 dump
+
+    Args:
+        line (str): 原始行（可以带换行符）
+
+    Returns:
+        tuple: (indent, text, type, bb, loc)，bb/loc 缺失时为 None；
+               不是节点行（如 'Print Tree:'、'segment 0'）时返回 None
+    """
+    s = line.rstrip()
+    body = s.lstrip(' \t')
+    if not body.startswith('->'):
+        return None
+    indent = len(s) - len(body)
+    rest = body[2:].strip()
+
+    # 从右往左依次剥离位置信息、BB 和类型
+    loc = None
+    if rest.endswith(')'):
+        p = rest.rfind('(')
+        parts = rest[p + 1:-1].split(',')
+        if len(parts) == 5:
+            try:
+                loc = tuple(int(x) for x in parts)
+                rest = rest[:p].rstrip()
+            except ValueError:
+                loc = None
+
+    bb = None
+    if rest.endswith(')'):
+        p = rest.rfind('(BB:')
+        if p != -1 and rest[p + 4:-1].isdigit():
+            bb = int(rest[p + 4:-1])
+            rest = rest[:p].rstrip()
+
+    node_type = ''
+    if rest.endswith(')'):
+        p = rest.rfind(' (')
+        if p != -1:
+            node_type = rest[p + 2:-1]
+            rest = rest[:p]
+
+    return indent, rest, node_type, bb, loc
+
+
+def iter_nodes(lines):
+    """
+    流式遍历节点，按缩进还原父子关系
+
+    空行（extractFuncs_ipat_88.py 输出的函数文件每个节点行后都有一个空行）直接跳过；
+    其他非节点行（'Print Tree:'、'segment N'、'xxx' 等）视为树之间的分隔，
+    遇到时清空当前的祖先栈。
+
+    Args:
+        lines: 可迭代的行（文件对象或生成器）
+
+    Yields:
+        tuple: (parent, depth, text, type, bb, loc)，parent 为前面已产出节点的序号
+    """
+    stack = []  # [(indent, index)]
+    index = 0
+    for line in lines:
+        parsed = parse_line(line)
+        if parsed is None:
+            if line.strip():
+                stack.clear()
+            continue
+        indent, text, node_type, bb, loc = parsed
+        while stack and stack[-1][0] >= indent:
+            stack.pop()
+        parent = stack[-1][1] if stack else NO_INDEX
+        yield parent, len(stack), text, node_type, bb, loc
+        stack.append((indent, index))
+        index += 1
+
+
+class NodeTable:
+    """
+    列式节点表
+
+    第 i 个节点的字段分别存放在各个 array 的第 i 项中，节点按 dump 中的
+    先序顺序编号，因此节点 i 的子树正好是区间 [i, subtree_end(i))。
+    """
+
+    __slots__ = ('parent', 'first_child', 'next_sibling', 'depth',
+                 'type_id', 'text_id', 'bb', 'flags', 'loc',
+                 'texts', 'types', '_text_ids', '_type_ids',
+                 '_last_child', '_last_root')
+
+    def __init__(self):
+        self.parent = array('i')
+        self.first_child = array('i')
+        self.next_sibling = array('i')
+        self.depth = array('H')
+        self.type_id = array('I')
+        self.text_id = array('I')
+        self.bb = array('I')
+        self.flags = array('B')
+        self.loc = array('i')  # 每个节点 5 项
+        self.texts = []
+        self.types = []
+        self._text_ids = {}
+        self._type_ids = {}
+        self._last_child = {}
+        self._last_root = NO_INDEX
+
+    @classmethod
+    def from_lines(cls, lines):
+        """从行迭代器构建节点表，空行和分隔行的处理同 iter_nodes"""
+        table = cls()
+        stack = []  # [(indent, index)]
+        for line in lines:
+            parsed = parse_line(line)
+            if parsed is None:
+                if not line.strip():
+                    continue
+                # 分隔行两侧的根节点不串成兄弟
+                stack.clear()
+                table._last_child.clear()
+                table._last_root = NO_INDEX
+                continue
+            indent, text, node_type, bb, loc = parsed
+            while stack and stack[-1][0] >= indent:
+                table._last_child.pop(stack.pop()[1], None)
+            parent = stack[-1][1] if stack else NO_INDEX
+            stack.append((indent, table.append(parent, len(stack), text, node_type, bb, loc)))
+        table._last_child.clear()
+        return table
+
+    @classmethod
+    def from_file(cls, file_path, encoding='utf-8'):
+        """流式读取 dump 文件并构建节点表"""
+        with open(file_path, 'r', encoding=encoding) as f:
+            return cls.from_lines(f)
+
+    def _intern(self, value, ids, values):
+        i = ids.get(value)
+        if i is None:
+            i = len(values)
+            ids[value] = i
+            values.append(value)
+        return i
+
+    def append(self, parent, depth, text, node_type, bb=None, loc=None):
+        """追加一个节点（父节点必须已经在表中），返回新节点的序号"""
+        index = len(self.parent)
+        self.parent.append(parent)
+        self.first_child.append(NO_INDEX)
+        self.next_sibling.append(NO_INDEX)
+        self.depth.append(depth)
+        self.type_id.append(self._intern(node_type, self._type_ids, self.types))
+        self.text_id.append(self._intern(text, self._text_ids, self.texts))
+
+        flags = 0
+        if bb is not None:
+            flags |= HAS_BB
+        self.bb.append(bb if bb is not None else 0)
+        if loc is not None:
+            flags |= HAS_LOC
+            self.loc.extend(loc)
+        else:
+            self.loc.extend((0, 0, 0, 0, 0))
+        self.flags.append(flags)
+
+        # 维护 first_child / next_sibling
+        if parent == NO_INDEX:
+            prev = self._last_root
+            self._last_root = index
+        else:
+            prev = self._last_child.get(parent, NO_INDEX)
+            self._last_child[parent] = index
+            if prev == NO_INDEX:
+                self.first_child[parent] = index
+        if prev != NO_INDEX:
+            self.next_sibling[prev] = index
+        return index
+
+    def __len__(self):
+        return len(self.parent)
+
+    def text(self, i):
+        return self.texts[self.text_id[i]]
+
+    def type_name(self, i):
+        return self.types[self.type_id[i]]
+
+    def get_bb(self, i):
+        return self.bb[i] if self.flags[i] & HAS_BB else None
+
+    def get_loc(self, i):
+        if not self.flags[i] & HAS_LOC:
+            return None
+        return tuple(self.loc[5 * i:5 * i + 5])
+
+    def children(self, i):
+        """依次产出节点 i 的子节点序号"""
+        child = self.first_child[i]
+        while child != NO_INDEX:
+            yield child
+            child = self.next_sibling[child]
+
+    def roots(self):
+        return [i for i, p in enumerate(self.parent) if p == NO_INDEX]
+
+    def subtree_end(self, i):
+        """节点 i 的子树在表中的结束位置（不含）"""
+        depth = self.depth[i]
+        n = len(self.parent)
+        j = i + 1
+        while j < n and self.depth[j] > depth:
+            j += 1
+        return j
+
+    def nbytes(self):
+        """各列占用的字节数（不含驻留字符串）"""
+        columns = (self.parent, self.first_child, self.next_sibling, self.depth,
+                   self.type_id, self.text_id, self.bb, self.flags, self.loc)
+        return sum(c.itemsize * len(c) for c in columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AST dump 流式解析器",
+                                     epilog="示例: python ast_dump.py simple_680.txt")
+    parser.add_argument('file', help="AST dump文件")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    file_path = args.file
+    try:
+        with run_stats.phase('parse'):
+            table = NodeTable.from_file(file_path)
+    except FileNotFoundError:
+        print(f"错误: 文件不存在: {file_path}")
+        sys.exit(1)
+    run_stats.count_file('bytes_read', file_path)
+    run_stats.count(lines=len(table))
+
+    print(f"文件: {file_path}")
+    print("-" * 50)
+    print(f"节点数: {len(table)}")
+    print(f"根节点数: {len(table.roots())}")
+    print(f"最大深度: {max(table.depth) if len(table) else 0}")
+    print(f"不同类型数: {len(table.types)}")
+    print(f"不同文本数: {len(table.texts)}")
+    print(f"列存储大小: {table.nbytes() / 1024:.1f} KB")
+
+    counter = Counter(table.type_id)
+    print("\n出现最多的节点类型:")
+    print("-" * 50)
+    for type_id, count in counter.most_common(10):
+        print(f"{table.types[type_id]:<30} : {count:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分割、提取和改写脚本的吞吐量基准测试
+
+用 gen_corpus.py 在工作目录下生成一个大的 dump 文件和一个由多个小文件组成的目录，
+然后把每个脚本作为子进程运行（输出丢弃），用 os.wait4 取得子进程的资源使用，记录：
+    - 耗时（墙钟，多次运行取中位数）和 CPU 时间（用户态 + 内核态）
+    - MB/s：输入字节数 / 耗时
+    - files/s：处理的文件数 / 耗时（分割类脚本为创建的文件数，目录类脚本为输入文件数）
+    - 峰值 RSS（ru_maxrss，多次运行取最大值）
+
+结果写成 JSON 基线；--compare 与已有基线比较，MB/s 下降或峰值 RSS 增长超过 --tolerance 时
+列为退化并以退出码 1 结束。
+
+用法:
+    python benchmark.py [-o baseline.json] [--compare old.json] [--size 50M] [--files 200]
+                        [--repeat 3] [--only cut extract_segment ...] [--work 工作目录]
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from gen_corpus import DEFAULT_SEED, generate, parse_size
+import run_stats
+
+BASELINE_VERSION = 1
+DEFAULT_SIZE = '50M'
+DEFAULT_FILES = 200
+DEFAULT_REPEAT = 3
+DEFAULT_TOLERANCE = 0.10
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+def build_cases(work_dir, big_file, corpus_dir):
+    """
+    各个测试用例
+
+    Returns:
+        list: [{'name', 'argv', 'input', 'output'}]；input 为 'file' 或 'dir'，
+              output 为运行后需要清理并统计文件数的输出目录（没有时为 None）
+    """
+    def out(name):
+        return os.path.join(work_dir, 'out', name)
+
+    def script(name):
+        return [sys.executable, os.path.join(SCRIPT_DIR, name)]
+
+    return [
+        {'name': 'cut', 'input': 'file', 'output': out('cut'),
+         'argv': script('cut.py') + [big_file, '-o', out('cut')]},
+        {'name': 'cut_stream', 'input': 'file', 'output': out('cut_stream'),
+         'argv': script('cut.py') + [big_file, '-o', out('cut_stream'), '--stream', '--no-summary']},
+        {'name': 'extractFuncs_ipat_88', 'input': 'file', 'output': out('funcs'),
+         'argv': script('extractFuncs_ipat_88.py') + [big_file, out('funcs'), '-q']},
+        {'name': 'extract_segment', 'input': 'file', 'output': out('segments'),
+         'argv': script('extract_segment.py') + [big_file, os.path.join(out('segments'), 'seg_{n}.txt'),
+                                                 '-s', '0', '1', '2', '3']},
+        {'name': 'process_680ast_fixed', 'input': 'file', 'output': out('rewrite'),
+         'argv': script('process_680ast_fixed.py') + [big_file, os.path.join(out('rewrite'), 'big.txt')]},
+        {'name': 'process_680ast_fixed_dir', 'input': 'dir', 'output': out('rewrite_dir'),
+         'argv': script('process_680ast_fixed.py') + [corpus_dir, out('rewrite_dir'), '-j', '1', '--force']},
+        {'name': 'count_lines', 'input': 'dir', 'output': None,
+         'argv': script('count_lines.py') + [corpus_dir, '-q']},
+        {'name': 'count_lines_fast', 'input': 'dir', 'output': None,
+         'argv': script('count_lines.py') + [corpus_dir, '-q', '--fast']},
+        {'name': 'extract_acc_names', 'input': 'dir', 'output': out('acc'),
+         'argv': script('extract_acc_names.py') + [corpus_dir, '-j', '1',
+                                                  '-o', os.path.join(out('acc'), 'summary.txt')]},
+    ]
+
+
+def count_files(directory):
+    return sum(len(files) for _, _, files in os.walk(directory))
+
+
+def run_once(argv, cwd):
+    """
+    运行一次子进程
+
+    Returns:
+        tuple: (退出码, 墙钟耗时, CPU 时间, 峰值 RSS 字节数)
+    """
+    start = time.perf_counter()
+    proc = subprocess.Popen(argv, cwd=cwd, stdin=subprocess.DEVNULL,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    # 直接 wait4 取得该子进程自己的 rusage，Popen.wait() 不提供
+    _, status, usage = os.wait4(proc.pid, 0)
+    elapsed = time.perf_counter() - start
+    proc.returncode = os.waitstatus_to_exitcode(status)
+    # Linux 上 ru_maxrss 以 KB 为单位，macOS 上以字节为单位
+    rss = usage.ru_maxrss if sys.platform == 'darwin' else usage.ru_maxrss * 1024
+    return proc.returncode, elapsed, usage.ru_utime + usage.ru_stime, rss
+
+
+def run_case(case, input_bytes, input_files, work_dir, repeat):
+    """运行一个用例 repeat 次，返回结果字典，失败时返回 None"""
+    walls, cpus, rss = [], [], 0
+    output_files = 0
+    for _ in range(repeat):
+        if case['output']:
+            shutil.rmtree(case['output'], ignore_errors=True)
+            os.makedirs(case['output'])
+        code, wall, cpu, peak = run_once(case['argv'], work_dir)
+        if code != 0:
+            print(f"错误: {case['name']} 退出码 {code}: {' '.join(case['argv'])}")
+            return None
+        walls.append(wall)
+        cpus.append(cpu)
+        rss = max(rss, peak)
+        if case['output']:
+            output_files = count_files(case['output'])
+
+    wall = statistics.median(walls)
+    files = input_files if case['input'] == 'dir' else output_files
+    return {
+        'wall_s': round(wall, 4),
+        'cpu_s': round(statistics.median(cpus), 4),
+        'input_bytes': input_bytes,
+        'files': files,
+        'mb_per_s': round(input_bytes / (1 << 20) / wall, 2) if wall else 0.0,
+        'files_per_s': round(files / wall, 1) if wall else 0.0,
+        'peak_rss_mb': round(rss / (1 << 20), 1),
+        'runs': len(walls),
+    }
+
+
+def prepare_corpus(work_dir, size, files, seed):
+    """生成语料，返回 (大文件, 语料目录, 语料参数)"""
+    big_file = os.path.join(work_dir, 'big.txt')
+    corpus_dir = os.path.join(work_dir, 'corpus')
+    shutil.rmtree(corpus_dir, ignore_errors=True)
+    print(f"正在生成语料（{size / (1 << 20):.0f} MB 单文件 + {files} 个文件）...")
+    big = generate(big_file, size=size, seed=seed)
+    small = generate(corpus_dir, size=size, files=files, seed=seed)
+    corpus = {
+        'size': size,
+        'files': files,
+        'seed': seed,
+        'file_bytes': big['bytes'],
+        'file_functions': big['functions'],
+        'dir_bytes': small['bytes'],
+        'dir_functions': small['functions'],
+    }
+    return big_file, corpus_dir, corpus
+
+
+def run_benchmarks(work_dir, size, files, repeat, only=None, seed=DEFAULT_SEED):
+    """
+    生成语料并运行全部（或 only 中的）用例
+
+    Returns:
+        dict: 基线 JSON 的内容
+    """
+    with run_stats.phase('corpus'):
+        big_file, corpus_dir, corpus = prepare_corpus(work_dir, size, files, seed)
+    results = {}
+    for case in build_cases(work_dir, big_file, corpus_dir):
+        if only and case['name'] not in only:
+            continue
+        if case['input'] == 'dir':
+            input_bytes, input_files = corpus['dir_bytes'], files
+        else:
+            input_bytes, input_files = corpus['file_bytes'], 1
+        with run_stats.phase(case['name']):
+            result = run_case(case, input_bytes, input_files, work_dir, repeat)
+        if result is None:
+            continue
+        results[case['name']] = result
+        print(f"{case['name']:<28} {result['mb_per_s']:>9.2f} MB/s {result['files_per_s']:>10.1f} files/s "
+              f"{result['peak_rss_mb']:>8.1f} MB RSS  ({result['wall_s']:.2f} 秒)")
+
+    return {
+        'version': BASELINE_VERSION,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'corpus': corpus,
+        'results': results,
+    }
+
+
+def compare(baseline, current, tolerance=DEFAULT_TOLERANCE):
+    """
+    与基线比较并打印对比表
+
+    Returns:
+        list: 退化的用例名
+    """
+    if baseline.get('corpus', {}).get('size') != current['corpus']['size']:
+        print("注意: 基线使用的语料大小不同，吞吐量可以比较，峰值 RSS 不可直接比较")
+
+    regressions = []
+    print(f"{'用例':<28} {'MB/s 基线':>10} {'当前':>10} {'变化':>8} {'RSS 基线':>10} {'当前':>10} {'变化':>8}")
+    print("-" * 92)
+    for name, cur in current['results'].items():
+        old = baseline.get('results', {}).get(name)
+        if old is None:
+            print(f"{name:<28} {'-':>10} {cur['mb_per_s']:>10.2f} {'新增':>8}")
+            continue
+        speed = cur['mb_per_s'] / old['mb_per_s'] - 1 if old['mb_per_s'] else 0.0
+        memory = cur['peak_rss_mb'] / old['peak_rss_mb'] - 1 if old['peak_rss_mb'] else 0.0
+        flag = ''
+        if speed < -tolerance or memory > tolerance:
+            regressions.append(name)
+            flag = '  ✗ 退化'
+        print(f"{name:<28} {old['mb_per_s']:>10.2f} {cur['mb_per_s']:>10.2f} {speed:>+8.1%} "
+              f"{old['peak_rss_mb']:>10.1f} {cur['peak_rss_mb']:>10.1f} {memory:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分割、提取和改写脚本的吞吐量基准测试")
+    parser.add_argument('-o', '--output', help="把结果写成 JSON 基线")
+    parser.add_argument('--compare', help="与已有的 JSON 基线比较")
+    parser.add_argument('--size', default=DEFAULT_SIZE, help=f"语料大小（默认 {DEFAULT_SIZE}）")
+    parser.add_argument('--files', type=int, default=DEFAULT_FILES,
+                        help=f"目录语料的文件数（默认 {DEFAULT_FILES}）")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"每个用例的运行次数（默认 {DEFAULT_REPEAT}）")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"判定退化的相对变化（默认 {DEFAULT_TOLERANCE}）")
+    parser.add_argument('--only', nargs='+', help="只运行这些用例")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f"语料随机种子（默认 {DEFAULT_SEED}）")
+    parser.add_argument('--work', help="工作目录（默认使用临时目录，结束后删除）")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    try:
+        size = parse_size(args.size)
+    except ValueError:
+        print(f"错误: 无法解析大小: {args.size}")
+        sys.exit(1)
+    baseline = None
+    if args.compare:
+        try:
+            with open(args.compare, 'r', encoding='utf-8') as f:
+                baseline = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"错误: 无法读取基线 {args.compare}: {e}")
+            sys.exit(1)
+
+    if args.work:
+        os.makedirs(args.work, exist_ok=True)
+        current = run_benchmarks(os.path.abspath(args.work), size, args.files, max(1, args.repeat),
+                                 args.only, args.seed)
+    else:
+        with tempfile.TemporaryDirectory(prefix='ast_bench_') as work_dir:
+            current = run_benchmarks(work_dir, size, args.files, max(1, args.repeat),
+                                     args.only, args.seed)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(current, f, ensure_ascii=False, indent=2)
+        print(f"基线已保存到: {args.output}")
+
+    if baseline is not None:
+        print()
+        regressions = compare(baseline, current, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} 个用例退化: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
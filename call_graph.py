@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+基于 callActionName 引用的调用图索引
+
+从分割后的函数文件（调用者为文件头部记录的函数名，同名函数的 _N 文件合并为一个调用者）
+或完整 dump（调用者为所在的 _acc_start 函数或 FUNCTION_DEF/BUNDLE_DEF 的名称）中
+收集 调用者 -> accName 边，保存到 SQLite，两个方向都建有索引。
+调用者和 accName 使用同一套名称，reach 才能沿多跳边传递。
+
+用法:
+    python call_graph.py build <数据库> <目录|通配符|文件|dump> [...] [--dump] [-r] [-j N]
+    python call_graph.py callers <数据库> <accName>
+    python call_graph.py callees <数据库> <函数名>
+    python call_graph.py reach <数据库> <函数名> [--reverse] [--max-depth N]
+"""
+
+import argparse
+import os
+import re
+import sqlite3
+import sys
+from collections import Counter
+from pathlib import Path
+
+from ast_dump import parse_line
+from extract_acc_names import ACC_NAME_PATTERN, collect_input_files, scan_files
+from extractFuncs_ipat_88 import extract_function_prefix, is_start_line
+import run_stats
+
+DEF_TYPES = ('FUNCTION_DEF', 'BUNDLE_DEF')
+DEFAULT_MAX_DEPTH = 32
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS edges (
+    caller TEXT NOT NULL,
+    callee TEXT NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (caller, callee)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS edges_by_callee ON edges (callee, caller);
+"""
+
+
+def iter_dump_edges(dump_file):
+    """
+    流式遍历完整 dump，产出 (调用者, accName, 次数)
+
+    调用者取最近的 _acc_start 行的函数名前缀，或最近的 FUNCTION_DEF/BUNDLE_DEF
+    之后第一个 IDENT 节点的文本。在任何函数之前出现的调用会被忽略。
+    """
+    pattern = re.compile(ACC_NAME_PATTERN)
+    caller = None
+    pending_def = False
+    counter = Counter()
+
+    with open(dump_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if is_start_line(line):
+                caller = extract_function_prefix(line)
+                pending_def = False
+            else:
+                parsed = parse_line(line)
+                if parsed is not None:
+                    node_type = parsed[2]
+                    if node_type in DEF_TYPES:
+                        pending_def = True
+                    elif pending_def and node_type == 'IDENT':
+                        caller = parsed[1]
+                        pending_def = False
+
+            if caller is not None and 'callActionName' in line:
+                for callee in pattern.findall(line):
+                    counter[(caller, callee)] += 1
+
+    for (caller, callee), count in counter.items():
+        yield caller, callee, count
+
+
+def function_name_of(path):
+    """
+    函数文件对应的原始函数名
+
+    extractFuncs_ipat_88.py 的文件名是替换了特殊字符、重名时加了 _N 后缀的名称，
+    原始的函数名前缀写在文件头部的 IDENT 行（第 4 行）中，与 dump 模式下的调用者
+    以及 accName 一致。读不到这一行时退回到文件名（不含扩展名）。
+    """
+    try:
+        with open(path, 'r', encoding='utf-8', errors='replace') as f:
+            head = [f.readline() for _ in range(4)]
+    except OSError:
+        head = []
+    if len(head) == 4 and head[0].strip() == 'Print Tree:':
+        parsed = parse_line(head[3])
+        if parsed is not None and parsed[2] == 'IDENT' and parsed[1]:
+            return parsed[1]
+    return Path(path).stem
+
+
+def iter_file_edges(files, jobs=1):
+    """并行扫描函数文件，调用者为文件头部记录的函数名，产出 (调用者, accName, 次数)"""
+    for path, counter in scan_files(files, jobs).items():
+        caller = function_name_of(path)
+        for callee, count in counter.items():
+            yield caller, callee, count
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def build_call_graph(db_path, inputs, dump=False, recursive=False, jobs=1, append=False):
+    """
+    构建调用图数据库
+
+    Args:
+        db_path (str): SQLite 数据库路径
+        inputs (list): 函数文件所在的目录/通配符/文件，或 dump 文件（dump=True）
+        dump (bool): 输入是否为完整 dump
+        recursive (bool): 是否递归子目录
+        jobs (int): 并行进程数
+        append (bool): 在已有数据上累加，否则先清空
+
+    Returns:
+        int: 写入的边数
+    """
+    conn = connect(db_path)
+    try:
+        with conn:
+            if not append:
+                conn.execute("DELETE FROM edges")
+
+            if dump:
+                edges = (e for dump_file in inputs for e in iter_dump_edges(dump_file))
+            else:
+                edges = iter_file_edges(collect_input_files(inputs, recursive), jobs)
+
+            edge_count = 0
+            for edge in edges:
+                conn.execute(
+                    "INSERT INTO edges (caller, callee, count) VALUES (?, ?, ?) "
+                    "ON CONFLICT (caller, callee) DO UPDATE SET count = count + excluded.count",
+                    edge)
+                edge_count += 1
+    finally:
+        conn.close()
+    return edge_count
+
+
+def query_callers(conn, callee):
+    """调用了 callee 的函数：[(调用者, 次数)]"""
+    return conn.execute(
+        "SELECT caller, count FROM edges WHERE callee = ? ORDER BY count DESC, caller",
+        (callee,)).fetchall()
+
+
+def query_callees(conn, caller):
+    """caller 调用的 accName：[(accName, 次数)]"""
+    return conn.execute(
+        "SELECT callee, count FROM edges WHERE caller = ? ORDER BY count DESC, callee",
+        (caller,)).fetchall()
+
+
+def query_reach(conn, name, reverse=False, max_depth=DEFAULT_MAX_DEPTH):
+    """
+    传递可达：name 直接或间接调用的所有名称（reverse=True 时为直接或间接调用 name 的函数）
+
+    Returns:
+        list: [(名称, 最短距离)]
+    """
+    src, dst = ('callee', 'caller') if reverse else ('caller', 'callee')
+    sql = f"""
+        WITH RECURSIVE reach(name, depth) AS (
+            SELECT {dst}, 1 FROM edges WHERE {src} = :name
+            UNION
+            SELECT e.{dst}, r.depth + 1 FROM edges e JOIN reach r ON e.{src} = r.name
+            WHERE r.depth < :max_depth
+        )
+        SELECT name, MIN(depth) FROM reach WHERE name != :name
+        GROUP BY name ORDER BY 2, 1
+    """
+    return conn.execute(sql, {'name': name, 'max_depth': max_depth}).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="callActionName 调用图索引")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="构建调用图数据库")
+    p_build.add_argument('db', help="SQLite 数据库路径")
+    p_build.add_argument('inputs', nargs='+', help="函数文件目录/通配符/文件，或 dump 文件")
+    p_build.add_argument('--dump', action='store_true', help="输入为完整 dump 而不是函数文件")
+    p_build.add_argument('--append', action='store_true', help="在已有数据上累加")
+    p_build.add_argument('-r', '--recursive', action='store_true', help="递归子目录")
+    p_build.add_argument('-j', '--jobs', type=int, default=0,
+                         help="并行进程数，0 表示使用全部CPU（默认 0）")
+
+    for name, help_text, arg_help in (('callers', "哪些函数调用了指定的 accName", "accName"),
+                                      ('callees', "指定函数调用了哪些 accName", "函数名")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument('db', help="SQLite 数据库路径")
+        p.add_argument('name', help=arg_help)
+
+    p_reach = sub.add_parser('reach', help="传递可达的名称")
+    p_reach.add_argument('db', help="SQLite 数据库路径")
+    p_reach.add_argument('name', help="起点名称")
+    p_reach.add_argument('--reverse', action='store_true', help="沿调用者方向查找")
+    p_reach.add_argument('--max-depth', type=int, default=DEFAULT_MAX_DEPTH,
+                         help=f"最大深度（默认 {DEFAULT_MAX_DEPTH}）")
+
+    for p in sub.choices.values():
+        run_stats.add_stats_argument(p)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if args.command == 'build':
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        with run_stats.phase('build'):
+            edge_count = build_call_graph(args.db, args.inputs, dump=args.dump,
+                                          recursive=args.recursive, jobs=jobs, append=args.append)
+        run_stats.count(edges=edge_count)
+        print(f"已写入 {edge_count} 条边到: {args.db}")
+        return
+
+    if not os.path.exists(args.db):
+        print(f"错误: 数据库不存在: {args.db}")
+        sys.exit(1)
+
+    conn = connect(args.db)
+    try:
+        with run_stats.phase('query'):
+            if args.command == 'callers':
+                rows = query_callers(conn, args.name)
+                print(f"调用 {args.name} 的函数 ({len(rows)} 个):")
+            elif args.command == 'callees':
+                rows = query_callees(conn, args.name)
+                print(f"{args.name} 调用的 accName ({len(rows)} 个):")
+            else:
+                rows = query_reach(conn, args.name, args.reverse, args.max_depth)
+                direction = "间接调用者" if args.reverse else "可达名称"
+                print(f"{args.name} 的{direction} ({len(rows)} 个):")
+    finally:
+        conn.close()
+    run_stats.count(rows=len(rows))
+
+    print("-" * 50)
+    label = "距离" if args.command == 'reach' else "次数"
+    for name, value in rows:
+        print(f"{name:<30} {label}: {value}")
+
+
+if __name__ == "__main__":
+    main()
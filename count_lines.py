@@ -2,13 +2,18 @@
 # -*- coding: utf-8 -*-
 """
 统计文件夹中所有txt文件的行数
-用法: python count_lines.py <文件夹路径>
+用法: python count_lines.py <文件夹路径> [--fast] [-j N] [-r] [-q] [--cache]
 """
 
+import argparse
+import json
 import os
-import sys
+from bisect import bisect_left
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
+import run_stats
+
 def count_lines_in_file(file_path):
     """统计单个文件的行数"""
     try:
@@ -18,8 +23,197 @@ def count_lines_in_file(file_path):
         print(f"错误: 无法读取文件 {file_path}: {e}")
         return -1
 
-def count_lines_in_directory(directory_path):
-    """统计目录中所有txt文件的行数"""
+# 行数分布区间：(区间上限, 名称)，最后一个区间没有上限
+LINE_RANGES = [
+    (10, "0-10行"),
+    (20, "11-20行"),
+    (50, "21-50行"),
+    (100, "51-100行"),
+    (200, "101-200行"),
+    (500, "201-500行"),
+    (1000, "501-1000行"),
+    (None, "1000行以上"),
+]
+RANGE_EDGES = [upper for upper, _ in LINE_RANGES[:-1]]
+READ_CHUNK_SIZE = 1 << 20
+CACHE_SUFFIX = '.count_lines_cache.json'
+FAST_CACHE_SUFFIX = '.count_lines_fast_cache.json'
+CACHE_VERSION = 1
+
+def count_lines_fast(file_path):
+    """
+    按二进制块统计换行数，不解码文件内容
+
+    最后一行没有换行符时同样计为一行。只有 \n 算作换行：对于 \n 或 \r\n 换行的
+    文件，结果与 count_lines_in_file（len(f.readlines())）一致；文本模式的通用换行
+    还会把单独的 \r 当作换行，因此含有单独 \r 的文件两者的结果不同。
+    """
+    try:
+        count = 0
+        last = b''
+        with open(file_path, 'rb') as f:
+            while True:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    break
+                count += chunk.count(b'\n')
+                last = chunk[-1:]
+        if last and last != b'\n':
+            count += 1
+        return count
+    except Exception as e:
+        print(f"错误: 无法读取文件 {file_path}: {e}")
+        return -1
+
+def find_txt_files(directory, recursive=False):
+    """获取目录（可递归子目录）中的所有txt文件，按路径排序"""
+    candidates = directory.rglob("*.txt") if recursive else directory.glob("*.txt")
+    return sorted(p for p in candidates if p.is_file())
+
+def count_files(txt_files, fast=False, jobs=1):
+    """
+    统计一组文件的行数
+
+    Args:
+        txt_files (list): 文件路径列表
+        fast (bool): 是否使用二进制块计数
+        jobs (int): 并行进程数，为 1 时在当前进程中统计
+
+    Returns:
+        list: 与 txt_files 一一对应的行数，读取失败的为 -1
+    """
+    counter = count_lines_fast if fast else count_lines_in_file
+    if jobs == 1 or len(txt_files) < 2:
+        return [counter(p) for p in txt_files]
+    chunksize = max(1, min(1024, len(txt_files) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        return list(pool.map(counter, txt_files, chunksize=chunksize))
+
+def cache_path(directory, fast=False):
+    """
+    行数缓存文件路径：与目录同级的 .<目录名>.count_lines_cache.json
+
+    --fast 按字节数换行，与解码计数在单独 CR 换行和非 UTF-8 文件上结果不同，
+    因此两种模式各用一个缓存文件（--fast 为 .<目录名>.count_lines_fast_cache.json）。
+    """
+    directory = directory.resolve()
+    suffix = FAST_CACHE_SUFFIX if fast else CACHE_SUFFIX
+    return directory.parent / f".{directory.name}{suffix}"
+
+def load_cache(directory, fast=False):
+    """读取行数缓存，返回 {相对路径: [size, mtime_ns, 行数]}"""
+    try:
+        with open(cache_path(directory, fast), 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        if data.get('version') == CACHE_VERSION:
+            return data['files']
+    except (OSError, ValueError, KeyError):
+        pass
+    return {}
+
+def save_cache(directory, entries, fast=False):
+    """原子地写出行数缓存"""
+    path = cache_path(directory, fast)
+    tmp_path = path.with_name(path.name + '.tmp')
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': CACHE_VERSION, 'files': entries}, f)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        print(f"警告: 无法写入缓存文件 {path}: {e}")
+
+def count_files_cached(directory, txt_files, fast=False, jobs=1):
+    """
+    借助缓存统计行数，只重新读取新增或 (size, mtime_ns) 发生变化的文件，
+    --fast 与解码计数分别使用各自的缓存
+
+    Returns:
+        tuple: (与 txt_files 一一对应的行数列表, 重新统计的文件数)
+    """
+    cache = load_cache(directory, fast)
+    entries = {}
+    line_counts = [None] * len(txt_files)
+    stale = []
+
+    for i, file_path in enumerate(txt_files):
+        st = file_path.stat()
+        key = str(file_path.relative_to(directory))
+        cached = cache.get(key)
+        if cached and cached[0] == st.st_size and cached[1] == st.st_mtime_ns:
+            line_counts[i] = cached[2]
+            entries[key] = cached
+        else:
+            stale.append((i, key, st))
+
+    recounted = count_files([txt_files[i] for i, _, _ in stale], fast, jobs)
+    for (i, key, st), line_count in zip(stale, recounted):
+        line_counts[i] = line_count
+        if line_count >= 0:
+            entries[key] = [st.st_size, st.st_mtime_ns, line_count]
+            run_stats.count(bytes_read=st.st_size)
+
+    # 已删除文件的条目随之丢弃
+    if entries != cache:
+        save_cache(directory, entries, fast)
+    return line_counts, len(stale)
+
+def summarize_line_counts(line_counts):
+    """
+    一次遍历计算行数分布和最少/最多/平均行数
+
+    Returns:
+        dict: buckets 为每个区间的文件数，另有 count/total/min/max/avg
+    """
+    buckets = [0] * len(LINE_RANGES)
+    total = 0
+    min_lines = None
+    max_lines = None
+    for lines in line_counts:
+        buckets[bisect_left(RANGE_EDGES, lines)] += 1
+        total += lines
+        if min_lines is None or lines < min_lines:
+            min_lines = lines
+        if max_lines is None or lines > max_lines:
+            max_lines = lines
+    count = len(line_counts)
+    return {
+        'buckets': buckets,
+        'count': count,
+        'total': total,
+        'min': min_lines,
+        'max': max_lines,
+        'avg': total / count if count else 0.0,
+    }
+
+def print_distribution(summary):
+    """打印行数分布统计"""
+    print("\n行数分布统计:")
+    print("-" * 40)
+
+    for (_, range_name), count in zip(LINE_RANGES, summary['buckets']):
+        if count > 0:
+            percentage = (count / summary['count']) * 100
+            print(f"{range_name:<12}: {count:>3} 个文件 ({percentage:>5.1f}%)")
+
+    # 显示统计信息
+    print("-" * 40)
+    print(f"最少行数: {summary['min']} 行")
+    print(f"最多行数: {summary['max']} 行")
+    print(f"平均行数: {summary['avg']:.1f} 行")
+
+def count_lines_in_directory(directory_path, fast=False, jobs=1, recursive=False, quiet=False,
+                             use_cache=False):
+    """
+    统计目录中所有txt文件的行数
+
+    Args:
+        directory_path (str): 目录路径
+        fast (bool): 按二进制块统计换行数
+        jobs (int): 并行进程数
+        recursive (bool): 是否递归统计子目录
+        quiet (bool): 不逐个打印文件的行数
+        use_cache (bool): 使用与目录同级的缓存，只重新统计新增或修改过的文件
+    """
     directory = Path(directory_path)
     
     if not directory.exists():
@@ -30,8 +224,9 @@ def count_lines_in_directory(directory_path):
         print(f"错误: 不是目录: {directory_path}")
         return
     
-    # 获取所有txt文件
-    txt_files = list(directory.glob("*.txt"))
+    # 获取所有txt文件（按文件名排序）
+    with run_stats.phase('scan'):
+        txt_files = find_txt_files(directory, recursive)
     
     if not txt_files:
         print(f"在目录 {directory_path} 中没有找到txt文件")
@@ -40,69 +235,54 @@ def count_lines_in_directory(directory_path):
     print(f"在目录 {directory_path} 中找到 {len(txt_files)} 个txt文件:")
     print("-" * 80)
     
+    with run_stats.phase('count'):
+        if use_cache:
+            file_line_counts, recounted = count_files_cached(directory, txt_files, fast, jobs)
+        else:
+            file_line_counts = count_files(txt_files, fast, jobs)
+            for file_path in txt_files:
+                run_stats.count_file('bytes_read', file_path)
+
     total_lines = 0
     file_count = 0
     line_counts = []  # 存储所有文件的行数
     
-    # 按文件名排序
-    txt_files.sort()
-    
-    for file_path in txt_files:
-        line_count = count_lines_in_file(file_path)
+    for file_path, line_count in zip(txt_files, file_line_counts):
         if line_count >= 0:
-            print(f"{file_path.name:<30} {line_count:>6} 行")
+            if not quiet:
+                name = file_path.relative_to(directory) if recursive else file_path.name
+                print(f"{str(name):<30} {line_count:>6} 行")
             total_lines += line_count
             file_count += 1
             line_counts.append(line_count)
     
+    run_stats.count(lines=total_lines, files=file_count)
     print("-" * 80)
     print(f"总计: {file_count} 个文件, {total_lines} 行")
+    if use_cache:
+        print(f"缓存: 重新统计 {recounted} 个文件, 复用 {len(txt_files) - recounted} 个")
     
     # 统计行数分布
     if line_counts:
-        print("\n行数分布统计:")
-        print("-" * 40)
-        
-        # 定义行数区间
-        ranges = [
-            (0, 10, "0-10行"),
-            (11, 20, "11-20行"),
-            (21, 50, "21-50行"),
-            (51, 100, "51-100行"),
-            (101, 200, "101-200行"),
-            (201, 500, "201-500行"),
-            (501, 1000, "501-1000行"),
-            (1001, float('inf'), "1000行以上")
-        ]
-        
-        for min_lines, max_lines, range_name in ranges:
-            if max_lines == float('inf'):
-                count = sum(1 for lines in line_counts if lines > min_lines)
-            else:
-                count = sum(1 for lines in line_counts if min_lines <= lines <= max_lines)
-            
-            if count > 0:
-                percentage = (count / len(line_counts)) * 100
-                print(f"{range_name:<12}: {count:>3} 个文件 ({percentage:>5.1f}%)")
-        
-        # 显示统计信息
-        if line_counts:
-            min_lines = min(line_counts)
-            max_lines = max(line_counts)
-            avg_lines = sum(line_counts) / len(line_counts)
-            print("-" * 40)
-            print(f"最少行数: {min_lines} 行")
-            print(f"最多行数: {max_lines} 行")
-            print(f"平均行数: {avg_lines:.1f} 行")
+        print_distribution(summarize_line_counts(line_counts))
 
 def main():
-    if len(sys.argv) != 2:
-        print("用法: python count_lines.py <文件夹路径>")
-        print("示例: python count_lines.py /path/to/folder")
-        sys.exit(1)
-    
-    directory_path = sys.argv[1]
-    count_lines_in_directory(directory_path)
+    parser = argparse.ArgumentParser(description="统计文件夹中所有txt文件的行数")
+    parser.add_argument('directory', help="文件夹路径")
+    parser.add_argument('--fast', action='store_true', help="按二进制块统计换行数（不解码）")
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help="并行进程数，0 表示使用全部CPU（默认 1）")
+    parser.add_argument('-r', '--recursive', action='store_true', help="递归统计子目录")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不逐个打印文件的行数")
+    parser.add_argument('--cache', action='store_true',
+                        help="使用增量缓存，只重新统计新增或修改过的文件")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    count_lines_in_directory(args.directory, fast=args.fast, jobs=jobs,
+                             recursive=args.recursive, quiet=args.quiet, use_cache=args.cache)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,12 +1,16 @@
+import argparse
 import os
 import re
 import sys
 
+import run_stats
+
 # 配置
 START_MARKER = ('xxx', 'yyy')
 OUTPUT_DIR = 'output'
 HEADER_LINE = 'zzz'
 INDENT = '  '  # 两个空格
+WRITE_BUFFER_SIZE = 1 << 20  # 流式模式下每个输出文件的写缓冲
 
 def extract_function_name(line):
     """
@@ -24,7 +28,7 @@ def process_input_file(input_file, output_dir=OUTPUT_DIR):
     print(f"📁 确保输出目录存在：{output_dir}")
 
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
+        with run_stats.phase('read'), open(input_file, 'r', encoding='utf-8') as f:
             lines = [line.rstrip('\n') for line in f.readlines()]
     except FileNotFoundError:
         print(f"❌ 错误：输入文件 '{input_file}' 不存在！")
@@ -33,6 +37,9 @@ def process_input_file(input_file, output_dir=OUTPUT_DIR):
         print(f"❌ 读取文件时出错：{e}")
         return
 
+    run_stats.count_file('bytes_read', input_file)
+    run_stats.count(lines=len(lines))
+
     # 存储每个函数的 (name, content) 列表
     functions = []
     i = 0
@@ -83,25 +90,161 @@ def process_input_file(input_file, output_dir=OUTPUT_DIR):
         else:
             i += 1
 
+    run_stats.count(functions=len(functions))
+
     # 写入每个函数到独立文件
-    for func_name, content_lines in functions:
-        output_file = os.path.join(output_dir, f"{func_name}.txt")
-        try:
-            with open(output_file, 'w', encoding='utf-8') as f:
-                f.write('\n'.join(content_lines) + '\n')
-            print(f"📄 已写入：{output_file}")
-        except Exception as e:
-            print(f"❌ 写入文件 {output_file} 失败：{e}")
+    with run_stats.phase('write'):
+        for func_name, content_lines in functions:
+            output_file = os.path.join(output_dir, f"{func_name}.txt")
+            try:
+                with open(output_file, 'w', encoding='utf-8') as f:
+                    f.write('\n'.join(content_lines) + '\n')
+                print(f"📄 已写入：{output_file}")
+                run_stats.count(files_created=1)
+                run_stats.count_file('bytes_written', output_file)
+            except Exception as e:
+                print(f"❌ 写入文件 {output_file} 失败：{e}")
 
     print(f"🎉 完成！共提取 {len(functions)} 个函数到 '{output_dir}' 目录。")
 
+def split_lines_stream(lines, output_dir=OUTPUT_DIR, verbose=False):
+    """
+    流式分割：逐行处理，每个函数的内容直接写入其输出文件，
+    读到下一个 xxx/yyy 时关闭当前文件，内存占用与输入大小无关
+
+    Args:
+        lines: 可迭代的行（文件对象或生成器）
+        output_dir (str): 输出目录
+        verbose (bool): 是否逐个打印提取的函数
+
+    Returns:
+        dict: functions 提取的函数数，lines 读取行数，files 输出文件数，unknown 无法提取函数名的个数
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    func_count = 0
+    line_count = 0
+    unknown_count = 0
+    written_names = set()
+    out_f = None
+
+    # 状态：seek 寻找 xxx/yyy；skip 跳过 func_start 行；name 读取函数名行；body 函数内容
+    state = 'seek'
+    try:
+        for lineno, raw in enumerate(lines, 1):
+            line_count += 1
+            line = raw.rstrip('\n')
+
+            if state == 'body' and line.strip() in START_MARKER:
+                out_f.close()
+                run_stats.count_file('bytes_written', out_f.name)
+                out_f = None
+                state = 'skip'
+            elif state == 'body':
+                out_f.write(INDENT + line + '\n')
+            elif state == 'seek':
+                if line.strip() in START_MARKER:
+                    state = 'skip'
+            elif state == 'skip':
+                state = 'name'
+            else:
+                func_name = extract_function_name(line)
+                if not func_name:
+                    print(f"⚠️ 警告：在第 {lineno} 行无法提取函数名：{line}")
+                    func_name = f"unknown_{func_count}"
+                    unknown_count += 1
+                output_file = os.path.join(output_dir, f"{func_name}.txt")
+                out_f = open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE)
+                out_f.write(HEADER_LINE + '\n')
+                out_f.write(INDENT + line + '\n')
+                written_names.add(func_name)
+                func_count += 1
+                state = 'body'
+                if verbose:
+                    print(f"✅ 提取函数：{func_name}")
+    finally:
+        if out_f is not None:
+            out_f.close()
+            run_stats.count_file('bytes_written', out_f.name)
+
+    if state == 'skip':
+        print("⚠️ 警告：文件以 xxx/yyy 结尾，无内容")
+    elif state == 'name':
+        print(f"⚠️ 警告：'xxx/yyy' 后缺少行，跳过")
+
+    return {
+        'functions': func_count,
+        'lines': line_count,
+        'files': len(written_names),
+        'unknown': unknown_count,
+    }
+
+def print_stream_summary(stats, output_dir):
+    """打印流式分割的汇总信息"""
+    print(f"🎉 完成！共提取 {stats['functions']} 个函数到 '{output_dir}' 目录。")
+    print(f"   读取行数：{stats['lines']}")
+    print(f"   输出文件：{stats['files']} 个")
+    if stats['functions'] > stats['files']:
+        print(f"   同名函数：{stats['functions'] - stats['files']} 个（后出现的覆盖先出现的）")
+    if stats['unknown']:
+        print(f"   无法提取函数名：{stats['unknown']} 个")
+
+def process_input_file_stream(input_file, output_dir=OUTPUT_DIR, summary=True, verbose=False):
+    """
+    流式版本的 process_input_file，见 split_lines_stream
+
+    Args:
+        input_file (str): 输入文件路径
+        output_dir (str): 输出目录
+        summary (bool): 是否在结束时打印汇总信息
+        verbose (bool): 是否逐个打印提取的函数
+
+    Returns:
+        int: 提取的函数个数，读取失败时返回 -1
+    """
+    try:
+        with open(input_file, 'r', encoding='utf-8') as f:
+            stats = split_lines_stream(f, output_dir, verbose)
+    except FileNotFoundError:
+        print(f"❌ 错误：输入文件 '{input_file}' 不存在！")
+        return -1
+    except Exception as e:
+        print(f"❌ 处理文件时出错：{e}")
+        return -1
+
+    run_stats.count_file('bytes_read', input_file)
+    run_stats.count(lines=stats['lines'], functions=stats['functions'], files_created=stats['files'])
+    if summary:
+        print_stream_summary(stats, output_dir)
+
+    return stats['functions']
+
 # ============ 主程序入口 ============
-if __name__ == "__main__":
-    if len(sys.argv) == 2:
-        input_file = sys.argv[1]
+def main():
+    parser = argparse.ArgumentParser(description="按 xxx/yyy 分割函数到独立文件")
+    parser.add_argument('input_file', nargs='?', help="输入文件路径（默认 input.txt）")
+    parser.add_argument('-o', '--output-dir', default=OUTPUT_DIR, help=f"输出目录（默认 {OUTPUT_DIR}）")
+    parser.add_argument('--stream', action='store_true', help="流式模式：边读边写，内存占用有界")
+    parser.add_argument('--no-summary', action='store_true', help="流式模式下不打印汇总信息")
+    parser.add_argument('-v', '--verbose', action='store_true', help="流式模式下逐个打印提取的函数")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if args.input_file:
+        input_file = args.input_file
     else:
         input_file = "input.txt"
         print(f"📌 使用默认输入文件：{input_file}")
         print(f"📌 用法：python {sys.argv[0]} <输入文件路径>")
 
-    process_input_file(input_file)
\ No newline at end of file
+    with run_stats.phase('split'):
+        if args.stream:
+            process_input_file_stream(input_file, args.output_dir,
+                                      summary=not args.no_summary, verbose=args.verbose)
+        else:
+            process_input_file(input_file, args.output_dir)
+
+
+if __name__ == "__main__":
+    main()
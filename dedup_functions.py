@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+函数文件按规范形式去重
+
+extractFuncs_ipat_88.py 输出的函数文件中，很多只在 BB 编号、位置元组和
+generate_unique_filename 加的 _N 文件名后缀上不同。这里对每个函数树计算规范哈希：
+去掉 (BB:n) 和位置元组，缩进换成由父子关系还原出的深度，只保留节点的
+结构、类型和文本。哈希相同的文件属于同一个等价类，匹配只需要对每个等价类的
+代表文件运行一次，再把结果分发给其余成员（p_test.py --dedup）。
+
+用法: python dedup_functions.py <函数文件目录|清单文件> [-o 等价类JSON] [-j N]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+from ast_dump import iter_nodes
+from manifest import expand_manifest, is_manifest
+import run_stats
+
+
+def canonical_hash(file_path):
+    """
+    计算函数文件的规范哈希
+
+    Returns:
+        str: sha256 十六进制串，读取失败时返回 None
+    """
+    h = hashlib.sha256()
+    try:
+        with open(file_path, 'r', encoding='utf-8', errors='surrogateescape') as f:
+            for parent, depth, text, node_type, _, _ in iter_nodes(f):
+                h.update(f"{parent}\t{depth}\t{node_type}\t{text}\n".encode('utf-8', 'surrogateescape'))
+    except OSError as e:
+        print(f"错误: 无法读取文件 {file_path}: {e}")
+        return None
+    return h.hexdigest()
+
+
+def group_equivalent(files, jobs=1):
+    """
+    按规范哈希把文件分成等价类
+
+    Returns:
+        list: [(代表文件, [成员文件, ...])]，代表为类中排序后的第一个文件且也在成员中，
+              按代表文件排序；读取失败的文件各自单独成类
+    """
+    files = sorted(files)
+    if jobs > 1 and len(files) > 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            hashes = list(pool.map(canonical_hash, files, chunksize=64))
+    else:
+        hashes = [canonical_hash(path) for path in files]
+
+    classes = {}
+    for path, digest in zip(files, hashes):
+        classes.setdefault(digest if digest is not None else path, []).append(path)
+    return sorted((members[0], members) for members in classes.values())
+
+
+def write_classes(output_file, classes):
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump([{'representative': rep, 'members': members} for rep, members in classes],
+                  f, ensure_ascii=False, indent=2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="函数文件按规范形式去重")
+    parser.add_argument('input', help="函数文件目录或 .manifest 清单文件")
+    parser.add_argument('-o', '--output', help="把等价类写成 JSON")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="并行进程数，0 表示使用全部CPU（默认 0）")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if is_manifest(args.input):
+        files = expand_manifest(args.input)
+    elif os.path.isdir(args.input):
+        files = [entry.path for entry in os.scandir(args.input) if entry.is_file()]
+    else:
+        print(f"错误: 输入不存在: {args.input}")
+        sys.exit(1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with run_stats.phase('hash'):
+        classes = group_equivalent(files, jobs)
+    for path in files:
+        run_stats.count_file('bytes_read', path)
+    run_stats.count(functions=len(files), classes=len(classes))
+
+    duplicates = len(files) - len(classes)
+    print(f"文件数: {len(files)}")
+    print(f"等价类数: {len(classes)}")
+    print(f"重复文件: {duplicates} ({duplicates / len(files):.1%})" if files else "重复文件: 0")
+    print("-" * 50)
+    for rep, members in sorted(classes, key=lambda c: -len(c[1]))[:20]:
+        if len(members) > 1:
+            print(f"{os.path.basename(rep):<40} x {len(members)}")
+
+    if args.output:
+        with run_stats.phase('write'):
+            write_classes(args.output, classes)
+        run_stats.count_file('bytes_written', args.output)
+        run_stats.count(files_created=1)
+        print(f"等价类已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,9 @@
+import argparse
 import os
 import re
+import sys
+
+import run_stats
 
 def is_start_line(line):
     return "_acc_start" in line
@@ -37,69 +41,167 @@ def generate_unique_filename(base_name, used_names):
     used_names.add(unique_name)
     return unique_name
 
-input_file = input("请输入要分割的txt文件路径: ").strip()
-output_dir = input("请输入输出文件夹路径: ").strip()
-if not os.path.exists(output_dir):
-    os.makedirs(output_dir)
-
-with open(input_file, 'r', encoding='utf-8') as f:
-    lines = f.readlines()
-
-i = 0
-file_count = 0
-used_names = set()  # 用于跟踪已使用的文件名
-
-print("开始处理函数分割...")
-
-while i < len(lines):
-    if is_start_line(lines[i]):
-        # 找end行
-        end_pos = i
-        for j in range(i + 1, len(lines)):
-            if is_end_line(lines[j]):
-                end_pos = j + 3  # C++逻辑：end后多输出几行
-                break
-        if end_pos > i:
-            function_prefix = extract_function_prefix(lines[i])
-            safe_name = re.sub(r'[\\/:*?"<>|\s]', '_', function_prefix)
-            
-            # 生成唯一文件名
-            unique_name = generate_unique_filename(safe_name, used_names)
-            out_path = os.path.join(output_dir, f"{unique_name}.txt")
-            
-            # 计算缩进调整量
-            acc_start_indent = get_indent_level(lines[i])
-            indent_delta = 4 - acc_start_indent
-            
-            with open(out_path, 'w', encoding='utf-8') as out_f:
-                # 写头部
-                out_f.write("Print Tree:\n")
-                out_f.write("-> { (FUNCTION_DEF)  (BB:182014) (109, 431, 41, 41, 6)\n")
-                out_f.write("  -> FUNCTION_LABEL (FUNCTION_LABEL)  (BB:182014) (109, 431, 41, 41, 6)\n")
-                out_f.write(f"    -> {function_prefix} (IDENT)  (BB:4294967295) (109, 431, 45, 41, 6)\n")
-                out_f.write("    -> ( ('(')  (BB:4294967295) (109, 431, 45, 41, 27)\n")
-                out_f.write("    -> void (\"void\")  (BB:4294967295) (109, 431, 45, 41, 1)\n")
-                # 写start前一行（inner label）
-                if i > 0:
-                    old_indent = get_indent_level(lines[i-1])
-                    new_indent = max(0, old_indent + indent_delta)
-                    out_f.write(set_indent(lines[i-1], new_indent) + "\n")
-                # 写start到end的内容
-                for k in range(i, min(end_pos+1, len(lines))):
-                    old_indent = get_indent_level(lines[k])
-                    new_indent = max(0, old_indent + indent_delta)
-                    out_f.write(set_indent(lines[k], new_indent) + "\n")
-            
-            file_count += 1
-            print(f"✓ 创建文件 {file_count}: {unique_name}.txt (原始名称: {function_prefix})")
-            i = end_pos
+def iter_functions(lines):
+    """
+    顺序遍历一次行序列，产出每个 _acc_start 函数
+
+    只缓存当前函数：start 前一行（inner label）、start 到 _end 的内容，
+    以及 _end 之后的 3 行（C++逻辑：end后多输出几行）。找不到 _end 的函数不产出：
+    在 _end 之前又读到 start 行时，丢弃当前函数并打印警告，从新的 start 行重新开始，
+    因此缺少 _end 时缓存的内容不会超过到下一个 start 为止的部分。
+
+    Args:
+        lines: 可迭代的行（文件对象或生成器）
+
+    Yields:
+        tuple: (inner_line, body_lines)，inner_line 在 start 位于首行时为 None
+    """
+    prev = None
+    inner = None
+    body = None
+    tail = -1  # 尚未找到 _end 时为 -1
+
+    for line in lines:
+        if body is not None and tail < 0 and is_start_line(line):
+            print(f"警告: 函数 {extract_function_prefix(body[0])} 在下一个 _acc_start 之前"
+                  f"没有 _end，已丢弃")
+            body = None
+
+        if body is not None:
+            body.append(line)
+            if tail < 0:
+                if is_end_line(line):
+                    tail = 3
+            else:
+                tail -= 1
+            if tail != 0:
+                prev = line
+                continue
+            yield inner, body
+            body = None
+            # 与原逻辑一致：tail 的最后一行还要再判断一次是否是 start 行
+
+        if is_start_line(line):
+            inner = prev
+            body = [line]
+            tail = -1
+        prev = line
+
+    # 文件在 _end 之后不足 3 行就结束
+    if body is not None:
+        if tail >= 0:
+            yield inner, body
         else:
-            i += 1
+            print(f"警告: 函数 {extract_function_prefix(body[0])} 直到文件结束都没有 _end，已丢弃")
+
+
+def iter_function_lines(function_prefix, inner_line, body):
+    """产出写入单个函数文件的各行（包括固定头部和缩进调整后的内容）"""
+    yield "Print Tree:\n"
+    yield "-> { (FUNCTION_DEF)  (BB:182014) (109, 431, 41, 41, 6)\n"
+    yield "  -> FUNCTION_LABEL (FUNCTION_LABEL)  (BB:182014) (109, 431, 41, 41, 6)\n"
+    yield f"    -> {function_prefix} (IDENT)  (BB:4294967295) (109, 431, 45, 41, 6)\n"
+    yield "    -> ( ('(')  (BB:4294967295) (109, 431, 45, 41, 27)\n"
+    yield "    -> void (\"void\")  (BB:4294967295) (109, 431, 45, 41, 1)\n"
+
+    # 计算缩进调整量
+    acc_start_indent = get_indent_level(body[0])
+    indent_delta = 4 - acc_start_indent
+
+    # 写start前一行（inner label）和start到end的内容
+    content = body if inner_line is None else [inner_line] + body
+    for line in content:
+        old_indent = get_indent_level(line)
+        new_indent = max(0, old_indent + indent_delta)
+        yield set_indent(line, new_indent) + "\n"
+
+
+def write_functions(lines, output_dir, verbose=True):
+    """
+    流式分割函数，每个函数在读到其结尾时立即写出
+
+    Args:
+        lines: 可迭代的行（文件对象或生成器）
+        output_dir (str): 输出文件夹路径
+        verbose (bool): 是否逐个打印创建的文件
+
+    Returns:
+        tuple: (创建的文件数, 不同文件名的个数)
+    """
+    if not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    file_count = 0
+    used_names = set()  # 用于跟踪已使用的文件名
+
+    for inner_line, body in iter_functions(lines):
+        function_prefix = extract_function_prefix(body[0])
+        safe_name = re.sub(r'[\\/:*?"<>|\s]', '_', function_prefix)
+
+        # 生成唯一文件名
+        unique_name = generate_unique_filename(safe_name, used_names)
+        out_path = os.path.join(output_dir, f"{unique_name}.txt")
+
+        with open(out_path, 'w', encoding='utf-8') as out_f:
+            out_f.writelines(iter_function_lines(function_prefix, inner_line, body))
+        run_stats.count_file('bytes_written', out_path)
+
+        file_count += 1
+        if verbose:
+            print(f"✓ 创建文件 {file_count}: {unique_name}.txt (原始名称: {function_prefix})")
+
+    return file_count, len(used_names)
+
+
+def split_functions(input_file, output_dir, verbose=True):
+    """
+    分割 input_file 中的函数到 output_dir，见 write_functions
+
+    Returns:
+        int: 创建的文件数
+    """
+    print("开始处理函数分割...")
+
+    with open(input_file, 'r', encoding='utf-8') as f:
+        file_count, name_count = write_functions(run_stats.counted(f), output_dir, verbose)
+    run_stats.count_file('bytes_read', input_file)
+    run_stats.count(functions=file_count, files_created=file_count)
+
+    print(f"\n处理完成，共创建 {file_count} 个文件，保存在 {output_dir} 下。")
+
+    # 显示重复名称统计
+    if name_count < file_count:
+        print(f"注意：发现 {file_count - name_count} 个重复的函数名称，已自动添加编号区分。")
+
+    return file_count
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="按 _acc_start/_end 分割函数，不带参数运行时进入交互模式")
+    parser.add_argument('input_file', nargs='?', help="要分割的txt文件路径")
+    parser.add_argument('output_dir', nargs='?', help="输出文件夹路径")
+    parser.add_argument('-q', '--quiet', action='store_true', help="不逐个打印创建的文件")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if args.input_file is None:
+        input_file = input("请输入要分割的txt文件路径: ").strip()
+        output_dir = input("请输入输出文件夹路径: ").strip()
+    elif args.output_dir is None:
+        parser.error("需要同时指定输入文件和输出文件夹")
     else:
-        i += 1
+        input_file = args.input_file
+        output_dir = args.output_dir
+
+    if not os.path.exists(input_file):
+        print(f"错误：输入文件 {input_file} 不存在")
+        sys.exit(1)
+
+    with run_stats.phase('split'):
+        split_functions(input_file, output_dir, verbose=not args.quiet)
 
-print(f"\n处理完成，共创建 {file_count} 个文件，保存在 {output_dir} 下。")
 
-# 显示重复名称统计
-if len(used_names) < file_count:
-    print(f"注意：发现 {file_count - len(used_names)} 个重复的函数名称，已自动添加编号区分。")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -3,12 +3,25 @@
 """
 提取txt文件中callActionName后面的accName
 用法: python extract_acc_names.py <txt文件路径>
+      python extract_acc_names.py <目录|通配符|文件> [...] [-r] [-j N] [-o 输出文件]
 """
 
+import argparse
+import glob
+import mmap
+import os
 import re
 import sys
 from pathlib import Path
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import run_stats
+
+# 匹配 callActionName accName[参数] 格式，参数部分可选
+ACC_NAME_PATTERN = r'callActionName\s+(\w+)\s*\[.*?\]'
+# 字节版本用于 mmap 扫描：名称中的非 ASCII 字符按 UTF-8 字节（>= 0x80）匹配
+ACC_NAME_BYTES_RE = re.compile(rb'callActionName\s+([A-Za-z0-9_\x80-\xff]+)\s*\[.*?\]')
 
 def extract_acc_names(file_path):
     """从文件中提取callActionName后面的accName"""
@@ -19,12 +32,8 @@ def extract_acc_names(file_path):
         print(f"错误: 无法读取文件 {file_path}: {e}")
         return []
     
-    # 正则表达式匹配 callActionName accName[参数] 格式
-    # 匹配 callActionName 后面跟着的 accName，参数部分可选
-    pattern = r'callActionName\s+(\w+)\s*\[.*?\]'
-    
     # 查找所有匹配项
-    matches = re.findall(pattern, content)
+    matches = re.findall(ACC_NAME_PATTERN, content)
     
     return matches
 
@@ -53,14 +62,138 @@ def analyze_acc_names(acc_names):
     for acc_name in sorted(counter.keys()):
         print(f"  {acc_name}")
 
-def main():
-    if len(sys.argv) != 2:
-        print("用法: python extract_acc_names.py <txt文件路径>")
-        print("示例: python extract_acc_names.py input.txt")
-        sys.exit(1)
-    
-    file_path = sys.argv[1]
-    
+def count_acc_names_mmap(file_path):
+    """
+    用 mmap 在整个文件上做字节正则匹配并计数
+
+    整个文件作为一个连续的缓冲区扫描，不存在跨块边界的匹配问题，
+    也不需要把文件解码成字符串。
+
+    Returns:
+        Counter: accName 出现次数，读取失败时返回 None
+    """
+    counter = Counter()
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return counter
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                for match in ACC_NAME_BYTES_RE.finditer(buf):
+                    counter[match.group(1)] += 1
+    except Exception as e:
+        print(f"错误: 无法读取文件 {file_path}: {e}")
+        return None
+    return Counter({name.decode('utf-8', errors='replace'): count
+                    for name, count in counter.items()})
+
+def _scan_file(file_path):
+    return file_path, count_acc_names_mmap(file_path)
+
+def collect_input_files(inputs, recursive=False):
+    """把目录、通配符和文件路径展开成去重排序后的文件列表"""
+    files = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*.txt') if recursive else os.path.join(item, '*.txt')
+            files.update(glob.glob(pattern, recursive=recursive))
+        elif glob.has_magic(item):
+            files.update(glob.glob(item, recursive=recursive))
+        elif os.path.isfile(item):
+            files.add(item)
+        else:
+            print(f"警告: 路径不存在，已跳过: {item}")
+    return sorted(f for f in files if os.path.isfile(f))
+
+def scan_files(files, jobs=1):
+    """
+    并行统计多个文件中的accName
+
+    Returns:
+        dict: {文件路径: Counter}，读取失败的文件不包含在内
+    """
+    if jobs == 1 or len(files) < 2:
+        results = map(_scan_file, files)
+        return {path: counter for path, counter in results if counter is not None}
+    chunksize = max(1, min(256, len(files) // (jobs * 4)))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        results = pool.map(_scan_file, files, chunksize=chunksize)
+        return {path: counter for path, counter in results if counter is not None}
+
+def write_aggregate_report(output_file, per_file, total):
+    """写出汇总报告：全局统计 + 每个文件的明细"""
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(f"从 {len(per_file)} 个文件中提取的accName汇总:\n")
+        f.write("=" * 50 + "\n\n")
+
+        f.write("全局统计信息:\n")
+        f.write("-" * 30 + "\n")
+        for acc_name, count in total.most_common():
+            f.write(f"{acc_name}: {count} 次\n")
+
+        f.write(f"\n总调用次数: {sum(total.values())}\n")
+        f.write(f"不同accName数量: {len(total)}\n\n")
+
+        f.write("各文件明细:\n")
+        f.write("-" * 30 + "\n")
+        for path, counter in per_file.items():
+            if not counter:
+                continue
+            f.write(f"{path} ({sum(counter.values())} 次)\n")
+            for acc_name, count in counter.most_common():
+                f.write(f"    {acc_name}: {count} 次\n")
+
+def aggregate_acc_names(inputs, recursive=False, jobs=1, output_file=None):
+    """
+    目录/批量模式：并行统计所有文件，合并成一份全局报告
+
+    Args:
+        inputs (list): 目录、通配符或文件路径
+        recursive (bool): 是否递归子目录
+        jobs (int): 并行进程数
+        output_file (str): 报告文件路径，默认 acc_names_summary.txt
+    """
+    files = collect_input_files(inputs, recursive)
+    if not files:
+        print("未找到任何txt文件")
+        return False
+
+    print(f"正在分析 {len(files)} 个文件...")
+    print("=" * 60)
+
+    with run_stats.phase('scan'):
+        per_file = scan_files(files, jobs)
+    total = Counter()
+    for counter in per_file.values():
+        total.update(counter)
+    for file_path in files:
+        run_stats.count_file('bytes_read', file_path)
+    run_stats.count(files=len(files), calls=sum(total.values()))
+
+    if not total:
+        print("未找到任何callActionName调用")
+        return True
+
+    print(f"在 {sum(1 for c in per_file.values() if c)} 个文件中找到 {sum(total.values())} 个callActionName调用:")
+    print("-" * 50)
+    for acc_name, count in total.most_common():
+        print(f"{acc_name:<20} : {count:>3} 次")
+    print("-" * 50)
+    print(f"不同的accName数量: {len(total)}")
+    print(f"总调用次数: {sum(total.values())}")
+
+    output_file = output_file or "acc_names_summary.txt"
+    try:
+        with run_stats.phase('report'):
+            write_aggregate_report(output_file, per_file, total)
+        run_stats.count_file('bytes_written', output_file)
+        run_stats.count(files_created=1)
+        print(f"\n结果已保存到: {output_file}")
+    except Exception as e:
+        print(f"警告: 无法保存结果文件: {e}")
+    return True
+
+def analyze_single_file(file_path):
+    """单文件模式：统计并保存单个文件中按出现顺序的所有调用"""
     if not Path(file_path).exists():
         print(f"错误: 文件不存在: {file_path}")
         sys.exit(1)
@@ -106,5 +239,26 @@ def main():
     except Exception as e:
         print(f"警告: 无法保存结果文件: {e}")
 
+def main():
+    parser = argparse.ArgumentParser(description="统计callActionName后面的accName")
+    parser.add_argument('inputs', nargs='+', help="txt文件、目录或通配符")
+    parser.add_argument('-r', '--recursive', action='store_true', help="递归子目录")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="并行进程数，0 表示使用全部CPU（默认 0）")
+    parser.add_argument('-o', '--output', help="汇总报告文件（默认 acc_names_summary.txt）")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    # 只给了一个文件且没有指定汇总报告时保持原有的单文件行为（--stats 等选项不影响）
+    if len(args.inputs) == 1 and os.path.isfile(args.inputs[0]) and args.output is None:
+        analyze_single_file(args.inputs[0])
+        run_stats.count_file('bytes_read', args.inputs[0])
+        return
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    if not aggregate_acc_names(args.inputs, args.recursive, jobs, args.output):
+        sys.exit(1)
+
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -1,86 +1,291 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 """
-提取segment0到segment1之间的内容
+提取 segment N 到下一个 segment 标记之间的内容
+
+文件通过 mmap 映射，按字节查找 'segment N' 标记，不对整个文件解码，
+一次扫描即可提取多个 segment，段内容按字节原样复制到输出文件。
 """
 
-import sys
+import argparse
+import mmap
 import os
+import re
+import sys
+
+import run_stats
+
+SEGMENT_MARKER = b'segment '
+SEGMENT_LINE_RE = re.compile(r'segment (\d+)')
+COPY_CHUNK_SIZE = 16 << 20  # 每次复制 16MB
 
-def extract_segment(input_file, output_file):
+
+def iter_segment_markers(buf, pos=0):
     """
-    从输入文件中提取segment0到segment1之间的内容
-    
+    依次产出 buf 中的 segment 标记行
+
+    包含 'segment N' 的行即视为标记行，N 按完整的数字解析
+    （'segment 10' 不会被当作 'segment 1'）。
+
+    Args:
+        buf: bytes 或 mmap 对象
+        pos (int): 开始查找的位置
+
+    Yields:
+        tuple: (N, 标记行起始偏移, 标记行之后内容的起始偏移)
+    """
+    size = len(buf)
+    while True:
+        p = buf.find(SEGMENT_MARKER, pos)
+        if p == -1:
+            return
+        q = p + len(SEGMENT_MARKER)
+        e = q
+        while e < size and 48 <= buf[e] <= 57:
+            e += 1
+        if e == q:
+            pos = q
+            continue
+
+        line_start = buf.rfind(b'\n', 0, p) + 1
+        line_end = buf.find(b'\n', e)
+        content_start = size if line_end == -1 else line_end + 1
+        yield int(buf[q:e]), line_start, content_start
+        pos = content_start
+
+
+def find_segment_bounds(buf, wanted=None):
+    """
+    计算各个 segment 内容的字节范围（不包含标记行本身）
+
+    segment N 的内容从最后一个连续的 'segment N' 标记行之后开始，
+    到下一个编号不同的标记行之前结束；最后一个 segment 到文件末尾结束。
+    同一编号在后面再次出现时，以第一次出现的那一段为准。
+
+    Args:
+        buf: bytes 或 mmap 对象
+        wanted: 需要的 segment 编号集合，为 None 时扫描全部；
+                指定时所有编号都找到后立即停止扫描
+
+    Returns:
+        dict: {N: (标记行起始偏移, 内容起始偏移, 内容结束偏移)}
+    """
+    bounds = {}
+    current = None  # (N, 标记行起始偏移, 内容起始偏移)
+
+    for number, line_start, content_start in iter_segment_markers(buf):
+        if current is not None and current[0] == number:
+            current = (number, current[1], content_start)
+            continue
+        if current is not None and current[0] not in bounds:
+            if wanted is None or current[0] in wanted:
+                bounds[current[0]] = (current[1], current[2], line_start)
+        if wanted is not None and wanted.issubset(bounds):
+            return bounds
+        current = (number, line_start, content_start)
+
+    if current is not None and current[0] not in bounds:
+        if wanted is None or current[0] in wanted:
+            bounds[current[0]] = (current[1], current[2], len(buf))
+    return bounds
+
+
+def count_segment_markers(buf, number):
+    """
+    统计 segment N 第一次出现时连续的 'segment N' 标记行个数（未出现时为 0）
+
+    find_segment_bounds 从这一串标记的最后一个之后开始取内容，
+    把这个个数传给 iter_segment_lines 即可得到完全相同的结果。
+
+    Args:
+        buf: bytes 或 mmap 对象
+        number (int): segment 编号
+
+    Returns:
+        int: 连续标记行的个数
+    """
+    count = 0
+    for n, _, _ in iter_segment_markers(buf):
+        if n == number:
+            count += 1
+        elif count:
+            break
+    return count
+
+
+def count_segment_markers_in_file(input_file, number):
+    """对文件调用 count_segment_markers（按字节映射，不解码），空文件返回 0"""
+    with open(input_file, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            return count_segment_markers(buf, number)
+
+
+def iter_segment_lines(lines, number, markers=1):
+    """
+    逐行版本的 segment 提取，供流式流水线使用
+
+    segment N 的内容从第 markers 个连续的 'segment N' 标记行之后开始，
+    到下一个编号不同的标记行之前结束，各行读到即产出，不在内存中缓存；
+    找到结尾后立即停止，不再读取后面的行。
+
+    find_segment_bounds 以最后一个连续的同号标记为起点，而逐行读取时无法预知
+    后面是否还有同号标记。markers 取 count_segment_markers 在原文件上算出的值时，
+    结果与 find_segment_bounds 完全一致；取默认值 1 时，从第一个标记开始产出，
+    之后的同号标记行只被跳过，两个同号标记之间的内容也会产出
+    （find_segment_bounds 会丢弃这部分）。
+
+    Args:
+        lines: 可迭代的行（文件对象或生成器）
+        number (int): segment 编号
+        markers (int): 内容开始前连续的 'segment N' 标记行个数
+
+    Yields:
+        str: segment N 内容中的各行
+    """
+    seen = 0  # 已读到的 'segment N' 标记行个数
+    for line in lines:
+        match = SEGMENT_LINE_RE.search(line)
+        if match is None:
+            if seen >= markers:
+                yield line
+            continue
+        if int(match.group(1)) == number:
+            seen += 1
+        elif seen:
+            return
+
+
+def copy_range(buf, start, end, out_f):
+    """把 buf[start:end] 分块写入 out_f，返回其中的换行数"""
+    newlines = 0
+    pos = start
+    while pos < end:
+        chunk = buf[pos:min(pos + COPY_CHUNK_SIZE, end)]
+        out_f.write(chunk)
+        newlines += chunk.count(b'\n')
+        pos += len(chunk)
+    return newlines
+
+
+def segment_output_path(output_file, number, multiple):
+    """
+    计算 segment 的输出路径
+
+    output_file 中含有 '{n}' 时替换为编号；提取多个 segment 且不含 '{n}' 时，
+    在扩展名前加上 '_segN'。
+    """
+    if '{n}' in output_file:
+        return output_file.replace('{n}', str(number))
+    if not multiple:
+        return output_file
+    root, ext = os.path.splitext(output_file)
+    return f"{root}_seg{number}{ext}"
+
+
+def extract_segments(input_file, segments, output_file, verbose=True):
+    """
+    一次扫描从输入文件中提取多个 segment
+
     Args:
         input_file (str): 输入文件路径
-        output_file (str): 输出文件路径
+        segments (list): 要提取的 segment 编号
+        output_file (str): 输出文件路径（多个 segment 时见 segment_output_path）
+        verbose (bool): 是否打印每个 segment 的提取信息
+
+    Returns:
+        dict: {N: (输出文件, 字节数, 行数)}，只包含成功提取的 segment；
+              读取失败时返回 None
     """
+    wanted = set(segments)
+    multiple = len(wanted) > 1
+    results = {}
+
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-        
-        start_line = -1
-        end_line = -1
-        
-        # 查找segment0和segment1的行号
-        for i, line in enumerate(lines):
-            if 'segment 0' in line:
-                start_line = i
-            elif 'segment 1' in line:
-                end_line = i
-                break
-        
-        if start_line == -1:
-            print(f"错误：在文件 {input_file} 中未找到 'segment 0'")
-            return False
-        
-        if end_line == -1:
-            print(f"错误：在文件 {input_file} 中未找到 'segment 1'")
-            return False
-        
-        if start_line >= end_line:
-            print(f"错误：segment 0 在 segment 1 之后或同一行")
-            return False
-        
-        # 提取segment0和segment1之间的内容（不包含这两行）
-        extracted_content = lines[start_line + 1:end_line]
-        
-        # 写入输出文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.writelines(extracted_content)
-        
-        print(f"成功提取内容：")
-        print(f"  输入文件：{input_file}")
-        print(f"  输出文件：{output_file}")
-        print(f"  提取行数：{len(extracted_content)} 行")
-        print(f"  行号范围：{start_line + 2} 到 {end_line}")
-        
-        return True
-        
+        with open(input_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                bounds = {}
+                buf = None
+            else:
+                buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                bounds = find_segment_bounds(buf, wanted)
+
+            try:
+                for number in segments:
+                    if number not in bounds or number in results:
+                        continue
+                    _, start, end = bounds[number]
+                    out_path = segment_output_path(output_file, number, multiple)
+                    with open(out_path, 'wb') as out_f:
+                        line_count = copy_range(buf, start, end, out_f)
+                    results[number] = (out_path, end - start, line_count)
+
+                    if verbose:
+                        print(f"成功提取 segment {number}：")
+                        print(f"  输入文件：{input_file}")
+                        print(f"  输出文件：{out_path}")
+                        print(f"  提取行数：{line_count} 行")
+                        print(f"  字节范围：{start} 到 {end}")
+            finally:
+                if buf is not None:
+                    buf.close()
+
     except FileNotFoundError:
         print(f"错误：文件 {input_file} 不存在")
-        return False
+        return None
     except Exception as e:
         print(f"错误：{e}")
-        return False
+        return None
+
+    for number in segments:
+        if number not in bounds:
+            print(f"错误：在文件 {input_file} 中未找到 'segment {number}'")
+    return results
+
+
+def extract_segment(input_file, output_file, segment=0):
+    """
+    从输入文件中提取 segment N 到下一个 segment 标记之间的内容
+
+    Args:
+        input_file (str): 输入文件路径
+        output_file (str): 输出文件路径
+        segment (int): segment 编号，默认 0
+
+    Returns:
+        bool: 是否提取成功
+    """
+    results = extract_segments(input_file, [segment], output_file)
+    return bool(results) and segment in results
+
 
 def main():
     """主函数"""
-    if len(sys.argv) != 3:
-        print("用法：python extract_segment.py <输入文件> <输出文件>")
-        print("示例：python extract_segment.py input.txt output.txt")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
-    
-    if not os.path.exists(input_file):
-        print(f"错误：输入文件 {input_file} 不存在")
+    parser = argparse.ArgumentParser(
+        description="提取 segment N 到下一个 segment 标记之间的内容",
+        epilog="示例：python extract_segment.py input.txt 'seg_{n}.txt' -s 0 3 5")
+    parser.add_argument('input_file', help="输入文件")
+    parser.add_argument('output_file', help="输出文件，提取多个 segment 时可以用 {n} 表示编号")
+    parser.add_argument('-s', '--segments', nargs='+', type=int, default=[0],
+                        help="要提取的 segment 编号（默认 0）")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if not os.path.exists(args.input_file):
+        print(f"错误：输入文件 {args.input_file} 不存在")
         sys.exit(1)
-    
-    success = extract_segment(input_file, output_file)
-    if not success:
+
+    with run_stats.phase('extract'):
+        results = extract_segments(args.input_file, args.segments, args.output_file)
+    if results:
+        run_stats.count_file('bytes_read', args.input_file)
+        run_stats.count(bytes_written=sum(r[1] for r in results.values()),
+                        lines=sum(r[2] for r in results.values()), files_created=len(results))
+    if results is None or len(results) != len(set(args.segments)):
         sys.exit(1)
 
+
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
@@ -1,18 +1,44 @@
+import mmap
+import os
+
+from extract_segment import copy_range
+
+
+def find_content_range(buf):
+    """
+    逐行规则与原来相同：从第一个含 'segment 0' 的行之后开始，到第一个含 'segment 1'
+    的行之前结束（按子串匹配，'segment 10' 同样算作结束），没有 'segment 1' 时到文件末尾；
+    'segment 1' 所在行不在 'segment 0' 所在行之后时视为没有找到 'segment 0'。
+
+    Returns:
+        tuple: (start, end)，找不到 'segment 0' 时返回 None
+    """
+    start_pos = buf.find(b'segment 0')
+    if start_pos == -1:
+        return None
+    start_line = buf.rfind(b'\n', 0, start_pos) + 1
+    end_pos = buf.find(b'segment 1')
+    if end_pos == -1:
+        end = len(buf)
+    else:
+        end = buf.rfind(b'\n', 0, end_pos) + 1
+        if end <= start_line:
+            return None
+    start_line_end = buf.find(b'\n', start_pos)
+    start = len(buf) if start_line_end == -1 else start_line_end + 1
+    return start, end
+
+
 def func(input_file, output_file):
-    with open(input_file, 'r', encoding='utf-8') as fin, \
-         open(output_file, 'w', encoding='utf-8') as fout:
-
-        found_segment_0 = False
-        for line in fin:
-            stripped = line.strip()
-            if 'segment 1' in stripped:
-                break  # 遇到 segment 1 就停止
-            if found_segment_0:
-                fout.write(line)  # 写入内容
-            if 'segment 0' in stripped:
-                found_segment_0 = True
-
-        if not found_segment_0:
+    with open(input_file, 'rb') as fin, open(output_file, 'wb') as fout:
+        bounds = None
+        if os.fstat(fin.fileno()).st_size > 0:
+            with mmap.mmap(fin.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                bounds = find_content_range(buf)
+                if bounds is not None:
+                    copy_range(buf, bounds[0], bounds[1], fout)
+
+        if bounds is None:
             raise ValueError(f"'segment 0' not found in {input_file}")
 
     print(f"Extraction completed: {output_file}")
@@ -20,4 +46,3 @@ if __name__ == "__main__":
  input_file = 'input.txt'
  output_file = 'output.txt'
  func(input_file, output_file)
- 
\ No newline at end of file
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+合成 AST dump 语料生成器
+
+按真实 dump 的行格式 `<2*深度个空格>-> 文本 (类型)  (BB:n) (a, b, c, d, e)` 生成随机函数树，
+供 benchmark.py 和手工测试使用。可以控制：
+    - 函数个数或目标大小（--functions / --size）
+    - 每个函数的平均节点数和最大深度（--nodes / --depth）
+    - 带 _acc_start/_end 标记的函数比例（--acc-ratio，供 extractFuncs_ipat_88.py 分割）
+    - segment N 标记个数（--segments，供 extract_segment.py 提取）
+    - 每个 Print Tree 块包含的函数数（--funcs-per-tree）
+    - callActionName 调用的密度和 accName 种类数（--call-density / --acc-names）
+    - 每个 Print Tree 块前是否加 cut.py 使用的 xxx 标记（--cut-markers）
+
+默认生成改写前的 680 格式：Print Tree 行后直接是 FUNCTION_LABEL 行，省略 FUNCTION_DEF 行，
+由 process_680ast_fixed.py 合并还原；--rewritten 时生成改写后的格式。
+同样的参数和 --seed 总是生成同样的内容。
+
+用法:
+    python gen_corpus.py <输出文件> [--functions N | --size 50M] [选项]
+    python gen_corpus.py <输出目录> --files N [选项]     # 生成 N 个文件，函数平均分配
+"""
+
+import argparse
+import os
+import random
+import sys
+
+import run_stats
+
+DEFAULT_FUNCTIONS = 1000
+DEFAULT_NODES = 200
+DEFAULT_DEPTH = 8
+DEFAULT_SEGMENTS = 4
+DEFAULT_ACC_RATIO = 0.5
+DEFAULT_CALL_DENSITY = 0.05
+DEFAULT_ACC_NAMES = 50
+DEFAULT_SEED = 1
+WRITE_BUFFER_SIZE = 1 << 20
+
+INVALID_BB = 4294967295
+CUT_MARKER = 'xxx'
+
+# 语句节点：(文本, 类型)
+STATEMENTS = (
+    ('=', 'ASSIGN'),
+    ('if', 'IF'),
+    ('while', 'WHILE'),
+    ('{', 'BLOCK'),
+    ('return', 'RETURN'),
+    ('jmp', 'JMP'),
+    ('func::CallOp', 'FUNC_CALL'),
+)
+# 表达式节点，文本含 {} 的为叶子节点（填入随机编号）
+EXPRESSIONS = (
+    ('+', 'BINARY_OP'),
+    ('&', 'BINARY_OP'),
+    ('<<', 'BINARY_OP'),
+    ('==', 'COMPARE'),
+    ('[', 'INDEX'),
+    ('r{}', 'REG'),
+    ('v{}', 'IDENT'),
+    ('{}', 'CONST'),
+)
+
+
+def parse_size(text):
+    """'50M'、'512K'、'1G' 或字节数 -> 字节数"""
+    units = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+    text = text.strip().upper().rstrip('B')
+    if text and text[-1] in units:
+        return int(float(text[:-1]) * units[text[-1]])
+    return int(text)
+
+
+class CorpusGenerator:
+    """
+    逐行产出合成 dump 的生成器
+
+    所有随机数来自同一个 random.Random(seed)，行号、BB 编号和位置元组单调递增，
+    与真实 dump 一样。
+    """
+
+    def __init__(self, nodes=DEFAULT_NODES, depth=DEFAULT_DEPTH, acc_ratio=DEFAULT_ACC_RATIO,
+                 call_density=DEFAULT_CALL_DENSITY, acc_names=DEFAULT_ACC_NAMES,
+                 funcs_per_tree=1, cut_markers=True, rewritten=False, seed=DEFAULT_SEED):
+        self.nodes = max(8, nodes)
+        self.depth = max(3, depth)
+        self.acc_ratio = acc_ratio
+        self.call_density = call_density
+        self.acc_names = [f"acc{i}" for i in range(max(1, acc_names))]
+        self.funcs_per_tree = max(1, funcs_per_tree)
+        self.cut_markers = cut_markers
+        self.rewritten = rewritten
+        self.rng = random.Random(seed)
+        self.bb = 0
+        self.row = 1
+        self.func_index = 0
+
+    def _line(self, depth, text, node_type, bb=None):
+        if bb is None:
+            bb = self.bb
+        self.row += 1
+        col = self.rng.randrange(1, 80)
+        loc = f"{self.func_index % 1000}, {self.row}, {col}, {col}, {self.rng.randrange(1, 40)}"
+        return f"{'  ' * depth}-> {text} ({node_type})  (BB:{bb}) ({loc})\n"
+
+    def _expression(self, depth, cap):
+        """产出一棵最多 cap 个节点的表达式子树的各行，返回值为实际节点数"""
+        rng = self.rng
+        if depth >= self.depth or cap < 3:
+            text, node_type = EXPRESSIONS[-1 - rng.randrange(3)]
+        else:
+            text, node_type = rng.choice(EXPRESSIONS)
+        yield self._line(depth, text.format(rng.randrange(64)), node_type, INVALID_BB)
+        used = 1
+        if '{}' not in text:
+            left = (cap - 1) // 2
+            used += yield from self._expression(depth + 1, left)
+            used += yield from self._expression(depth + 1, cap - used)
+        return used
+
+    def _statement(self, depth, budget):
+        """产出一条语句的各行，返回值为剩余节点预算"""
+        rng = self.rng
+        if rng.random() < self.call_density:
+            name = rng.choice(self.acc_names)
+            args = ', '.join(f"v{rng.randrange(64)}" for _ in range(rng.randrange(4)))
+            yield self._line(depth, f"callActionName {name}[{args}]", 'ACTION_CALL')
+            return budget - 1
+
+        text, node_type = rng.choice(STATEMENTS)
+        if node_type in ('BLOCK', 'IF', 'WHILE'):
+            self.bb += 1
+        yield self._line(depth, text, node_type)
+        budget -= 1
+        if node_type in ('BLOCK', 'IF', 'WHILE') and depth + 1 < self.depth:
+            if node_type != 'BLOCK':
+                budget -= yield from self._expression(depth + 1, 7)
+            for _ in range(rng.randrange(1, 5)):
+                if budget <= 0:
+                    break
+                budget = yield from self._statement(depth + 1, budget)
+        else:
+            for _ in range(2 if node_type == 'ASSIGN' else 1):
+                budget -= yield from self._expression(depth + 1, 7)
+        return budget
+
+    def _body(self, budget):
+        """函数体中的语句，预算用完为止"""
+        while budget > 0:
+            budget = yield from self._statement(2, budget)
+
+    def function(self, name, with_header):
+        """
+        产出一个函数的各行
+
+        Args:
+            name (str): 函数名
+            with_header (bool): 函数是否紧跟在 Print Tree 行之后（改写前格式省略 FUNCTION_DEF 行）
+        """
+        self.func_index += 1
+        self.bb += 1
+        budget = max(4, int(self.rng.expovariate(1 / self.nodes)))
+        if self.rewritten or not with_header:
+            yield self._line(0, '{', 'FUNCTION_DEF')
+        yield self._line(1, 'FUNCTION_LABEL', 'FUNCTION_LABEL')
+        yield self._line(2, name, 'IDENT', INVALID_BB)
+        yield self._line(2, '(', "'('", INVALID_BB)
+        yield self._line(2, 'void', '"void"', INVALID_BB)
+        self.bb += 1
+        yield self._line(1, '{', 'BLOCK')
+
+        if self.rng.random() < self.acc_ratio:
+            before = self.rng.randrange(budget // 3 + 1)
+            after = self.rng.randrange(budget // 3 + 1)
+            yield from self._body(before)
+            yield self._line(2, f"{name}_inner", 'LABEL')
+            yield self._line(2, f"{name}_acc_start", 'LABEL')
+            yield from self._body(budget - before - after)
+            yield self._line(2, f"{name}_end", 'LABEL')
+            yield from self._body(after)
+        else:
+            yield from self._body(budget)
+
+    def lines(self, functions, segments=DEFAULT_SEGMENTS, name_prefix='func', max_bytes=None):
+        """
+        产出整个文件的各行
+
+        Args:
+            functions (int): 函数个数；max_bytes 不为 None 时为上限
+            segments (int): segment 标记个数，函数平均分到各个 segment 中，为 0 时不加标记
+            name_prefix (str): 函数名前缀
+            max_bytes (int): 达到该大小后不再开始新的函数
+        """
+        written = 0
+        per_segment = -(-functions // segments) if segments else None
+        for i in range(functions):
+            if max_bytes is not None and written >= max_bytes:
+                return
+            block = []
+            if per_segment and i % per_segment == 0:
+                block.append(f"segment {i // per_segment}\n")
+            with_header = i % self.funcs_per_tree == 0
+            if with_header:
+                if self.cut_markers:
+                    block.append(CUT_MARKER + "\n")
+                block.append("Print Tree:\n")
+            block.extend(self.function(f"{name_prefix}{i}", with_header))
+            for line in block:
+                written += len(line)
+                yield line
+
+
+def write_corpus(output_file, generator, functions, segments=DEFAULT_SEGMENTS,
+                 name_prefix='func', max_bytes=None):
+    """
+    把生成的内容写入文件
+
+    Returns:
+        tuple: (行数, 字节数)
+    """
+    line_count = 0
+    with open(output_file, 'w', encoding='utf-8', buffering=WRITE_BUFFER_SIZE) as f:
+        for line in generator.lines(functions, segments, name_prefix, max_bytes):
+            f.write(line)
+            line_count += 1
+    return line_count, os.path.getsize(output_file)
+
+
+def generate(output, functions=DEFAULT_FUNCTIONS, size=None, files=None,
+             segments=DEFAULT_SEGMENTS, **options):
+    """
+    生成单个文件，或 files 不为 None 时在 output 目录下生成 files 个文件
+
+    size 不为 None 时按总大小生成（函数个数不再限制）；目录模式下大小和函数个数平均分给各个文件。
+
+    Returns:
+        dict: {'files', 'functions', 'lines', 'bytes'}
+    """
+    generator = CorpusGenerator(**options)
+    if size is not None:
+        functions = sys.maxsize
+
+    if files is None:
+        lines, nbytes = write_corpus(output, generator, functions, segments if size is None else 0,
+                                     max_bytes=size)
+        if size is not None and segments:
+            # 按大小生成时函数个数事先未知，按实际个数重新生成一次以均匀放置 segment 标记
+            functions = generator.func_index
+            generator = CorpusGenerator(**options)
+            lines, nbytes = write_corpus(output, generator, functions, segments)
+        return {'files': 1, 'functions': generator.func_index, 'lines': lines, 'bytes': nbytes}
+
+    os.makedirs(output, exist_ok=True)
+    width = len(str(files - 1))
+    per_file = max(1, functions // files) if size is None else sys.maxsize
+    per_size = None if size is None else max(1, size // files)
+    total_lines = total_bytes = total_functions = 0
+    for k in range(files):
+        before = generator.func_index
+        lines, nbytes = write_corpus(os.path.join(output, f"corpus_{k:0{width}d}.txt"), generator,
+                                     per_file, 0, f"f{k}_", per_size)
+        total_functions += generator.func_index - before
+        total_lines += lines
+        total_bytes += nbytes
+    return {'files': files, 'functions': total_functions, 'lines': total_lines, 'bytes': total_bytes}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="合成 AST dump 语料生成器")
+    parser.add_argument('output', help="输出文件，--files 时为输出目录")
+    parser.add_argument('--functions', type=int, default=DEFAULT_FUNCTIONS,
+                        help=f"函数个数（默认 {DEFAULT_FUNCTIONS}）")
+    parser.add_argument('--size', help="按目标大小生成，如 50M（指定时忽略 --functions）")
+    parser.add_argument('--files', type=int, help="生成多个文件到输出目录")
+    parser.add_argument('--nodes', type=int, default=DEFAULT_NODES,
+                        help=f"每个函数的平均节点数（默认 {DEFAULT_NODES}）")
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help=f"最大深度（默认 {DEFAULT_DEPTH}）")
+    parser.add_argument('--segments', type=int, default=DEFAULT_SEGMENTS,
+                        help=f"segment 标记个数，0 表示不加（默认 {DEFAULT_SEGMENTS}，目录模式不加）")
+    parser.add_argument('--acc-ratio', type=float, default=DEFAULT_ACC_RATIO,
+                        help=f"带 _acc_start/_end 标记的函数比例（默认 {DEFAULT_ACC_RATIO}）")
+    parser.add_argument('--call-density', type=float, default=DEFAULT_CALL_DENSITY,
+                        help=f"语句为 callActionName 调用的概率（默认 {DEFAULT_CALL_DENSITY}）")
+    parser.add_argument('--acc-names', type=int, default=DEFAULT_ACC_NAMES,
+                        help=f"不同 accName 的个数（默认 {DEFAULT_ACC_NAMES}）")
+    parser.add_argument('--funcs-per-tree', type=int, default=1,
+                        help="每个 Print Tree 块包含的函数数（默认 1）")
+    parser.add_argument('--no-cut-markers', action='store_true', help="不加 cut.py 使用的 xxx 标记")
+    parser.add_argument('--rewritten', action='store_true',
+                        help="生成 process_680ast_fixed.py 改写后的格式")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help=f"随机种子（默认 {DEFAULT_SEED}）")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    try:
+        size = parse_size(args.size) if args.size else None
+    except ValueError:
+        print(f"错误: 无法解析大小: {args.size}")
+        sys.exit(1)
+    if args.files is not None and args.files < 1:
+        print("错误: --files 必须大于 0")
+        sys.exit(1)
+
+    with run_stats.phase('generate'):
+        stats = generate(args.output, args.functions, size, args.files, args.segments,
+                         nodes=args.nodes, depth=args.depth, acc_ratio=args.acc_ratio,
+                         call_density=args.call_density, acc_names=args.acc_names,
+                         funcs_per_tree=args.funcs_per_tree, cut_markers=not args.no_cut_markers,
+                         rewritten=args.rewritten, seed=args.seed)
+    run_stats.count(bytes_written=stats['bytes'], lines=stats['lines'],
+                    functions=stats['functions'], files_created=stats['files'])
+    print(f"文件数: {stats['files']}")
+    print(f"函数数: {stats['functions']}")
+    print(f"行数: {stats['lines']}")
+    print(f"大小: {stats['bytes'] / (1 << 20):.2f} MB")
+    print(f"已生成到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
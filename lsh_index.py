@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+软件子树的局部敏感哈希（LSH）索引
+
+离线把软件AST（如内联后的 simple_680.txt）中的每个 FUNCTION_DEF/BUNDLE_DEF 子树
+切成子树形状特征（每个节点的类型加上其子节点类型序列），计算 MinHash 签名，
+按 LSH 分段（band）存入 SQLite。查询时对硬件函数计算同样的签名，只取与其至少
+一个分段落入同一个桶的软件函数，再按签名估计的 Jaccard 相似度排序，
+查询耗时与软件函数总数无关。
+
+查询结果以 prefilter.py 的候选文件格式输出（"硬件名\\t软件名\\t估计相似度"），
+可以直接传给 microcode-mapping-test 或 p_test.py --candidates。
+索引中记录了软件AST的大小和修改时间，查询时发现文件已变化会打印警告。
+
+用法:
+    python lsh_index.py build <数据库> <软件AST文件> [--bands 16] [--rows 4]
+    python lsh_index.py query <数据库> <硬件AST目录|清单文件|文件> -o <候选文件>
+                              [--top K] [--min-score X] [-j N]
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import sqlite3
+import sys
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+
+from ast_dump import NodeTable
+from manifest import expand_manifest, is_manifest
+from prefilter import iter_software_units, write_candidates
+import run_stats
+
+DEFAULT_BANDS = 16
+DEFAULT_ROWS = 4
+DEFAULT_TOP = 20
+MINHASH_SEED = 20240601
+MERSENNE_PRIME = (1 << 61) - 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS units (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    nodes INTEGER NOT NULL,
+    signature BLOB NOT NULL
+);
+CREATE TABLE IF NOT EXISTS buckets (
+    band INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    unit INTEGER NOT NULL,
+    PRIMARY KEY (band, bucket, unit)
+) WITHOUT ROWID;
+"""
+
+
+def stable_hash(data):
+    """与进程无关的 64 位哈希（Python 内置 hash 对字符串做了随机化，不能落盘）"""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'little')
+
+
+def shape_shingles(table, start, end):
+    """
+    子树 [start, end) 的形状特征集合
+
+    每个节点产生一个特征：节点类型和按顺序排列的子节点类型，不含文本、BB 和位置，
+    因此只反映树的形状。
+    """
+    types = table.types
+    shingles = set()
+    for i in range(start, end):
+        children = ','.join(types[table.type_id[c]] for c in table.children(i))
+        shingles.add(stable_hash(f"{types[table.type_id[i]]}({children})".encode('utf-8')))
+    return shingles
+
+
+def minhash_params(num_perm, seed=MINHASH_SEED):
+    """MinHash 所用的 num_perm 组 (a, b)，由固定种子生成，建索引和查询时保持一致"""
+    rng = random.Random(seed)
+    return [(rng.randrange(1, MERSENNE_PRIME), rng.randrange(0, MERSENNE_PRIME))
+            for _ in range(num_perm)]
+
+
+def minhash_signature(shingles, params):
+    """特征集合的 MinHash 签名"""
+    if not shingles:
+        return array('Q', [MERSENNE_PRIME] * len(params))
+    return array('Q', (min((a * x + b) % MERSENNE_PRIME for x in shingles) for a, b in params))
+
+
+def band_buckets(signature, bands, rows):
+    """签名每个分段的桶号（有符号 64 位，便于存入 SQLite）"""
+    buckets = []
+    for band in range(bands):
+        chunk = signature[band * rows:(band + 1) * rows].tobytes()
+        buckets.append(int.from_bytes(hashlib.blake2b(chunk, digest_size=8).digest(),
+                                      'little', signed=True))
+    return buckets
+
+
+def estimate_similarity(sig_a, sig_b):
+    """两个签名中相同位置取值相同的比例，即 Jaccard 相似度的估计"""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / len(sig_a)
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def read_meta(conn):
+    return dict(conn.execute("SELECT key, value FROM meta").fetchall())
+
+
+def is_stale(meta):
+    """
+    软件AST在建索引后是否发生了变化（大小或修改时间不同，或者文件已不存在）
+    """
+    try:
+        st = os.stat(meta['software_file'])
+    except OSError:
+        return True
+    return (meta.get('software_size') != str(st.st_size)
+            or meta.get('software_mtime_ns') != str(st.st_mtime_ns))
+
+
+def build_index(db_path, software_file, bands=DEFAULT_BANDS, rows=DEFAULT_ROWS):
+    """
+    为软件AST建立 LSH 索引（覆盖数据库中已有的索引）
+
+    Returns:
+        int: 索引的软件函数个数
+    """
+    params = minhash_params(bands * rows)
+    table = NodeTable.from_file(software_file)
+    st = os.stat(software_file)
+
+    conn = connect(db_path)
+    try:
+        with conn:
+            conn.execute("DELETE FROM meta")
+            conn.execute("DELETE FROM units")
+            conn.execute("DELETE FROM buckets")
+            conn.executemany("INSERT INTO meta (key, value) VALUES (?, ?)", [
+                ('bands', str(bands)),
+                ('rows', str(rows)),
+                ('seed', str(MINHASH_SEED)),
+                ('software_file', os.path.abspath(software_file)),
+                ('software_size', str(st.st_size)),
+                ('software_mtime_ns', str(st.st_mtime_ns)),
+            ])
+            count = 0
+            for name, start, end in iter_software_units(table):
+                signature = minhash_signature(shape_shingles(table, start, end), params)
+                unit_id = conn.execute(
+                    "INSERT INTO units (name, nodes, signature) VALUES (?, ?, ?)",
+                    (name, end - start, signature.tobytes())).lastrowid
+                conn.executemany(
+                    "INSERT OR IGNORE INTO buckets (band, bucket, unit) VALUES (?, ?, ?)",
+                    [(band, bucket, unit_id)
+                     for band, bucket in enumerate(band_buckets(signature, bands, rows))])
+                count += 1
+    finally:
+        conn.close()
+    return count
+
+
+def hardware_signature(args):
+    """硬件文件的 (名称, 签名)，文件中没有节点时签名为 None"""
+    hardware_file, num_perm = args
+    table = NodeTable.from_file(hardware_file)
+    name = os.path.splitext(os.path.basename(hardware_file))[0]
+    if not len(table):
+        return name, None
+    return name, minhash_signature(shape_shingles(table, 0, len(table)), minhash_params(num_perm))
+
+
+def query_index(conn, signature, bands, rows, top=DEFAULT_TOP, min_score=0.0):
+    """
+    查询与签名相似的软件函数
+
+    Returns:
+        list: [(软件名, 估计相似度)]，按相似度从高到低，最多 top 个
+    """
+    unit_ids = set()
+    for band, bucket in enumerate(band_buckets(signature, bands, rows)):
+        unit_ids.update(row[0] for row in conn.execute(
+            "SELECT unit FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)))
+
+    scored = []
+    for unit_id in unit_ids:
+        name, blob = conn.execute("SELECT name, signature FROM units WHERE id = ?",
+                                  (unit_id,)).fetchone()
+        other = array('Q')
+        other.frombytes(blob)
+        score = estimate_similarity(signature, other)
+        if score >= min_score:
+            scored.append((name, score))
+    scored.sort(key=lambda item: (-item[1], item[0]))
+    return scored[:top]
+
+
+def query_hardware(db_path, hardware_files, output_file, top=DEFAULT_TOP, min_score=0.0, jobs=1):
+    """
+    为每个硬件文件检索候选软件函数，写出候选文件
+
+    Returns:
+        tuple: (硬件文件数, 候选对数)，索引无效时返回 None
+    """
+    conn = connect(db_path)
+    try:
+        meta = read_meta(conn)
+        if 'bands' not in meta:
+            print(f"错误: 数据库中没有索引: {db_path}")
+            return None
+        bands, rows = int(meta['bands']), int(meta['rows'])
+        if int(meta['seed']) != MINHASH_SEED:
+            print("错误: 索引使用的 MinHash 种子与当前版本不同，请重新构建")
+            return None
+        if is_stale(meta):
+            print(f"警告: 软件AST {meta['software_file']} 在建索引后发生了变化，"
+                  f"候选可能不完整，请重新运行 build")
+
+        tasks = [(path, bands * rows) for path in hardware_files]
+        if jobs > 1 and len(tasks) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                signatures = list(pool.map(hardware_signature, tasks, chunksize=16))
+        else:
+            signatures = [hardware_signature(task) for task in tasks]
+
+        def iter_pairs():
+            for name, signature in signatures:
+                if signature is None:
+                    continue
+                for sw_name, score in query_index(conn, signature, bands, rows, top, min_score):
+                    yield name, sw_name, score
+
+        count = write_candidates(output_file, iter_pairs(), 'score')
+    finally:
+        conn.close()
+    return len(signatures), count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="软件子树的 LSH 索引")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="为软件AST建立索引")
+    p_build.add_argument('db', help="SQLite 数据库路径")
+    p_build.add_argument('software_file', help="软件AST文件")
+    p_build.add_argument('--bands', type=int, default=DEFAULT_BANDS,
+                         help=f"LSH 分段数（默认 {DEFAULT_BANDS}）")
+    p_build.add_argument('--rows', type=int, default=DEFAULT_ROWS,
+                         help=f"每段的签名行数（默认 {DEFAULT_ROWS}）")
+
+    p_query = sub.add_parser('query', help="为硬件函数检索候选软件函数")
+    p_query.add_argument('db', help="SQLite 数据库路径")
+    p_query.add_argument('hardware', help="硬件AST目录、清单文件或单个文件")
+    p_query.add_argument('-o', '--output', required=True, help="候选文件")
+    p_query.add_argument('--top', type=int, default=DEFAULT_TOP,
+                         help=f"每个硬件函数最多保留的候选数（默认 {DEFAULT_TOP}）")
+    p_query.add_argument('--min-score', type=float, default=0.0, help="估计相似度下限（默认 0）")
+    p_query.add_argument('-j', '--jobs', type=int, default=0,
+                         help="并行进程数，0 表示使用全部CPU（默认 0）")
+
+    for p in (p_build, p_query):
+        run_stats.add_stats_argument(p)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if args.command == 'build':
+        if not os.path.isfile(args.software_file):
+            print(f"错误: 软件AST文件不存在: {args.software_file}")
+            sys.exit(1)
+        with run_stats.phase('build'):
+            count = build_index(args.db, args.software_file, args.bands, args.rows)
+        run_stats.count_file('bytes_read', args.software_file)
+        run_stats.count(functions=count)
+        print(f"已索引 {count} 个软件函数（{args.bands} 段 x {args.rows} 行）到: {args.db}")
+        return
+
+    if not os.path.exists(args.db):
+        print(f"错误: 数据库不存在: {args.db}")
+        sys.exit(1)
+    if is_manifest(args.hardware):
+        hardware_files = expand_manifest(args.hardware)
+    elif os.path.isdir(args.hardware):
+        hardware_files = sorted(entry.path for entry in os.scandir(args.hardware)
+                                if entry.is_file() and entry.name.endswith('.txt'))
+    elif os.path.isfile(args.hardware):
+        hardware_files = [args.hardware]
+    else:
+        print(f"错误: 硬件AST输入不存在: {args.hardware}")
+        sys.exit(1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with run_stats.phase('query'):
+        result = query_hardware(args.db, hardware_files, args.output, args.top, args.min_score, jobs)
+    if result is None:
+        sys.exit(1)
+    for path in hardware_files:
+        run_stats.count_file('bytes_read', path)
+    run_stats.count_file('bytes_written', args.output)
+    run_stats.count(functions=result[0], candidates=result[1], files_created=1)
+    print(f"硬件函数: {result[0]}")
+    print(f"候选对数: {result[1]}")
+    print(f"候选文件已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
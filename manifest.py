@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+分组清单文件
+
+清单文件（.manifest）每行一个成员路径，空行和 # 开头的行会被忽略，相对路径相对于
+清单文件所在目录。split_folders.py --mode manifest 写出清单，p_test.py / shard_runner.py
+可以把清单当作硬件输入，代替复制出来的分组目录。
+"""
+
+import os
+
+MANIFEST_SUFFIX = '.manifest'
+
+
+def is_manifest(path):
+    return path.endswith(MANIFEST_SUFFIX) and os.path.isfile(path)
+
+
+def read_manifest(path):
+    """读取清单文件，返回成员路径列表"""
+    base = os.path.dirname(os.path.abspath(path))
+    members = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                members.append(os.path.join(base, line))
+    return members
+
+
+def write_manifest(path, members):
+    """写出清单文件，成员保存为绝对路径"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for member in members:
+            f.write(os.path.abspath(member) + '\n')
+
+
+def expand_manifest(path):
+    """清单成员展开为文件列表：文件原样保留，目录取其中的文件（不含子目录），按路径排序"""
+    files = []
+    for member in read_manifest(path):
+        if os.path.isdir(member):
+            files.extend(entry.path for entry in os.scandir(member) if entry.is_file())
+        elif os.path.isfile(member):
+            files.append(member)
+    return sorted(files)
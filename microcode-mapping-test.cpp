@@ -14,19 +14,51 @@
 #include <fstream>
 #include <chrono>
 #include <functional>
+#include <unordered_set>
 
 using namespace HMCM;
 namespace fs = std::filesystem;
 
+// 读取 prefilter.py 生成的候选文件：每行 "硬件名\t软件名[\t上界]"，# 开头的行为注释。
+// 只记录有候选的硬件名：候选软件列表不用于过滤匹配结果，避免预筛选漏掉的真实匹配被丢弃
+static bool loadCandidates(const std::string &path, std::unordered_set<std::string> &candidates)
+{
+  std::ifstream in(path);
+  if (!in.is_open())
+  {
+    return false;
+  }
+  std::string line;
+  while (std::getline(in, line))
+  {
+    if (!line.empty() && line.back() == '\r')
+    {
+      line.pop_back();
+    }
+    if (line.empty() || line[0] == '#')
+    {
+      continue;
+    }
+    size_t tab = line.find('\t');
+    if (tab == std::string::npos)
+    {
+      continue;
+    }
+    candidates.insert(line.substr(0, tab));
+  }
+  return true;
+}
+
 int main(int argc, char *argv[])
 {
   // 开始计时
   auto start_time = std::chrono::high_resolution_clock::now();
 
-  if (argc != 5)
+  if (argc != 5 && argc != 6)
   {
-    std::cerr << "用法: " << argv[0] << " <硬件AST文件/目录> <软件AST文件> <结果输出目录> <符号表读取文件>" << std::endl;
+    std::cerr << "用法: " << argv[0] << " <硬件AST文件/目录> <软件AST文件> <结果输出目录> <符号表读取文件> [候选文件]" << std::endl;
     std::cerr << "注意: 如果硬件AST文件是目录，将批量处理该目录下的所有.txt文件" << std::endl;
+    std::cerr << "注意: 指定候选文件（prefilter.py 生成）时，跳过没有候选的硬件文件，其余硬件文件照常与全部软件匹配" << std::endl;
     return 1;
   }
 
@@ -34,6 +66,8 @@ int main(int argc, char *argv[])
   std::string softwareFile = argv[2];
   std::string resultDir = argv[3];
   std::string symbolTableFile = argv[4];
+  bool useCandidates = (argc == 6);
+  std::unordered_set<std::string> candidates;
   // 检查输入文件是否存在
   if (!fs::exists(hardwareInput))
   {
@@ -45,6 +79,11 @@ int main(int argc, char *argv[])
     std::cerr << "软件AST文件不存在: " << softwareFile << std::endl;
     return 1;
   }
+  if (useCandidates && !loadCandidates(argv[5], candidates))
+  {
+    std::cerr << "无法读取候选文件: " << argv[5] << std::endl;
+    return 1;
+  }
 
   // 创建
   MicrocodeMappingEngine engine;
@@ -100,6 +139,13 @@ int main(int argc, char *argv[])
         std::string basename = fs::path(hardwareFile).stem().string();
         std::string filename = fs::path(hardwareFile).filename().string();
         
+        // 预筛选没有留下任何候选软件的硬件文件不做匹配
+        if (useCandidates && candidates.find(basename) == candidates.end())
+        {
+          std::cout << "硬件 " << basename << " 没有候选软件，跳过" << std::endl;
+          continue;
+        }
+
         std::cout << "处理硬件文件: " << basename << "..." << std::endl;
         
         // 为当前硬件文件进行树匹配
@@ -109,7 +155,7 @@ int main(int argc, char *argv[])
           continue;
         }
         
-        const auto &matchResults = engine.getMatchResults();
+        auto matchResults = engine.getMatchResults();
 
         if (matchResults.empty())
         {
@@ -248,6 +294,15 @@ int main(int argc, char *argv[])
     } else {
       // 单文件处理模式（原有逻辑）
       std::cout << "检测到硬件文件，启用单文件处理模式" << std::endl;
+
+      // 预筛选没有留下任何候选软件时直接按无匹配结果返回
+      std::string hardwareName = fs::path(hardwareInput).stem().string();
+      if (useCandidates && candidates.find(hardwareName) == candidates.end())
+      {
+        std::cout << "硬件 " << hardwareName << " 没有候选软件，跳过" << std::endl;
+        std::cout << "没有找到匹配结果" << std::endl;
+        return 2;
+      }
       
       // 1. 解析AST
       if (!engine.parseAST(hardwareInput, softwareFile, symbolTableFile))
@@ -282,7 +337,7 @@ int main(int argc, char *argv[])
     }
     // 打印硬件名称以及最高的分数及对应的软件名称
     engine.printBestMatch();
-    const auto &matchResults = engine.getMatchResults();
+    auto matchResults = engine.getMatchResults();
 
     if (matchResults.empty())
     {
@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+微码映射引擎批量调试测试（并行版 p_test.sh）
+
+同时运行 N 个 microcode-mapping-test 进程，每个任务有独立的超时，
+按退出码分类结果（0 成功，2 无匹配结果，其他为失败），
+保存每个任务的 stdout/stderr，并输出带耗时的 JSON/CSV 汇总。
+指定 --cache-dir 时，按硬件AST、软件AST、符号表、引擎可执行文件和引擎设置的内容
+哈希缓存每个任务的输出，重新运行时只有输入变化的任务会真正执行。
+
+输出格式与 p_test.sh 相同：
+output/
+├── single_test1/
+│   ├── hardware1.txt          (硬件AST文件)
+│   └── hardware1/             (硬件文件名文件夹，包含匹配结果)
+├── logs/
+│   ├── single_test1.stdout
+│   └── single_test1.stderr
+├── summary.json
+└── summary.csv
+
+用法: python p_test.py <硬件AST文件夹|清单文件> <软件AST文件> <输出目录> <符号表读取文件>
+                       [-m 可执行文件] [-j N] [--timeout 秒] [--cache-dir 缓存目录] [--dedup]
+                       [--candidates 候选文件]
+"""
+
+import argparse
+import csv
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from dedup_functions import group_equivalent
+from manifest import expand_manifest, is_manifest
+from prefilter import read_candidates
+import run_stats
+
+DEFAULT_MICROCODE = "microcode-mapping-test"
+
+EXIT_SUCCESS = 0
+EXIT_NO_MATCH = 2  # 退出码2表示没有匹配结果
+
+STATUS_SUCCESS = 'success'
+STATUS_NO_MATCH = 'no_match'
+STATUS_ERROR = 'error'
+STATUS_TIMEOUT = 'timeout'
+STATUS_PRUNED = 'pruned'  # 预筛选没有留下候选软件，未运行引擎
+
+SUMMARY_FIELDS = ['index', 'hardware_file', 'status', 'exit_code', 'wall_time',
+                  'output_dir', 'stdout_log', 'stderr_log', 'cached', 'representative']
+
+# microcode-mapping-test 中写死的引擎设置，修改后需要同步更新，旧的缓存随之失效
+ENGINE_SETTINGS = {
+    'setInlineThresholds': [2, 2],
+    'setMatchingThreshold': 0.8,
+}
+CACHE_VERSION = 1
+HASH_CHUNK_SIZE = 1 << 20
+# 缓存有效的状态：超时和失败的任务总是重新运行
+CACHEABLE_STATUSES = (STATUS_SUCCESS, STATUS_NO_MATCH)
+
+
+def list_hardware_files(hardware_dir):
+    """
+    硬件AST文件夹中的所有文件（不含子目录），按文件名排序
+
+    hardware_dir 也可以是 split_folders.py 写出的 .manifest 清单文件
+    """
+    if is_manifest(hardware_dir):
+        return expand_manifest(hardware_dir)
+    return sorted(entry.path for entry in os.scandir(hardware_dir) if entry.is_file())
+
+
+def hardware_stem(hardware_file):
+    """硬件名：文件名去掉扩展名（与引擎中的 basename 相同）"""
+    return os.path.splitext(os.path.basename(hardware_file))[0]
+
+
+def classify_exit_code(exit_code):
+    """按 p_test.sh 的约定把退出码映射为任务状态"""
+    if exit_code == EXIT_SUCCESS:
+        return STATUS_SUCCESS
+    if exit_code == EXIT_NO_MATCH:
+        return STATUS_NO_MATCH
+    return STATUS_ERROR
+
+
+def file_digest(path):
+    """文件内容的 sha256"""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def run_fingerprint(software_file, symbol_table, microcode):
+    """所有任务共用的输入指纹：软件AST、符号表、引擎可执行文件和引擎设置"""
+    h = hashlib.sha256()
+    h.update(json.dumps({
+        'version': CACHE_VERSION,
+        'settings': ENGINE_SETTINGS,
+        'software': file_digest(software_file),
+        'symbol_table': file_digest(symbol_table) if os.path.isfile(symbol_table) else None,
+        'microcode': file_digest(microcode),
+    }, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()
+
+
+def cache_entry_dir(cache_dir, fingerprint, hardware_file):
+    """
+    任务的缓存目录：<缓存>/<键前两位>/<键>
+
+    键由公共指纹、硬件文件名和硬件文件内容决定。
+    引擎按硬件文件名命名结果文件夹，所以内容相同、文件名不同的硬件文件不共用缓存
+    （这种情况由 --dedup 处理）
+    """
+    h = hashlib.sha256(f"{fingerprint}:{file_digest(hardware_file)}:".encode('ascii'))
+    h.update(os.path.basename(hardware_file).encode('utf-8', 'surrogateescape'))
+    key = h.hexdigest()
+    return os.path.join(cache_dir, key[:2], key)
+
+
+def restore_cached(entry_dir, single_test_dir, stdout_log, stderr_log):
+    """
+    从缓存恢复任务输出
+
+    Returns:
+        dict: 缓存的 {'status', 'exit_code'}，未命中时返回 None
+    """
+    try:
+        with open(os.path.join(entry_dir, "meta.json"), 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    shutil.copyfile(os.path.join(entry_dir, "stdout"), stdout_log)
+    shutil.copyfile(os.path.join(entry_dir, "stderr"), stderr_log)
+    if meta['status'] == STATUS_SUCCESS:
+        shutil.copytree(os.path.join(entry_dir, "result"), single_test_dir, dirs_exist_ok=True)
+    return meta
+
+
+def store_cached(entry_dir, single_test_dir, hardware_name, stdout_log, stderr_log, status, exit_code):
+    """把任务输出存入缓存（先写临时目录再改名，并发写同一个键时保留先完成的）"""
+    tmp_dir = f"{entry_dir}.tmp{os.getpid()}_{threading.get_ident()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    shutil.copyfile(stdout_log, os.path.join(tmp_dir, "stdout"))
+    shutil.copyfile(stderr_log, os.path.join(tmp_dir, "stderr"))
+    if status == STATUS_SUCCESS:
+        # 硬件AST文件本身不进缓存，恢复时从输入复制
+        shutil.copytree(single_test_dir, os.path.join(tmp_dir, "result"),
+                        ignore=lambda d, names: [hardware_name] if d == single_test_dir else [])
+    with open(os.path.join(tmp_dir, "meta.json"), 'w', encoding='utf-8') as f:
+        json.dump({'status': status, 'exit_code': exit_code}, f)
+    try:
+        os.rename(tmp_dir, entry_dir)
+    except OSError:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def run_job(index, hardware_file, software_file, symbol_table, output_base, microcode, timeout=None,
+            cache_dir=None, fingerprint=None, candidate_file=None):
+    """
+    运行单个硬件文件的匹配任务
+
+    Args:
+        index (int): 任务编号，对应 single_test<index> 目录
+        hardware_file (str): 硬件AST文件
+        software_file (str): 软件AST文件
+        symbol_table (str): 符号表读取文件
+        output_base (str): 输出基础目录
+        microcode (str): 微码映射引擎可执行文件
+        timeout (float): 超时秒数，为 None 时不限制
+        cache_dir (str): 结果缓存目录，为 None 时不使用缓存
+        fingerprint (str): run_fingerprint() 的结果，使用缓存时必须提供
+        candidate_file (str): prefilter.py 生成的候选文件，作为引擎的第 5 个参数
+
+    Returns:
+        dict: 任务结果，字段见 SUMMARY_FIELDS
+    """
+    filename = os.path.basename(hardware_file)
+    single_test_dir = os.path.join(output_base, f"single_test{index}")
+    log_dir = os.path.join(output_base, "logs")
+    stdout_log = os.path.join(log_dir, f"single_test{index}.stdout")
+    stderr_log = os.path.join(log_dir, f"single_test{index}.stderr")
+
+    # 复制硬件文件到single_test目录
+    os.makedirs(single_test_dir, exist_ok=True)
+    shutil.copy2(hardware_file, os.path.join(single_test_dir, filename))
+
+    start = time.monotonic()
+    entry_dir = None
+    if cache_dir:
+        entry_dir = cache_entry_dir(cache_dir, fingerprint, hardware_file)
+    meta = restore_cached(entry_dir, single_test_dir, stdout_log, stderr_log) if entry_dir else None
+    if meta is not None:
+        exit_code = meta['exit_code']
+        status = meta['status']
+    else:
+        cmd = [microcode, hardware_file, software_file, single_test_dir, symbol_table]
+        if candidate_file:
+            cmd.append(candidate_file)
+        with open(stdout_log, 'wb') as out_f, open(stderr_log, 'wb') as err_f:
+            try:
+                exit_code = subprocess.run(cmd, stdout=out_f, stderr=err_f, timeout=timeout).returncode
+                status = classify_exit_code(exit_code)
+            except subprocess.TimeoutExpired:
+                exit_code = None
+                status = STATUS_TIMEOUT
+            except OSError as e:
+                err_f.write(f"无法启动 {microcode}: {e}\n".encode('utf-8'))
+                exit_code = None
+                status = STATUS_ERROR
+        if entry_dir and status in CACHEABLE_STATUSES:
+            store_cached(entry_dir, single_test_dir, filename, stdout_log, stderr_log, status, exit_code)
+    wall_time = time.monotonic() - start
+
+    # 没有匹配结果或处理失败时删除single_test目录
+    if status != STATUS_SUCCESS:
+        shutil.rmtree(single_test_dir, ignore_errors=True)
+
+    return {
+        'index': index,
+        'hardware_file': hardware_file,
+        'status': status,
+        'exit_code': exit_code,
+        'wall_time': round(wall_time, 3),
+        'output_dir': single_test_dir if status == STATUS_SUCCESS else None,
+        'stdout_log': stdout_log,
+        'stderr_log': stderr_log,
+        'cached': meta is not None,
+        'representative': None,
+    }
+
+
+def pruned_result(index, hardware_file):
+    """预筛选后没有候选软件的硬件文件：不运行引擎，直接记为 pruned"""
+    return {
+        'index': index,
+        'hardware_file': hardware_file,
+        'status': STATUS_PRUNED,
+        'exit_code': None,
+        'wall_time': 0.0,
+        'output_dir': None,
+        'stdout_log': None,
+        'stderr_log': None,
+        'cached': False,
+        'representative': None,
+    }
+
+
+def fan_out_result(rep_result, index, hardware_file, output_base):
+    """
+    把等价类代表文件的任务结果分发给同类的另一个硬件文件
+
+    结果目录中以代表文件名命名的文件夹改为以该硬件文件名命名，日志原样复制。
+
+    Returns:
+        dict: 该硬件文件的任务结果，representative 为代表文件
+    """
+    filename = os.path.basename(hardware_file)
+    single_test_dir = os.path.join(output_base, f"single_test{index}")
+    log_dir = os.path.join(output_base, "logs")
+    stdout_log = os.path.join(log_dir, f"single_test{index}.stdout")
+    stderr_log = os.path.join(log_dir, f"single_test{index}.stderr")
+    shutil.copyfile(rep_result['stdout_log'], stdout_log)
+    shutil.copyfile(rep_result['stderr_log'], stderr_log)
+
+    status = rep_result['status']
+    if status == STATUS_SUCCESS:
+        rep_stem = os.path.splitext(os.path.basename(rep_result['hardware_file']))[0]
+        stem = os.path.splitext(filename)[0]
+        os.makedirs(single_test_dir, exist_ok=True)
+        shutil.copy2(hardware_file, os.path.join(single_test_dir, filename))
+        for entry in os.scandir(rep_result['output_dir']):
+            if entry.is_dir():
+                name = stem if entry.name == rep_stem else entry.name
+                shutil.copytree(entry.path, os.path.join(single_test_dir, name), dirs_exist_ok=True)
+
+    return {
+        'index': index,
+        'hardware_file': hardware_file,
+        'status': status,
+        'exit_code': rep_result['exit_code'],
+        'wall_time': 0.0,
+        'output_dir': single_test_dir if status == STATUS_SUCCESS else None,
+        'stdout_log': stdout_log,
+        'stderr_log': stderr_log,
+        'cached': rep_result['cached'],
+        'representative': rep_result['hardware_file'],
+    }
+
+
+def count_statuses(results):
+    """各状态的任务数，另外 'cached' 为从缓存恢复的任务数，'deduplicated' 为复用代表文件结果的任务数"""
+    counts = {}
+    for r in results:
+        counts[r['status']] = counts.get(r['status'], 0) + 1
+    counts['cached'] = sum(1 for r in results if r.get('cached'))
+    counts['deduplicated'] = sum(1 for r in results if r.get('representative'))
+    return counts
+
+
+def write_summary(results, output_base):
+    """写出 summary.json 和 summary.csv，返回两个文件的路径"""
+    json_path = os.path.join(output_base, "summary.json")
+    csv_path = os.path.join(output_base, "summary.csv")
+    counts = count_statuses(results)
+
+    with open(json_path, 'w', encoding='utf-8') as f:
+        json.dump({'total': len(results), 'counts': counts, 'jobs': results},
+                  f, ensure_ascii=False, indent=2)
+
+    with open(csv_path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_FIELDS)
+        writer.writeheader()
+        writer.writerows(results)
+
+    return json_path, csv_path
+
+
+def run_batch(hardware_files, software_file, symbol_table, output_base, microcode,
+              jobs=1, timeout=None, cache_dir=None, dedup=False, candidate_file=None):
+    """
+    并行运行所有硬件文件的匹配任务
+
+    cache_dir 不为 None 时，输入和引擎设置都没有变化的任务直接从缓存恢复结果；
+    dedup 为 True 时，规范形式相同的硬件文件（见 dedup_functions.py）只运行代表文件，
+    结果再分发给同类的其他文件；candidate_file 不为 None 时，没有候选软件的硬件文件
+    不运行引擎，其余文件把候选文件传给引擎
+
+    Returns:
+        list: 按任务编号排序的结果
+    """
+    os.makedirs(os.path.join(output_base, "logs"), exist_ok=True)
+    fingerprint = None
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        fingerprint = run_fingerprint(software_file, symbol_table, microcode)
+
+    indices = {hardware_file: index for index, hardware_file in enumerate(hardware_files, 1)}
+    results = []
+    if candidate_file:
+        candidates = read_candidates(candidate_file)
+        kept = []
+        for hardware_file in hardware_files:
+            if hardware_stem(hardware_file) in candidates:
+                kept.append(hardware_file)
+            else:
+                results.append(pruned_result(indices[hardware_file], hardware_file))
+        hardware_files = kept
+
+    if dedup:
+        classes = group_equivalent(hardware_files, jobs)
+    else:
+        classes = [(hardware_file, [hardware_file]) for hardware_file in hardware_files]
+    members_of = {rep: members for rep, members in classes}
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_job, indices[rep], rep, software_file, symbol_table,
+                               output_base, microcode, timeout, cache_dir, fingerprint,
+                               candidate_file)
+                   for rep, _ in classes]
+        for future in as_completed(futures):
+            r = future.result()
+            members = members_of[r['hardware_file']]
+            for member in members[1:]:
+                results.append(fan_out_result(r, indices[member], member, output_base))
+            name = os.path.basename(r['hardware_file'])
+            if len(members) > 1:
+                name += f" (+{len(members) - 1} 个相同文件)"
+            if r['cached']:
+                name += " (缓存)"
+            if r['status'] == STATUS_SUCCESS:
+                print(f"✓ 成功处理: {name} ({r['wall_time']:.1f}s)")
+            elif r['status'] == STATUS_NO_MATCH:
+                print(f"✗ 无匹配结果: {name}")
+            elif r['status'] == STATUS_TIMEOUT:
+                print(f"✗ 处理超时: {name}")
+            else:
+                print(f"✗ 处理失败: {name} (退出码 {r['exit_code']})")
+            results.append(r)
+
+    results.sort(key=lambda r: r['index'])
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="微码映射引擎批量调试测试（并行版）")
+    parser.add_argument('hardware_dir', help="硬件AST文件夹或 .manifest 清单文件")
+    parser.add_argument('software_file', help="软件AST文件")
+    parser.add_argument('output_dir', help="输出基础目录")
+    parser.add_argument('symbol_table', help="符号表读取文件")
+    parser.add_argument('-m', '--microcode', default=DEFAULT_MICROCODE,
+                        help=f"微码映射引擎可执行文件（默认 {DEFAULT_MICROCODE}）")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="同时运行的进程数，0 表示使用全部CPU（默认 0）")
+    parser.add_argument('--timeout', type=float, help="单个任务的超时秒数")
+    parser.add_argument('--candidates', help="prefilter.py 生成的候选文件：跳过没有候选的硬件文件，其余文件仍与全部软件匹配")
+    parser.add_argument('--dedup', action='store_true',
+                        help="规范形式相同的硬件文件只匹配一次，结果分发给同类文件")
+    parser.add_argument('--cache-dir', help="结果缓存目录：输入文件、引擎可执行文件和引擎设置都未变化的任务直接复用缓存")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    print("=== 微码映射引擎批量调试测试 ===")
+    print(f"硬件AST文件夹: {args.hardware_dir}")
+    print(f"软件AST文件: {args.software_file}")
+    print(f"输出基础目录: {args.output_dir}")
+
+    # 检查文件夹是否存在
+    if not (os.path.isdir(args.hardware_dir) or is_manifest(args.hardware_dir)):
+        print(f"错误: 硬件AST文件夹不存在: {args.hardware_dir}")
+        sys.exit(1)
+    if not os.path.isfile(args.software_file):
+        print(f"错误: 软件AST文件不存在: {args.software_file}")
+        sys.exit(1)
+    if args.candidates and not os.path.isfile(args.candidates):
+        print(f"错误: 候选文件不存在: {args.candidates}")
+        sys.exit(1)
+
+    # 检查可执行文件是否存在
+    microcode = shutil.which(args.microcode) or args.microcode
+    if not os.path.isfile(microcode):
+        print(f"错误: 微码映射引擎可执行文件不存在: {args.microcode}")
+        sys.exit(1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with run_stats.phase('list'):
+        hardware_files = list_hardware_files(args.hardware_dir)
+
+    print("")
+    print(f"开始批量处理 {len(hardware_files)} 个硬件文件（{jobs} 个并行进程）...")
+    start = time.monotonic()
+    with run_stats.phase('match'):
+        results = run_batch(hardware_files, args.software_file, args.symbol_table,
+                            args.output_dir, microcode, jobs, args.timeout, args.cache_dir, args.dedup, args.candidates)
+    with run_stats.phase('summary'):
+        json_path, csv_path = write_summary(results, args.output_dir)
+    run_stats.count_file('bytes_written', json_path)
+    run_stats.count_file('bytes_written', csv_path)
+
+    counts = count_statuses(results)
+    for path in hardware_files:
+        run_stats.count_file('bytes_read', path)
+    run_stats.count(functions=len(results), files_created=2, **counts)
+
+    print("")
+    print("=== 批量处理完成 ===")
+    print(f"总文件数: {len(results)}")
+    print(f"成功处理: {counts.get(STATUS_SUCCESS, 0)}")
+    print(f"处理失败: {counts.get(STATUS_ERROR, 0)}")
+    print(f"处理超时: {counts.get(STATUS_TIMEOUT, 0)}")
+    print(f"无匹配结果: {counts.get(STATUS_NO_MATCH, 0)}")
+    if args.cache_dir:
+        print(f"缓存命中: {counts['cached']}")
+    if args.candidates:
+        print(f"预筛选跳过: {counts.get(STATUS_PRUNED, 0)}")
+    if args.dedup:
+        print(f"复用等价文件结果: {counts['deduplicated']}")
+    print(f"总耗时: {time.monotonic() - start:.1f} 秒")
+    print("")
+    print(f"所有输出文件保存在: {args.output_dir}")
+    print(f"汇总: {json_path}, {csv_path}")
+
+
+if __name__ == "__main__":
+    main()
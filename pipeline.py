@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+单次读取的预处理流水线
+
+把 process_680ast_fixed.py（Print Tree 改写）、extract_segment.py（segment 提取）、
+extractFuncs_ipat_88.py / cut.py（函数分割）和 extract_acc_names.py（accName 统计）
+串成一组逐行的生成器，输入只读取、解码一次，中间结果不落盘，
+只写出最终的函数文件和 accName 报告。
+
+用法: python pipeline.py <AST dump> <输出目录> [-s N] [--splitter acc|marker]
+                         [--no-rewrite] [--acc-report 报告文件]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+import run_stats
+
+from cut import print_stream_summary, split_lines_stream
+from extract_acc_names import ACC_NAME_PATTERN, write_aggregate_report
+from extract_segment import count_segment_markers_in_file, iter_segment_lines
+from extractFuncs_ipat_88 import write_functions
+from process_680ast_fixed import EncodingError, detect_encoding, iter_decoded_lines, rewrite_print_tree
+
+
+def count_acc_names(lines, counter):
+    """透传各行，同时把其中的 callActionName 调用计入 counter"""
+    pattern = re.compile(ACC_NAME_PATTERN)
+    for line in lines:
+        if 'callActionName' in line:
+            counter.update(pattern.findall(line))
+        yield line
+
+
+def count_lines(lines, stats, key):
+    """透传各行，同时把行数累加到 stats[key]（下游提前结束时同样生效）"""
+    n = 0
+    try:
+        for line in lines:
+            n += 1
+            yield line
+    finally:
+        stats[key] = stats.get(key, 0) + n
+
+
+def build_stages(input_file, encoding, segment=None, rewrite=True, acc_counter=None, stats=None):
+    """
+    组装流水线的各个阶段
+
+    Args:
+        input_file (str): 输入 dump
+        encoding (str): 输入编码
+        segment (int): 只保留 segment N 的内容，为 None 时不做提取
+        rewrite (bool): 是否做 Print Tree 改写
+        acc_counter (Counter): 不为 None 时统计 accName
+        stats (dict): 不为 None 时记录各阶段的行数
+
+    Returns:
+        生成器：送入函数分割阶段的各行
+    """
+    lines = iter_decoded_lines(input_file, encoding)
+    if stats is not None:
+        lines = count_lines(lines, stats, 'read')
+    if rewrite:
+        lines = rewrite_print_tree(lines)
+    if segment is not None:
+        # 先在原文件上按字节数出连续的同号标记，逐行提取才能与 extract_segment.py 一致
+        markers = count_segment_markers_in_file(input_file, segment)
+        lines = iter_segment_lines(lines, segment, max(markers, 1))
+    if stats is not None:
+        lines = count_lines(lines, stats, 'split')
+    if acc_counter is not None:
+        lines = count_acc_names(lines, acc_counter)
+    return lines
+
+
+def run_pipeline(input_file, output_dir, segment=None, splitter='acc', rewrite=True,
+                 acc_report=None, verbose=False):
+    """
+    运行流水线
+
+    Args:
+        input_file (str): 输入 dump
+        output_dir (str): 函数文件输出目录
+        segment (int): 只处理 segment N
+        splitter (str): 'acc' 按 _acc_start/_end 分割，'marker' 按 xxx/yyy 分割
+        rewrite (bool): 是否做 Print Tree 改写
+        acc_report (str): accName 报告路径，为 None 时不统计
+        verbose (bool): 是否逐个打印输出的函数
+
+    Returns:
+        bool: 是否成功
+    """
+    start_time = time.time()
+
+    encoding = detect_encoding(input_file)
+    if encoding is None:
+        print("错误：无法使用任何编码读取文件")
+        return False
+    print(f"检测到编码：{encoding}")
+
+    acc_counter = Counter() if acc_report else None
+    stats = {}
+    lines = build_stages(input_file, encoding, segment, rewrite, acc_counter, stats)
+
+    try:
+        # 各阶段是逐行交织执行的，只能整体计时
+        with run_stats.phase('stream'):
+            if splitter == 'acc':
+                file_count, _ = write_functions(lines, output_dir, verbose)
+                run_stats.count(functions=file_count, files_created=file_count)
+                print(f"共创建 {file_count} 个函数文件，保存在 {output_dir} 下。")
+            else:
+                split_stats = split_lines_stream(lines, output_dir, verbose)
+                run_stats.count(functions=split_stats['functions'], files_created=split_stats['files'])
+                print_stream_summary(split_stats, output_dir)
+    except EncodingError as e:
+        print(f"错误：{e}")
+        return False
+
+    lines.close()
+    run_stats.count_file('bytes_read', input_file)
+    run_stats.count(lines=stats.get('read', 0))
+    print(f"读取行数：{stats.get('read', 0)}")
+    if segment is not None:
+        print(f"segment {segment} 行数：{stats.get('split', 0)}")
+        if not stats.get('split'):
+            print(f"警告：未找到 'segment {segment}' 或其内容为空")
+
+    if acc_counter is not None:
+        with run_stats.phase('report'):
+            write_aggregate_report(acc_report, {input_file: acc_counter}, acc_counter)
+        run_stats.count_file('bytes_written', acc_report)
+        print(f"accName 统计：{sum(acc_counter.values())} 次调用，{len(acc_counter)} 个不同的accName")
+        print(f"结果已保存到: {acc_report}")
+
+    print(f"耗时：{time.time() - start_time:.2f} 秒")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="单次读取的预处理流水线")
+    parser.add_argument('input_file', help="输入 AST dump")
+    parser.add_argument('output_dir', help="函数文件输出目录")
+    parser.add_argument('-s', '--segment', type=int, help="只处理 segment N 的内容")
+    parser.add_argument('--splitter', choices=('acc', 'marker'), default='acc',
+                        help="acc: 按 _acc_start/_end 分割（extractFuncs_ipat_88.py）；"
+                             "marker: 按 xxx/yyy 分割（cut.py）")
+    parser.add_argument('--no-rewrite', action='store_true', help="跳过 Print Tree 改写")
+    parser.add_argument('--acc-report', help="同时统计 accName 并写出报告")
+    parser.add_argument('-v', '--verbose', action='store_true', help="逐个打印输出的函数")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if not os.path.exists(args.input_file):
+        print(f"错误：输入文件 {args.input_file} 不存在")
+        sys.exit(1)
+
+    success = run_pipeline(args.input_file, args.output_dir, args.segment, args.splitter,
+                           not args.no_rewrite, args.acc_report, args.verbose)
+    if not success:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+硬件×软件匹配对的结构预筛选
+
+为每个函数预先计算指纹：节点数、深度和节点类型直方图。只有满足下面三个条件的
+(硬件, 软件) 对才会作为候选输出：
+    1. 节点数之比不超过 --ratio（与引擎 setInlineThresholds(2, 2) 的节点数比例一致）
+    2. 深度之差不超过 --depth（与引擎的深度差一致）
+    3. 类型直方图交集给出的相似度上界 2*Σmin(h_t, s_t) / (n_h + n_s) 不低于 --threshold
+       （只有类型相同的节点才能匹配，因此这是树匹配相似度的上界，默认与引擎的 0.8 一致）
+
+指纹取自内联前的软件AST，而引擎匹配的是内联后的树。内联只会让子树变大、变深，
+所以含有 jmp / func::CallOp 引用（可能被内联）的软件单元只检查"软件比硬件大太多"
+和"软件比硬件深太多"两个方向，其余条件不能作为上界，这样的对一律保留，上界记为 1。
+不含引用的软件单元内联前后相同，三个条件都照常检查。
+
+软件单元为软件AST中每个 FUNCTION_DEF/BUNDLE_DEF 子树，名称取其第一个子节点的
+第一个子节点的文本（与 microcode-mapping-test 生成结果文件名的方式相同）；
+硬件单元为每个硬件文件中的全部节点，名称为文件名（不含扩展名）。
+软件指纹缓存在旁路文件 <软件AST>.fpidx 中，软件AST变化后自动重建。
+
+候选文件每行一个 "硬件名\\t软件名\\t上界"，# 开头的行为注释，
+可以作为 microcode-mapping-test 的第 5 个参数或 p_test.py --candidates 的输入。
+
+用法: python prefilter.py <硬件AST目录|清单文件> <软件AST文件> -o <候选文件>
+                          [--ratio 2] [--depth 2] [--threshold 0.8] [-j N]
+"""
+
+import argparse
+import bisect
+import json
+import os
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+from ast_dump import NO_INDEX, NodeTable
+from manifest import expand_manifest, is_manifest
+import run_stats
+from symbol_table import REFERENCE_TEXTS, REFERENCE_TYPES
+
+DEF_TYPES = ('FUNCTION_DEF', 'BUNDLE_DEF')
+DEFAULT_RATIO = 2
+DEFAULT_DEPTH_DIFF = 2
+DEFAULT_THRESHOLD = 0.8
+
+FINGERPRINT_SUFFIX = '.fpidx'
+FINGERPRINT_VERSION = 2
+
+
+def subtree_fingerprint(table, start, end):
+    """节点区间 [start, end) 的指纹：(节点数, 深度, {类型: 个数})"""
+    depth = max(table.depth[start:end]) - table.depth[start] + 1
+    types = Counter(table.type_id[start:end])
+    return end - start, depth, {table.types[t]: c for t, c in types.items()}
+
+
+def has_references(table, start, end):
+    """节点区间 [start, end) 中是否有 jmp / func::CallOp 引用（引擎可能在此处内联）"""
+    ref_types = {i for i, t in enumerate(table.types) if t in REFERENCE_TYPES}
+    ref_texts = {i for i, t in enumerate(table.texts) if t in REFERENCE_TEXTS}
+    return any(table.type_id[i] in ref_types or table.text_id[i] in ref_texts
+               for i in range(start, end))
+
+
+def iter_software_units(table):
+    """
+    产出软件AST中每个 FUNCTION_DEF/BUNDLE_DEF 子树
+
+    Yields:
+        tuple: (名称, 子树起始节点, 子树结束位置)
+    """
+    def_ids = {i for i, t in enumerate(table.types) if t in DEF_TYPES}
+    for i in range(len(table)):
+        if table.type_id[i] not in def_ids:
+            continue
+        child = table.first_child[i]
+        grandchild = table.first_child[child] if child != NO_INDEX else NO_INDEX
+        name = table.text(grandchild) if grandchild != NO_INDEX else "unknown"
+        yield name, i, table.subtree_end(i)
+
+
+def software_fingerprints(software_file):
+    """
+    计算软件AST中每个 FUNCTION_DEF/BUNDLE_DEF 子树的指纹
+
+    Returns:
+        list: [{'name', 'nodes', 'depth', 'types', 'inlinable'}]，按节点数排序；
+              inlinable 表示子树中有引用，内联后可能变大
+    """
+    table = NodeTable.from_file(software_file)
+    units = []
+    for name, start, end in iter_software_units(table):
+        nodes, depth, types = subtree_fingerprint(table, start, end)
+        units.append({'name': name, 'nodes': nodes, 'depth': depth, 'types': types,
+                      'inlinable': has_references(table, start, end)})
+    units.sort(key=lambda u: (u['nodes'], u['name']))
+    return units
+
+
+def load_software_fingerprints(software_file):
+    """读取软件指纹缓存，不存在或已过期时重新计算并写回"""
+    path = software_file + FINGERPRINT_SUFFIX
+    st = os.stat(software_file)
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if (cached.get('version') == FINGERPRINT_VERSION
+                and cached.get('size') == st.st_size
+                and cached.get('mtime_ns') == st.st_mtime_ns):
+            return cached['units']
+    except (OSError, ValueError):
+        pass
+
+    units = software_fingerprints(software_file)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'version': FINGERPRINT_VERSION, 'size': st.st_size,
+                   'mtime_ns': st.st_mtime_ns, 'units': units}, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    return units
+
+
+def hardware_fingerprint(hardware_file):
+    """硬件文件的指纹，文件中没有节点时返回 None"""
+    table = NodeTable.from_file(hardware_file)
+    if not len(table):
+        return None
+    nodes, depth, types = subtree_fingerprint(table, 0, len(table))
+    name = os.path.splitext(os.path.basename(hardware_file))[0]
+    return {'name': name, 'nodes': nodes, 'depth': depth, 'types': types}
+
+
+def similarity_bound(hw, sw):
+    """类型直方图交集给出的相似度上界"""
+    small, large = (hw['types'], sw['types'])
+    if len(small) > len(large):
+        small, large = large, small
+    common = sum(min(c, large.get(t, 0)) for t, c in small.items())
+    return 2 * common / (hw['nodes'] + sw['nodes'])
+
+
+def iter_candidates(hardware, software, ratio=DEFAULT_RATIO, depth_diff=DEFAULT_DEPTH_DIFF,
+                    threshold=DEFAULT_THRESHOLD):
+    """
+    产出通过预筛选的 (硬件名, 软件名, 上界)
+
+    software 必须按节点数排序，节点数范围用二分查找确定，只对范围内的软件单元
+    检查深度和直方图上界。可能被内联的软件单元只排除内联前就已经比硬件大太多或
+    深太多的，上界记为 1（见模块说明）。
+    """
+    fixed = [sw for sw in software if not sw.get('inlinable')]
+    inlinable = [sw for sw in software if sw.get('inlinable')]
+    fixed_sizes = [sw['nodes'] for sw in fixed]
+    inlinable_sizes = [sw['nodes'] for sw in inlinable]
+    for hw in hardware:
+        n = hw['nodes']
+        lo = bisect.bisect_left(fixed_sizes, n / ratio)
+        hi = bisect.bisect_right(fixed_sizes, n * ratio)
+        for sw in fixed[lo:hi]:
+            if abs(sw['depth'] - hw['depth']) > depth_diff:
+                continue
+            bound = similarity_bound(hw, sw)
+            if bound >= threshold:
+                yield hw['name'], sw['name'], bound
+        for sw in inlinable[:bisect.bisect_right(inlinable_sizes, n * ratio)]:
+            if sw['depth'] - hw['depth'] <= depth_diff:
+                yield hw['name'], sw['name'], 1.0
+
+
+def read_candidates(candidate_file):
+    """读取候选文件，返回 {硬件名: {软件名, ...}}"""
+    candidates = {}
+    with open(candidate_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip() or line.startswith('#'):
+                continue
+            fields = line.rstrip('\n').split('\t')
+            if len(fields) >= 2:
+                candidates.setdefault(fields[0], set()).add(fields[1])
+    return candidates
+
+
+def write_candidates(output_file, candidates, score_label='bound'):
+    """写出候选文件，返回候选对数"""
+    count = 0
+    with open(output_file, 'w', encoding='utf-8') as f:
+        f.write(f"# hardware\tsoftware\t{score_label}\n")
+        for hw_name, sw_name, bound in candidates:
+            f.write(f"{hw_name}\t{sw_name}\t{bound:.4f}\n")
+            count += 1
+    return count
+
+
+def prefilter(hardware_files, software_file, output_file, ratio=DEFAULT_RATIO,
+              depth_diff=DEFAULT_DEPTH_DIFF, threshold=DEFAULT_THRESHOLD, jobs=1):
+    """
+    计算指纹并写出候选文件
+
+    Returns:
+        dict: {'hardware', 'software', 'pairs', 'candidates'} 统计
+    """
+    with run_stats.phase('software_fingerprints'):
+        software = load_software_fingerprints(software_file)
+    with run_stats.phase('hardware_fingerprints'):
+        if jobs > 1 and len(hardware_files) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as pool:
+                hardware = list(pool.map(hardware_fingerprint, hardware_files, chunksize=16))
+        else:
+            hardware = [hardware_fingerprint(path) for path in hardware_files]
+    hardware = [hw for hw in hardware if hw is not None]
+
+    with run_stats.phase('candidates'):
+        count = write_candidates(output_file, iter_candidates(hardware, software, ratio,
+                                                              depth_diff, threshold))
+    return {
+        'hardware': len(hardware),
+        'software': len(software),
+        'pairs': len(hardware) * len(software),
+        'candidates': count,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="硬件×软件匹配对的结构预筛选")
+    parser.add_argument('hardware', help="硬件AST目录或 .manifest 清单文件")
+    parser.add_argument('software_file', help="软件AST文件")
+    parser.add_argument('-o', '--output', required=True, help="候选文件")
+    parser.add_argument('--ratio', type=float, default=DEFAULT_RATIO,
+                        help=f"节点数之比上限（默认 {DEFAULT_RATIO}）")
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH_DIFF,
+                        help=f"深度之差上限（默认 {DEFAULT_DEPTH_DIFF}）")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"相似度上界的下限（默认 {DEFAULT_THRESHOLD}）")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="并行进程数，0 表示使用全部CPU（默认 0）")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if is_manifest(args.hardware):
+        hardware_files = expand_manifest(args.hardware)
+    elif os.path.isdir(args.hardware):
+        hardware_files = sorted(entry.path for entry in os.scandir(args.hardware)
+                                if entry.is_file() and entry.name.endswith('.txt'))
+    else:
+        print(f"错误: 硬件AST目录不存在: {args.hardware}")
+        sys.exit(1)
+    if not os.path.isfile(args.software_file):
+        print(f"错误: 软件AST文件不存在: {args.software_file}")
+        sys.exit(1)
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    stats = prefilter(hardware_files, args.software_file, args.output, args.ratio,
+                      args.depth, args.threshold, jobs)
+    for path in hardware_files:
+        run_stats.count_file('bytes_read', path)
+    run_stats.count_file('bytes_written', args.output)
+    run_stats.count(functions=stats['hardware'] + stats['software'],
+                    candidates=stats['candidates'], files_created=1)
+
+    print(f"硬件函数: {stats['hardware']}")
+    print(f"软件函数: {stats['software']}")
+    print(f"全部组合: {stats['pairs']}")
+    kept = stats['candidates'] / stats['pairs'] if stats['pairs'] else 0
+    print(f"候选对数: {stats['candidates']} ({kept:.1%})")
+    print(f"候选文件已保存到: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,20 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import argparse
+import codecs
 import sys
 import re
 import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import run_stats
+
+# 候选编码，按顺序尝试
+ENCODINGS = ['utf-8', 'gbk', 'gb2312', 'latin-1']
+# 编码检测的采样大小
+SAMPLE_SIZE = 1 << 20
 
 def process_ast_file(input_file, output_file):
     """
@@ -28,68 +39,12 @@ def process_ast_file(input_file, output_file):
         
         print(f"正在读取文件：{input_file}")
         
-        # 尝试不同的编码方式
-        encodings = ['utf-8', 'gbk', 'gb2312', 'latin-1']
-        lines = None
-        
-        for encoding in encodings:
-            try:
-                with open(input_file, 'r', encoding=encoding) as f:
-                    lines = f.readlines()
-                print(f"成功使用编码：{encoding}")
-                break
-            except UnicodeDecodeError:
-                print(f"编码 {encoding} 失败，尝试下一个...")
-                continue
-            except Exception as e:
-                print(f"读取文件时出错（编码 {encoding}）：{e}")
-                continue
-        
-        if lines is None:
+        # 只采样文件开头来确定编码，整个文件只解码一次
+        encoding = detect_encoding(input_file)
+        if encoding is None:
             print("错误：无法使用任何编码读取文件")
             return False
-        
-        print(f"文件读取成功，共 {len(lines)} 行")
-        
-        processed_lines = []
-        i = 0
-        
-        while i < len(lines):
-            line = lines[i]
-            
-            # 检查是否包含Print Tree
-            if 'Print Tree' in line:
-                # 获取当前行的缩进
-                indent = len(line) - len(line.lstrip())
-                
-                # 检查下一行是否存在
-                if i + 1 < len(lines):
-                    next_line = lines[i + 1]
-                    
-                    # 解析下一行获取LABEL和LOC
-                    label, loc = parse_next_line(next_line)
-                    
-                    if label and loc:
-                        # 创建新的行，缩进减少2个空格
-                        new_indent = max(0, indent - 2)
-                        new_line = ' ' * new_indent + f'-> {{ ({label})   ({loc})\n'
-                        processed_lines.append(new_line)
-                        
-                        # 跳过下一行（因为我们已经处理了它）
-                        i += 2
-                        continue
-                    else:
-                        # 如果解析失败，保留原行
-                        processed_lines.append(line)
-                        i += 1
-                else:
-                    # 如果没有下一行，保留原行
-                    processed_lines.append(line)
-                    i += 1
-            else:
-                # 不包含Print Tree的行直接保留
-                processed_lines.append(line)
-                i += 1
+        print(f"检测到编码：{encoding}（采样前 {SAMPLE_SIZE // 1024} KB）")
         
         # 检查输出目录是否存在
         output_dir = os.path.dirname(output_file)
@@ -97,15 +52,26 @@ def process_ast_file(input_file, output_file):
             print(f"创建输出目录：{output_dir}")
             os.makedirs(output_dir, exist_ok=True)
         
-        # 写入输出文件
+        # 边读边写
         print(f"正在写入文件：{output_file}")
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.writelines(processed_lines)
+        line_count = 0
+        try:
+            with open(output_file, 'w', encoding='utf-8') as f:
+                for line in rewrite_print_tree(iter_decoded_lines(input_file, encoding)):
+                    f.write(line)
+                    line_count += 1
+        except EncodingError as e:
+            print(f"错误：{e}")
+            os.remove(output_file)
+            return False
         
         print(f"成功处理文件：")
         print(f"  输入文件：{input_file}")
         print(f"  输出文件：{output_file}")
-        print(f"  处理行数：{len(processed_lines)}")
+        print(f"  处理行数：{line_count}")
+        run_stats.count_file('bytes_read', input_file)
+        run_stats.count_file('bytes_written', output_file)
+        run_stats.count(lines=line_count, files_created=1)
         
         return True
         
@@ -124,6 +90,186 @@ def process_ast_file(input_file, output_file):
         traceback.print_exc()
         return False
 
+class EncodingError(ValueError):
+    """采样确定的编码在文件后面的位置解码失败"""
+
+    def __init__(self, encoding, offset, lineno):
+        super().__init__(f"编码 {encoding} 无法解码第 {lineno} 行（文件偏移 {offset}）")
+        self.encoding = encoding
+        self.offset = offset
+        self.lineno = lineno
+
+def detect_encoding(input_file, sample_size=SAMPLE_SIZE, verbose=True):
+    """
+    读取文件开头的一段字节，依次尝试候选编码
+
+    Args:
+        input_file (str): 输入文件路径
+        sample_size (int): 采样字节数
+        verbose (bool): 是否打印失败的编码
+
+    Returns:
+        str: 第一个能解码采样内容的编码，都不能解码时返回 None
+    """
+    with open(input_file, 'rb') as f:
+        sample = f.read(sample_size)
+    # 采样可能截断在多字节字符中间，文件没读完时不要求结尾完整
+    final = len(sample) < sample_size
+    for encoding in ENCODINGS:
+        try:
+            codecs.getincrementaldecoder(encoding)().decode(sample, final=final)
+            return encoding
+        except UnicodeDecodeError:
+            if verbose:
+                print(f"编码 {encoding} 失败，尝试下一个...")
+    return None
+
+def iter_decoded_lines(input_file, encoding):
+    """
+    以二进制逐行读取并解码，换行符统一为 LF
+
+    Raises:
+        EncodingError: 某一行无法解码时抛出，带有出错字节在文件中的偏移
+    """
+    offset = 0
+    with open(input_file, 'rb') as f:
+        for lineno, raw in enumerate(f, 1):
+            try:
+                line = raw.decode(encoding)
+            except UnicodeDecodeError as e:
+                raise EncodingError(encoding, offset + e.start, lineno) from None
+            if line.endswith('\r\n'):
+                line = line[:-2] + '\n'
+            offset += len(raw)
+            yield line
+
+def rewrite_print_tree(lines):
+    """
+    流式替换 Print Tree 行：只缓存一行 Print Tree，看到下一行后再决定输出
+
+    Print Tree 的下一行能解析出 LABEL 和 LOC 时，两行合并成
+    '-> { (DEF)   (LOC)'，缩进减少2个空格；否则原样保留。
+    """
+    pending = None
+    for line in lines:
+        if pending is not None:
+            label, loc = parse_next_line(line)
+            if label and loc:
+                indent = len(pending) - len(pending.lstrip())
+                new_indent = max(0, indent - 2)
+                yield ' ' * new_indent + f'-> {{ ({label})   ({loc})\n'
+                pending = None
+                continue
+            yield pending
+            pending = None
+
+        if 'Print Tree' in line:
+            pending = line
+        else:
+            yield line
+
+    # 最后一行是 Print Tree 时原样保留
+    if pending is not None:
+        yield pending
+
+def rewrite_file_atomic(input_file, output_file):
+    """
+    检测编码并改写单个文件：先写入同目录下的临时文件，完成后再重命名，
+    中途失败不会留下不完整的输出
+
+    Returns:
+        int: 输出行数
+
+    Raises:
+        EncodingError: 采样之后的内容解码失败
+        ValueError: 没有可用的编码
+    """
+    encoding = detect_encoding(input_file, verbose=False)
+    if encoding is None:
+        raise ValueError("无法使用任何编码读取文件")
+
+    tmp_file = f"{output_file}.tmp{os.getpid()}"
+    line_count = 0
+    try:
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            for line in rewrite_print_tree(iter_decoded_lines(input_file, encoding)):
+                f.write(line)
+                line_count += 1
+        os.replace(tmp_file, output_file)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+        raise
+    return line_count
+
+def _batch_worker(paths):
+    input_file, output_file = paths
+    try:
+        return input_file, rewrite_file_atomic(input_file, output_file), None
+    except Exception as e:
+        return input_file, -1, f"{type(e).__name__}: {e}"
+
+def process_ast_directory(input_dir, output_dir, jobs=0, force=False):
+    """
+    批量模式：用进程池改写输入目录下的所有文件
+
+    输出文件已存在且不比输入文件旧时跳过（force=True 时全部重做）。
+
+    Args:
+        input_dir (str): 输入目录
+        output_dir (str): 输出目录
+        jobs (int): 并行进程数，0 表示使用全部CPU
+        force (bool): 是否忽略已有的输出
+
+    Returns:
+        bool: 是否全部成功
+    """
+    start_time = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+
+    tasks = []
+    skipped = 0
+    for entry in sorted(os.scandir(input_dir), key=lambda e: e.name):
+        if not entry.is_file() or entry.name.startswith('.'):
+            continue
+        output_file = os.path.join(output_dir, entry.name)
+        if not force and os.path.exists(output_file) \
+                and os.path.getmtime(output_file) >= entry.stat().st_mtime:
+            skipped += 1
+            continue
+        tasks.append((entry.path, output_file))
+
+    jobs = jobs if jobs > 0 else (os.cpu_count() or 1)
+    total_lines = 0
+    failures = []
+    if tasks:
+        chunksize = max(1, min(64, len(tasks) // (jobs * 4)))
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            for (input_file, line_count, error), (_, output_file) in zip(
+                    pool.map(_batch_worker, tasks, chunksize=chunksize), tasks):
+                if error is None:
+                    total_lines += line_count
+                    run_stats.count_file('bytes_read', input_file)
+                    run_stats.count_file('bytes_written', output_file)
+                    run_stats.count(files_created=1)
+                else:
+                    failures.append((input_file, error))
+
+    run_stats.count(lines=total_lines)
+    print(f"批量处理完成：")
+    print(f"  输入目录：{input_dir}")
+    print(f"  输出目录：{output_dir}")
+    print(f"  文件总数：{len(tasks) + skipped}")
+    print(f"  成功处理：{len(tasks) - len(failures)}")
+    print(f"  已是最新，跳过：{skipped}")
+    print(f"  处理失败：{len(failures)}")
+    print(f"  输出行数：{total_lines}")
+    print(f"  耗时：{time.time() - start_time:.2f} 秒（{jobs} 个进程）")
+    for input_file, error in failures:
+        print(f"  ✗ {input_file}: {error}")
+
+    return not failures
+
 def parse_next_line(line):
     """
     解析下一行，提取LABEL和LOC
@@ -169,21 +315,38 @@ def parse_next_line(line):
 
 def main():
     """主函数"""
-    if len(sys.argv) != 3:
-        print("用法：python process_680ast_fixed.py <输入文件> <输出文件>")
-        print("示例：python process_680ast_fixed.py input.ast output.ast")
-        sys.exit(1)
-    
-    input_file = sys.argv[1]
-    output_file = sys.argv[2]
+    parser = argparse.ArgumentParser(
+        description="将包含Print Tree的行替换为指定格式；输入为目录时批量处理目录下的所有文件",
+        epilog="示例：python process_680ast_fixed.py input.ast output.ast\n"
+               "      python process_680ast_fixed.py ast_dir/ out_dir/ -j 8",
+        formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('input', help="输入文件或目录")
+    parser.add_argument('output', help="输出文件或目录")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="批量模式的并行进程数，0 表示使用全部CPU（默认 0）")
+    parser.add_argument('--force', action='store_true', help="批量模式下忽略已是最新的输出，全部重新处理")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if os.path.isdir(args.input):
+        with run_stats.phase('rewrite'):
+            success = process_ast_directory(args.input, args.output, args.jobs, args.force)
+        if not success:
+            sys.exit(1)
+        return
+
+    input_file = args.input
+    output_file = args.output
     
     print(f"开始处理...")
     print(f"输入文件：{input_file}")
     print(f"输出文件：{output_file}")
     
-    success = process_ast_file(input_file, output_file)
+    with run_stats.phase('rewrite'):
+        success = process_ast_file(input_file, output_file)
     if not success:
         sys.exit(1)
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main()
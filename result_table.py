@@ -0,0 +1,346 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+匹配结果索引表
+
+并行遍历 microcode-mapping-test 的结果目录（目录模式为 <结果>/<硬件>/<硬件>/<软件>.txt，
+p_test.py 为 <输出>/single_testN/<硬件>/<软件>.txt），每个结果文件只读开头的
+"=== 匹配结果 N ===" 和 "相似度: x" 两行，汇总成按列存储的表保存到磁盘，
+之后的过滤、排序和 top-k 查询直接读表，不再扫描结果文件。
+
+可以用 --summary 指定 shard_runner.py 写出的 summary.json，补上硬件和软件的节点数。
+
+表文件格式：
+    MAGIC (4 字节) | 头部长度 (4 字节，小端) | JSON 头部 | 各列的原始数组
+JSON 头部记录行数、各列的 array 类型码和字节偏移，以及硬件名/软件名/路径的字符串表。
+
+用法:
+    python result_table.py build <表文件> <结果目录> [...] [--summary summary.json ...] [-j N]
+    python result_table.py query <表文件> [--min-sim X] [--hardware 名称] [--software 名称]
+                                          [--best-per-hardware] [--top K]
+"""
+
+import argparse
+import array
+import json
+import os
+import re
+import struct
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import run_stats
+
+MAGIC = b'MRTB'
+TABLE_VERSION = 1
+HEADER_READ_SIZE = 512
+RESULT_HEADER_RE = re.compile(rb'^=== \xe5\x8c\xb9\xe9\x85\x8d\xe7\xbb\x93\xe6\x9e\x9c (\d+) ===\r?\n'
+                              rb'\xe7\x9b\xb8\xe4\xbc\xbc\xe5\xba\xa6: ([^\r\n]+)')  # 匹配结果 / 相似度
+
+# 列名 -> array 类型码；hardware/software/path 为字符串表下标
+COLUMNS = (
+    ('hardware', 'I'),
+    ('software', 'I'),
+    ('path', 'I'),
+    ('rank', 'I'),
+    ('similarity', 'd'),
+    ('hardware_nodes', 'i'),
+    ('software_nodes', 'i'),
+)
+STRING_COLUMNS = ('hardware', 'software', 'path')
+UNKNOWN_NODES = -1
+
+
+def read_result_header(file_path):
+    """
+    只读结果文件开头的两行
+
+    Returns:
+        tuple: (序号, 相似度)，不是匹配结果文件时返回 None
+    """
+    try:
+        with open(file_path, 'rb') as f:
+            head = f.read(HEADER_READ_SIZE)
+    except OSError:
+        return None
+    m = RESULT_HEADER_RE.match(head)
+    if m is None:
+        return None
+    try:
+        return int(m.group(1)), float(m.group(2))
+    except ValueError:
+        return None
+
+
+def scan_result_tree(root):
+    """
+    遍历一个结果子目录，产出 [(硬件, 软件, 路径, 序号, 相似度)]
+
+    硬件名取结果文件所在目录的名称，软件名取结果文件名（不含扩展名）。
+    """
+    rows = []
+    for dirpath, _, filenames in os.walk(root):
+        hardware = os.path.basename(dirpath)
+        for name in filenames:
+            if not name.endswith('.txt'):
+                continue
+            path = os.path.join(dirpath, name)
+            header = read_result_header(path)
+            if header is not None:
+                rows.append((hardware, name[:-4], path) + header)
+    return rows
+
+
+def collect_results(result_dirs, jobs=1):
+    """并行遍历各结果目录的顶层子目录，返回按 (硬件, 序号, 软件) 排序的行"""
+    roots = []
+    rows = []
+    for result_dir in result_dirs:
+        for entry in os.scandir(result_dir):
+            if entry.is_dir():
+                roots.append(entry.path)
+            elif entry.is_file() and entry.name.endswith('.txt'):
+                header = read_result_header(entry.path)
+                if header is not None:
+                    rows.append((os.path.basename(result_dir), entry.name[:-4], entry.path) + header)
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        for part in pool.map(scan_result_tree, roots):
+            rows.extend(part)
+    rows.sort(key=lambda r: (r[0], r[3], r[1]))
+    return rows
+
+
+def load_node_counts(summary_files):
+    """
+    从 shard_runner.py 的 summary.json 中读取节点数
+
+    Returns:
+        tuple: ({硬件: 节点数}, {(硬件, 软件): 节点数})
+    """
+    hardware_nodes = {}
+    software_nodes = {}
+    for summary_file in summary_files:
+        with open(summary_file, 'r', encoding='utf-8') as f:
+            summary = json.load(f)
+        for hw in summary.get('results', []):
+            hardware_nodes[hw['name']] = hw['node_count']
+            for name, count in hw['matched_software']:
+                software_nodes[(hw['name'], name)] = count
+    return hardware_nodes, software_nodes
+
+
+class ResultTable:
+    """按列存储的匹配结果表，字符串列保存为字符串表下标"""
+
+    __slots__ = ('columns', 'strings')
+
+    def __init__(self):
+        self.columns = {name: array.array(code) for name, code in COLUMNS}
+        self.strings = {name: [] for name in STRING_COLUMNS}
+
+    def __len__(self):
+        return len(self.columns['rank'])
+
+    @classmethod
+    def from_rows(cls, rows, hardware_nodes=None, software_nodes=None):
+        table = cls()
+        ids = {name: {} for name in STRING_COLUMNS}
+        hardware_nodes = hardware_nodes or {}
+        software_nodes = software_nodes or {}
+        cols = table.columns
+        for hardware, software, path, rank, similarity in rows:
+            for name, value in (('hardware', hardware), ('software', software), ('path', path)):
+                sid = ids[name].get(value)
+                if sid is None:
+                    sid = ids[name][value] = len(table.strings[name])
+                    table.strings[name].append(value)
+                cols[name].append(sid)
+            cols['rank'].append(rank)
+            cols['similarity'].append(similarity)
+            cols['hardware_nodes'].append(hardware_nodes.get(hardware, UNKNOWN_NODES))
+            cols['software_nodes'].append(software_nodes.get((hardware, software), UNKNOWN_NODES))
+        return table
+
+    def save(self, path):
+        """写出表文件（先写临时文件再替换）"""
+        offset = 0
+        layout = {}
+        for name, code in COLUMNS:
+            nbytes = len(self.columns[name]) * self.columns[name].itemsize
+            layout[name] = [code, offset, nbytes]
+            offset += nbytes
+        header = json.dumps({
+            'version': TABLE_VERSION,
+            'rows': len(self),
+            'byteorder': sys.byteorder,
+            'columns': layout,
+            'strings': self.strings,
+        }, ensure_ascii=False).encode('utf-8')
+
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header)))
+            f.write(header)
+            for name, _ in COLUMNS:
+                self.columns[name].tofile(f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """读取表文件，格式不对时返回 None"""
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            print(f"错误: 不是结果表文件: {path}")
+            return None
+        (header_len,) = struct.unpack_from('<I', data, 4)
+        header = json.loads(data[8:8 + header_len].decode('utf-8'))
+        if header.get('version') != TABLE_VERSION:
+            print(f"错误: 不支持的结果表版本: {header.get('version')}")
+            return None
+
+        table = cls()
+        base = 8 + header_len
+        for name, (code, offset, nbytes) in header['columns'].items():
+            col = array.array(code)
+            col.frombytes(data[base + offset:base + offset + nbytes])
+            if header['byteorder'] != sys.byteorder:
+                col.byteswap()
+            table.columns[name] = col
+        table.strings = header['strings']
+        return table
+
+    def row(self, i):
+        cols = self.columns
+        return {
+            'hardware': self.strings['hardware'][cols['hardware'][i]],
+            'software': self.strings['software'][cols['software'][i]],
+            'rank': cols['rank'][i],
+            'similarity': cols['similarity'][i],
+            'hardware_nodes': cols['hardware_nodes'][i],
+            'software_nodes': cols['software_nodes'][i],
+            'path': self.strings['path'][cols['path'][i]],
+        }
+
+    def select(self, min_sim=None, hardware=None, software=None):
+        """按条件过滤，返回行下标列表"""
+        sims = self.columns['similarity']
+        indices = range(len(self))
+        if min_sim is not None:
+            indices = [i for i in indices if sims[i] >= min_sim]
+        for name, value in (('hardware', hardware), ('software', software)):
+            if value is None:
+                continue
+            try:
+                sid = self.strings[name].index(value)
+            except ValueError:
+                return []
+            col = self.columns[name]
+            indices = [i for i in indices if col[i] == sid]
+        return list(indices)
+
+    def best_per_hardware(self, indices):
+        """每个硬件只保留相似度最高的一行"""
+        sims = self.columns['similarity']
+        hw = self.columns['hardware']
+        best = {}
+        for i in indices:
+            j = best.get(hw[i])
+            if j is None or sims[i] > sims[j]:
+                best[hw[i]] = i
+        return list(best.values())
+
+    def rank_by_similarity(self, indices, top=None):
+        """按相似度从高到低排序，top 不为 None 时只取前 top 行"""
+        sims = self.columns['similarity']
+        indices = sorted(indices, key=lambda i: -sims[i])
+        return indices if top is None else indices[:top]
+
+
+def build_table(table_path, result_dirs, summary_files=(), jobs=1):
+    """
+    遍历结果目录并写出结果表
+
+    Returns:
+        ResultTable: 构建好的表
+    """
+    rows = collect_results(result_dirs, jobs)
+    hardware_nodes, software_nodes = load_node_counts(summary_files)
+    table = ResultTable.from_rows(rows, hardware_nodes, software_nodes)
+    table.save(table_path)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(description="匹配结果索引表")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="遍历结果目录，构建结果表")
+    p_build.add_argument('table', help="结果表文件")
+    p_build.add_argument('result_dirs', nargs='+', help="结果目录")
+    p_build.add_argument('--summary', nargs='*', default=[],
+                         help="shard_runner.py 写出的 summary.json，用于补充节点数")
+    p_build.add_argument('-j', '--jobs', type=int, default=0,
+                         help="并行线程数，0 表示CPU个数（默认 0）")
+
+    p_query = sub.add_parser('query', help="查询结果表")
+    p_query.add_argument('table', help="结果表文件")
+    p_query.add_argument('--min-sim', type=float, help="最低相似度")
+    p_query.add_argument('--hardware', help="只看指定硬件")
+    p_query.add_argument('--software', help="只看指定软件")
+    p_query.add_argument('--best-per-hardware', action='store_true', help="每个硬件只保留最佳匹配")
+    p_query.add_argument('--top', type=int, help="只输出相似度最高的 K 行")
+    p_query.add_argument('--json', action='store_true', help="以 JSON 输出")
+
+    for p in (p_build, p_query):
+        run_stats.add_stats_argument(p)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if args.command == 'build':
+        for result_dir in args.result_dirs:
+            if not os.path.isdir(result_dir):
+                print(f"错误: 结果目录不存在: {result_dir}")
+                sys.exit(1)
+        jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+        with run_stats.phase('build'):
+            table = build_table(args.table, args.result_dirs, args.summary, jobs)
+        run_stats.count_file('bytes_written', args.table)
+        run_stats.count(rows=len(table), files_created=1)
+        print(f"已收集 {len(table)} 条匹配结果（{len(table.strings['hardware'])} 个硬件，"
+              f"{len(table.strings['software'])} 个软件）到: {args.table}")
+        return
+
+    if not os.path.isfile(args.table):
+        print(f"错误: 结果表不存在: {args.table}")
+        sys.exit(1)
+    with run_stats.phase('load'):
+        table = ResultTable.load(args.table)
+    if table is None:
+        sys.exit(1)
+    run_stats.count_file('bytes_read', args.table)
+
+    with run_stats.phase('query'):
+        indices = table.select(args.min_sim, args.hardware, args.software)
+        if args.best_per_hardware:
+            indices = table.best_per_hardware(indices)
+        indices = table.rank_by_similarity(indices, args.top)
+        rows = [table.row(i) for i in indices]
+    run_stats.count(rows=len(rows))
+
+    if args.json:
+        json.dump(rows, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return
+    print(f"共 {len(rows)} 条匹配结果:")
+    print("-" * 80)
+    for r in rows:
+        nodes = f"{r['hardware_nodes']}/{r['software_nodes']}"
+        print(f"{r['similarity']:.4f}  {r['hardware']:<24} {r['software']:<24} "
+              f"#{r['rank']:<3} 节点数 {nodes:<10} {r['path']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+各脚本共用的运行统计
+
+脚本的 main() 用 add_stats_argument 加上 --stats [PATH] 选项，解析参数后调用 start(args.stats)。
+之后在各处调用模块级的 phase() / count() / counted()：未启用统计时它们什么都不做，
+库函数可以直接调用，不需要逐层传递统计对象。
+
+进程退出时（包括 sys.exit）输出一条 JSON 记录，PATH 为 '-' 或省略时写到 stderr，
+否则以 JSON Lines 追加到 PATH 文件。记录包含：
+    - script / argv / started：脚本名、命令行参数和开始时间
+    - wall_s / cpu_s：总墙钟时间和 CPU 时间（CPU 时间包括已结束的子进程，如进程池）
+    - phases：各阶段的 {wall_s, cpu_s, calls}，同名阶段多次进入时累加；阶段可以嵌套，
+      外层阶段的时间包含内层
+    - counters：bytes_read、bytes_written、lines、functions、files_created，
+      以及脚本自己记录的其他计数
+    - peak_rss_mb / children_peak_rss_mb：本进程和子进程中的最大峰值 RSS
+    - io：/proc/self/io 中本进程（不含子进程）实际读写的字节数，平台不支持时没有该项
+
+用法（在脚本中）:
+    import run_stats
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+    with run_stats.phase('split'):
+        ...
+    run_stats.count(functions=n, files_created=n)
+"""
+
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+STATS_VERSION = 1
+STDERR = '-'
+COUNTERS = ('bytes_read', 'bytes_written', 'lines', 'functions', 'files_created')
+
+_current = None
+
+
+def add_stats_argument(parser):
+    """给解析器加上 --stats [PATH] 选项"""
+    parser.add_argument('--stats', nargs='?', const=STDERR, metavar='PATH',
+                        help="结束时输出 JSON 运行统计到 PATH（追加），不指定 PATH 时输出到 stderr；"
+                             "放在位置参数之前时请写成 --stats=PATH")
+
+
+def _children_cpu():
+    if resource is None:
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _cpu():
+    """本进程和已结束的子进程的 CPU 时间之和"""
+    return time.process_time() + _children_cpu()
+
+
+def _peak_rss_mb(who):
+    if resource is None:
+        return None
+    rss = resource.getrusage(who).ru_maxrss
+    # Linux 上 ru_maxrss 以 KB 为单位，macOS 上以字节为单位
+    return round(rss / (1 << 20) if sys.platform == 'darwin' else rss / 1024, 1)
+
+
+def _proc_io():
+    """/proc/self/io 中的 rchar/wchar，不可用时返回 None"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            fields = dict(line.split(':', 1) for line in f if ':' in line)
+        return {'read_bytes': int(fields['rchar']), 'write_bytes': int(fields['wchar'])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+class RunStats:
+    """一次运行的统计数据"""
+
+    def __init__(self, output=STDERR, script=None):
+        self.output = output
+        self.script = script or os.path.basename(sys.argv[0])
+        self.argv = sys.argv[1:]
+        self.started = time.strftime('%Y-%m-%dT%H:%M:%S')
+        self.phases = {}
+        self.counters = dict.fromkeys(COUNTERS, 0)
+        self.emitted = False
+        self._lock = threading.Lock()  # count() 可能在线程池中调用
+        self._wall = time.perf_counter()
+        self._cpu = _cpu()
+        self._io = _proc_io()
+
+    @contextmanager
+    def phase(self, name):
+        wall, cpu = time.perf_counter(), _cpu()
+        try:
+            yield
+        finally:
+            entry = self.phases.setdefault(name, {'wall_s': 0.0, 'cpu_s': 0.0, 'calls': 0})
+            entry['wall_s'] += time.perf_counter() - wall
+            entry['cpu_s'] += _cpu() - cpu
+            entry['calls'] += 1
+
+    def count(self, **counters):
+        with self._lock:
+            for key, value in counters.items():
+                self.counters[key] = self.counters.get(key, 0) + value
+
+    def record(self):
+        """当前的统计记录（dict）"""
+        record = {
+            'version': STATS_VERSION,
+            'script': self.script,
+            'argv': self.argv,
+            'started': self.started,
+            'wall_s': round(time.perf_counter() - self._wall, 4),
+            'cpu_s': round(_cpu() - self._cpu, 4),
+            'phases': {name: {'wall_s': round(p['wall_s'], 4), 'cpu_s': round(p['cpu_s'], 4),
+                              'calls': p['calls']}
+                       for name, p in self.phases.items()},
+            'counters': dict(self.counters),
+            'peak_rss_mb': _peak_rss_mb(resource.RUSAGE_SELF) if resource else None,
+            'children_peak_rss_mb': _peak_rss_mb(resource.RUSAGE_CHILDREN) if resource else None,
+        }
+        io = _proc_io()
+        if io is not None and self._io is not None:
+            record['io'] = {key: io[key] - self._io[key] for key in io}
+        return record
+
+    def emit(self):
+        """输出统计记录（只输出一次）"""
+        if self.emitted:
+            return
+        self.emitted = True
+        line = json.dumps(self.record(), ensure_ascii=False)
+        if self.output == STDERR:
+            sys.stderr.write(line + "\n")
+            sys.stderr.flush()
+            return
+        try:
+            with open(self.output, 'a', encoding='utf-8') as f:
+                f.write(line + "\n")
+        except OSError as e:
+            print(f"警告: 无法写入运行统计 {self.output}: {e}", file=sys.stderr)
+
+
+def start(output, script=None):
+    """
+    启用统计，output 为 None 时不启用
+
+    Returns:
+        RunStats: 启用时为统计对象，否则为 None
+    """
+    global _current
+    if output is None:
+        return None
+    _current = RunStats(output, script)
+    atexit.register(_current.emit)
+    return _current
+
+
+def phase(name):
+    """统计一个阶段的墙钟和 CPU 时间（上下文管理器）"""
+    if _current is None:
+        return nullcontext()
+    return _current.phase(name)
+
+
+def count(**counters):
+    """累加计数，如 count(lines=n, files_created=1)"""
+    if _current is not None:
+        _current.count(**counters)
+
+
+def count_file(key, path):
+    """把文件大小累加到计数 key（如 'bytes_read'），文件不存在时忽略"""
+    if _current is not None:
+        try:
+            _current.count(**{key: os.path.getsize(path)})
+        except OSError:
+            pass
+
+
+def counted(lines, key='lines'):
+    """
+    透传可迭代对象并把元素个数累加到计数 key
+
+    未启用统计时原样返回，不增加逐行开销。
+    """
+    if _current is None:
+        return lines
+    return _counting(lines, key)
+
+
+def _counting(lines, key):
+    n = 0
+    try:
+        for line in lines:
+            n += 1
+            yield line
+    finally:
+        count(**{key: n})
@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+segment 偏移索引
+
+扫描一次 dump，把每个 'segment N' 的字节范围写入旁路索引文件 <dump>.segidx，
+之后的提取直接 seek 到对应位置复制，耗时只与 segment 大小有关。
+索引中记录了 dump 的大小和修改时间，dump 变化后自动重建。
+
+用法:
+    python segment_index.py build <dump文件>
+    python segment_index.py show <dump文件>
+    python segment_index.py extract <dump文件> <输出文件> [-s N [N ...]]
+"""
+
+import argparse
+import json
+import mmap
+import os
+import sys
+
+import run_stats
+
+from extract_segment import COPY_CHUNK_SIZE, find_segment_bounds, segment_output_path
+
+INDEX_SUFFIX = '.segidx'
+INDEX_VERSION = 1
+
+
+def index_path(input_file):
+    """索引文件路径"""
+    return input_file + INDEX_SUFFIX
+
+
+def scan_segment_index(input_file):
+    """
+    扫描 dump，返回索引内容（不写文件）
+
+    Args:
+        input_file (str): dump 文件路径
+
+    Returns:
+        dict: 索引内容，segments 为 {N: [标记行起始偏移, 内容起始偏移, 内容结束偏移]}
+    """
+    with open(input_file, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if st.st_size == 0:
+            bounds = {}
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                bounds = find_segment_bounds(buf)
+
+    return {
+        'version': INDEX_VERSION,
+        'size': st.st_size,
+        'mtime_ns': st.st_mtime_ns,
+        'segments': {str(n): list(b) for n, b in sorted(bounds.items())},
+    }
+
+
+def write_segment_index(input_file, index):
+    """
+    原子地写出索引文件
+
+    Returns:
+        bool: 是否写入成功；目录只读等情况下打印警告并返回 False
+    """
+    path = index_path(input_file)
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(index, f)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        print(f"警告: 无法写入索引文件 {path}，本次只使用内存中的索引: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return False
+
+
+def build_segment_index(input_file):
+    """
+    扫描 dump 并写出索引文件，写不了时仍返回内存中的索引
+
+    Args:
+        input_file (str): dump 文件路径
+
+    Returns:
+        dict: 索引内容，格式见 scan_segment_index
+    """
+    index = scan_segment_index(input_file)
+    write_segment_index(input_file, index)
+    return index
+
+
+def load_segment_index(input_file, rebuild=True):
+    """
+    读取索引文件，索引不存在或已过期时重新构建
+
+    Args:
+        input_file (str): dump 文件路径
+        rebuild (bool): 索引失效时是否重建，为 False 时返回 None
+
+    Returns:
+        dict: 索引内容
+    """
+    st = os.stat(input_file)
+    try:
+        with open(index_path(input_file), 'r', encoding='utf-8') as f:
+            index = json.load(f)
+        if (index.get('version') == INDEX_VERSION
+                and index.get('size') == st.st_size
+                and index.get('mtime_ns') == st.st_mtime_ns):
+            return index
+    except (OSError, ValueError):
+        pass
+    return build_segment_index(input_file) if rebuild else None
+
+
+def copy_file_range(f, start, end, out_f):
+    """把 f 中 [start, end) 的字节写入 out_f，返回其中的换行数"""
+    f.seek(start)
+    newlines = 0
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(COPY_CHUNK_SIZE, remaining))
+        if not chunk:
+            break
+        out_f.write(chunk)
+        newlines += chunk.count(b'\n')
+        remaining -= len(chunk)
+    return newlines
+
+
+def extract_segments_indexed(input_file, segments, output_file, verbose=True):
+    """
+    通过索引提取多个 segment，参数和返回值与 extract_segment.extract_segments 相同
+    """
+    try:
+        index = load_segment_index(input_file)
+    except FileNotFoundError:
+        print(f"错误：文件 {input_file} 不存在")
+        return None
+
+    multiple = len(set(segments)) > 1
+    results = {}
+    with open(input_file, 'rb') as f:
+        for number in segments:
+            if number in results:
+                continue
+            bounds = index['segments'].get(str(number))
+            if bounds is None:
+                print(f"错误：在文件 {input_file} 中未找到 'segment {number}'")
+                continue
+            _, start, end = bounds
+            out_path = segment_output_path(output_file, number, multiple)
+            with open(out_path, 'wb') as out_f:
+                line_count = copy_file_range(f, start, end, out_f)
+            results[number] = (out_path, end - start, line_count)
+
+            if verbose:
+                print(f"成功提取 segment {number}：")
+                print(f"  输出文件：{out_path}")
+                print(f"  提取行数：{line_count} 行")
+                print(f"  字节范围：{start} 到 {end}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="segment 偏移索引")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="扫描 dump 并（重新）生成索引")
+    p_build.add_argument('input_file', help="dump 文件")
+
+    p_show = sub.add_parser('show', help="显示索引内容（必要时先构建）")
+    p_show.add_argument('input_file', help="dump 文件")
+
+    p_extract = sub.add_parser('extract', help="通过索引提取 segment")
+    p_extract.add_argument('input_file', help="dump 文件")
+    p_extract.add_argument('output_file', help="输出文件，提取多个 segment 时可以用 {n} 表示编号")
+    p_extract.add_argument('-s', '--segments', nargs='+', type=int, default=[0],
+                           help="要提取的 segment 编号（默认 0）")
+
+    for p in (p_build, p_show, p_extract):
+        run_stats.add_stats_argument(p)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if not os.path.exists(args.input_file):
+        print(f"错误：输入文件 {args.input_file} 不存在")
+        sys.exit(1)
+
+    if args.command == 'extract':
+        with run_stats.phase('extract'):
+            results = extract_segments_indexed(args.input_file, args.segments, args.output_file)
+        if results:
+            written = sum(r[1] for r in results.values())
+            run_stats.count(bytes_read=written, bytes_written=written,
+                            lines=sum(r[2] for r in results.values()), files_created=len(results))
+        if results is None or len(results) != len(set(args.segments)):
+            sys.exit(1)
+        return
+
+    with run_stats.phase('index'):
+        if args.command == 'build':
+            index = scan_segment_index(args.input_file)
+            if write_segment_index(args.input_file, index):
+                print(f"索引已写入：{index_path(args.input_file)}")
+        else:
+            index = load_segment_index(args.input_file)
+
+    print(f"文件大小：{index['size']} 字节")
+    print(f"segment 数量：{len(index['segments'])}")
+    print("-" * 50)
+    for number, (_, start, end) in sorted(index['segments'].items(), key=lambda kv: int(kv[0])):
+        print(f"segment {number:<6} {start:>14} - {end:<14} ({end - start} 字节)")
+
+
+if __name__ == "__main__":
+    main()
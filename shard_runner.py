@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+按代价均衡分片并行运行目录模式匹配
+
+microcode-mapping-test 的目录模式只解析、内联一次软件AST，再依次匹配目录下的
+每个硬件文件。本脚本把硬件目录按估算代价（文件大小或节点数）用最长处理时间优先
+（LPT）的贪心算法分成 K 个分片，每个分片建一个硬链接目录，同时运行 K 个目录模式进程，
+最后把各分片输出的总结报告合并成一份。
+
+用法: python shard_runner.py <硬件AST目录|清单文件> <软件AST文件> <结果输出目录> <符号表读取文件>
+                             [-k 分片数] [--cost size|nodes] [-m 可执行文件] [-w 工作目录]
+                             [--candidates 候选文件]
+"""
+
+import argparse
+import heapq
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import is_manifest
+from p_test import DEFAULT_MICROCODE, hardware_stem, list_hardware_files
+from prefilter import read_candidates
+import run_stats
+
+REPORT_TITLE = "批量处理完成 - 总结报告"
+HARDWARE_LINE_RE = re.compile(r'^硬件文件: (.*) \(节点数: (-?\d+)\)$')
+SOFTWARE_ITEM_RE = re.compile(r'(.*?)\((-?\d+)节点\)(?:, |$)')
+
+
+def estimate_nodes(file_path):
+    """统计以 '->' 开头的行数作为节点数，按二进制逐行读取，不解码"""
+    count = 0
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if line.lstrip().startswith(b'->'):
+                count += 1
+    return count
+
+
+def estimate_cost(file_path, cost='size'):
+    """估算匹配一个硬件文件的代价"""
+    if cost == 'nodes':
+        return estimate_nodes(file_path)
+    return os.path.getsize(file_path)
+
+
+def partition_by_cost(costs, k):
+    """
+    最长处理时间优先的贪心分片：按代价从大到小，每次放入当前总代价最小的分片
+
+    Args:
+        costs (dict): {文件: 代价}
+        k (int): 分片数
+
+    Returns:
+        list: [(总代价, [文件, ...])]，空分片会被去掉
+    """
+    heap = [(0, i) for i in range(k)]
+    shards = [[] for _ in range(k)]
+    totals = [0] * k
+    for path, c in sorted(costs.items(), key=lambda kv: (-kv[1], kv[0])):
+        total, i = heapq.heappop(heap)
+        shards[i].append(path)
+        totals[i] = total + c
+        heapq.heappush(heap, (totals[i], i))
+    return [(totals[i], sorted(shards[i])) for i in range(k) if shards[i]]
+
+
+def link_into(src, dst_dir):
+    """
+    在 dst_dir 中创建指向 src 的硬链接，不支持硬链接（如跨文件系统）时退化为符号链接
+
+    Raises:
+        FileExistsError: dst_dir 中已有同名文件
+    """
+    dst = os.path.join(dst_dir, os.path.basename(src))
+    try:
+        os.link(src, dst)
+    except FileExistsError:
+        raise
+    except OSError:
+        os.symlink(os.path.abspath(src), dst)
+
+
+def duplicate_names(paths):
+    """文件名（不含目录）相同的文件，返回 {文件名: [路径, ...]}"""
+    by_name = {}
+    for path in paths:
+        by_name.setdefault(os.path.basename(path), []).append(path)
+    return {name: group for name, group in by_name.items() if len(group) > 1}
+
+
+def parse_summary_report(text):
+    """
+    解析目录模式输出的总结报告
+
+    Returns:
+        list: [{'name', 'node_count', 'matched_software': [[软件名称, 节点数], ...]}]
+    """
+    pos = text.find(REPORT_TITLE)
+    if pos == -1:
+        return []
+    results = []
+    for line in text[pos:].splitlines():
+        m = HARDWARE_LINE_RE.match(line)
+        if m:
+            results.append({'name': m.group(1), 'node_count': int(m.group(2)),
+                            'matched_software': []})
+            continue
+        line = line.strip()
+        if line.startswith("匹配的软件:") and results:
+            items = line[len("匹配的软件:"):].strip()
+            results[-1]['matched_software'] = [
+                [m.group(1), int(m.group(2))] for m in SOFTWARE_ITEM_RE.finditer(items)]
+    return results
+
+
+def format_summary_report(results):
+    """按 microcode-mapping-test 的格式输出合并后的总结报告"""
+    lines = ["=" * 60, REPORT_TITLE, "=" * 60]
+    if not results:
+        lines.append("没有找到任何匹配结果")
+        return "\n".join(lines) + "\n"
+    lines.append(f"找到 {len(results)} 个硬件文件存在匹配结果：")
+    lines.append("")
+    for hw in results:
+        lines.append(f"硬件文件: {hw['name']} (节点数: {hw['node_count']})")
+        software = ", ".join(f"{name}({count}节点)" for name, count in hw['matched_software'])
+        lines.append(f"  匹配的软件: {software}")
+        lines.append("")
+    return "\n".join(lines) + "\n"
+
+
+def run_shard(index, shard_dir, software_file, result_dir, symbol_table, microcode, work_dir,
+              candidate_file=None):
+    """运行一个分片的目录模式匹配，返回分片结果"""
+    stdout_log = os.path.join(work_dir, f"shard_{index}.stdout")
+    stderr_log = os.path.join(work_dir, f"shard_{index}.stderr")
+    cmd = [microcode, shard_dir, software_file, result_dir, symbol_table]
+    if candidate_file:
+        cmd.append(candidate_file)
+    start = time.monotonic()
+    with open(stdout_log, 'wb') as out_f, open(stderr_log, 'wb') as err_f:
+        try:
+            exit_code = subprocess.run(cmd, stdout=out_f, stderr=err_f).returncode
+        except OSError as e:
+            err_f.write(f"无法启动 {microcode}: {e}\n".encode('utf-8'))
+            exit_code = None
+    wall_time = time.monotonic() - start
+
+    with open(stdout_log, 'r', encoding='utf-8', errors='replace') as f:
+        results = parse_summary_report(f.read())
+    return {
+        'index': index,
+        'exit_code': exit_code,
+        'wall_time': round(wall_time, 3),
+        'stdout_log': stdout_log,
+        'stderr_log': stderr_log,
+        'results': results,
+    }
+
+
+def run_sharded(hardware_dir, software_file, result_dir, symbol_table, microcode,
+                k, cost='size', work_dir=None, candidate_file=None):
+    """
+    分片并行运行目录模式，并合并各分片的总结报告
+
+    candidate_file 不为 None 时，没有候选软件的硬件文件不参与分片，候选文件同时传给引擎
+
+    Returns:
+        dict: 合并后的汇总，results 为按硬件名排序的匹配信息，shards 为各分片的运行信息
+
+    Raises:
+        ValueError: 清单中有文件名相同的硬件文件（引擎按文件名命名结果文件夹，
+                    各分片共用结果输出目录，同名文件的结果会互相覆盖）
+    """
+    work_dir = work_dir or os.path.join(result_dir, "_shards")
+    hardware_files = [path for path in list_hardware_files(hardware_dir) if path.endswith('.txt')]
+    duplicates = duplicate_names(hardware_files)
+    if duplicates:
+        name, group = sorted(duplicates.items())[0]
+        raise ValueError(f"{len(duplicates)} 个硬件AST文件名重复，如 {name}: {', '.join(group)}")
+    if candidate_file:
+        candidates = read_candidates(candidate_file)
+        hardware_files = [path for path in hardware_files if hardware_stem(path) in candidates]
+    costs = {path: estimate_cost(path, cost) for path in hardware_files}
+    shards = partition_by_cost(costs, k)
+
+    # 为每个分片建立硬链接目录（清掉上次运行留下的分片目录）
+    os.makedirs(work_dir, exist_ok=True)
+    for entry in os.scandir(work_dir):
+        if entry.is_dir() and entry.name.startswith("shard_"):
+            shutil.rmtree(entry.path)
+    shard_dirs = []
+    for i, (_, files) in enumerate(shards, 1):
+        shard_dir = os.path.join(work_dir, f"shard_{i}")
+        os.makedirs(shard_dir)
+        for path in files:
+            link_into(path, shard_dir)
+        shard_dirs.append(shard_dir)
+    os.makedirs(result_dir, exist_ok=True)
+
+    with ThreadPoolExecutor(max_workers=len(shard_dirs) or 1) as pool:
+        futures = [pool.submit(run_shard, i, shard_dir, software_file, result_dir,
+                               symbol_table, microcode, work_dir, candidate_file)
+                   for i, shard_dir in enumerate(shard_dirs, 1)]
+        shard_results = [f.result() for f in futures]
+
+    merged = []
+    for shard, (total_cost, files) in zip(shard_results, shards):
+        shard['cost'] = total_cost
+        shard['file_count'] = len(files)
+        shard['matched_count'] = len(shard['results'])
+        merged.extend(shard.pop('results'))
+    merged.sort(key=lambda hw: hw['name'])
+
+    return {'cost': cost, 'results': merged, 'shards': shard_results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="按代价均衡分片并行运行目录模式匹配")
+    parser.add_argument('hardware_dir', help="硬件AST目录或 .manifest 清单文件")
+    parser.add_argument('software_file', help="软件AST文件")
+    parser.add_argument('result_dir', help="结果输出目录")
+    parser.add_argument('symbol_table', help="符号表读取文件")
+    parser.add_argument('-k', '--shards', type=int, default=0,
+                        help="分片数，0 表示CPU个数（默认 0）")
+    parser.add_argument('--cost', choices=('size', 'nodes'), default='size',
+                        help="代价估算方式：文件大小或节点数（默认 size）")
+    parser.add_argument('-m', '--microcode', default=DEFAULT_MICROCODE,
+                        help=f"微码映射引擎可执行文件（默认 {DEFAULT_MICROCODE}）")
+    parser.add_argument('-w', '--work-dir', help="分片工作目录（默认 <结果输出目录>/_shards）")
+    parser.add_argument('--candidates', help="prefilter.py 生成的候选文件")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if not (os.path.isdir(args.hardware_dir) or is_manifest(args.hardware_dir)):
+        print(f"错误: 硬件AST目录不存在: {args.hardware_dir}")
+        sys.exit(1)
+    if not os.path.isfile(args.software_file):
+        print(f"错误: 软件AST文件不存在: {args.software_file}")
+        sys.exit(1)
+    microcode = shutil.which(args.microcode) or args.microcode
+    if not os.path.isfile(microcode):
+        print(f"错误: 微码映射引擎可执行文件不存在: {args.microcode}")
+        sys.exit(1)
+
+    k = args.shards if args.shards > 0 else (os.cpu_count() or 1)
+    start = time.monotonic()
+    try:
+        with run_stats.phase('match'):
+            summary = run_sharded(args.hardware_dir, args.software_file, args.result_dir,
+                                  args.symbol_table, microcode, k, args.cost, args.work_dir,
+                                  args.candidates)
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+
+    report = format_summary_report(summary['results'])
+    print(report)
+    report_path = os.path.join(args.result_dir, "summary_report.txt")
+    json_path = os.path.join(args.result_dir, "summary.json")
+    with run_stats.phase('report'):
+        with open(report_path, 'w', encoding='utf-8') as f:
+            f.write(report)
+        with open(json_path, 'w', encoding='utf-8') as f:
+            json.dump(summary, f, ensure_ascii=False, indent=2)
+    run_stats.count_file('bytes_written', report_path)
+    run_stats.count_file('bytes_written', json_path)
+    run_stats.count(functions=sum(shard['file_count'] for shard in summary['shards']),
+                    matched=len(summary['results']), shards=len(summary['shards']), files_created=2)
+
+    print("分片运行情况:")
+    failed = False
+    for shard in summary['shards']:
+        mark = "✓" if shard['exit_code'] == 0 else "✗"
+        failed |= shard['exit_code'] != 0
+        print(f"  {mark} 分片 {shard['index']}: {shard['file_count']} 个文件, "
+              f"代价 {shard['cost']}, 耗时 {shard['wall_time']:.1f}s, 退出码 {shard['exit_code']}")
+    print(f"总耗时: {time.monotonic() - start:.1f} 秒")
+    print(f"合并报告: {report_path}, {json_path}")
+    if failed:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
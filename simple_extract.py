@@ -1,43 +1,59 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
 
+import mmap
+import os
 import sys
 
+from extract_segment import copy_range
+
+# str.strip() 会去掉的 ASCII 空白字符
+WHITESPACE = b' \t\n\r\x0b\x0c\x1c\x1d\x1e\x1f'
+
+def find_content_range(buf):
+    """
+    计算 segment0 到 segment1 之间内容的字节范围，规则与原来按字符串查找的版本相同：
+    从第一个 'segment 0' 所在行之后开始，到其后第一个 'segment 1' 出现的位置为止
+    （按子串匹配，'segment 10' 同样算作结束），两端的空白去掉。
+
+    Returns:
+        tuple: (start, end)；缺少标记时打印原因并返回 None
+    """
+    start_pos = buf.find(b'segment 0')
+    if start_pos == -1:
+        print("未找到 'segment 0'")
+        return None
+    end_pos = buf.find(b'segment 1', start_pos + len(b'segment 0'))
+    if end_pos == -1:
+        print("未找到 'segment 1'")
+        return None
+
+    start_line_end = buf.find(b'\n', start_pos)
+    start = len(buf) if start_line_end == -1 else start_line_end + 1
+    end = end_pos
+    while start < end and buf[start] in WHITESPACE:
+        start += 1
+    while end > start and buf[end - 1] in WHITESPACE:
+        end -= 1
+    return start, end
+
 def extract_segment(input_file, output_file):
-    """提取segment0到segment1之间的内容"""
+    """提取segment0到segment1之间的内容（文件通过 mmap 映射，按字节查找和复制）"""
     try:
-        with open(input_file, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        # 查找segment0和segment1的位置
-        start_pos = content.find('segment 0')
-        if start_pos == -1:
-            print("未找到 'segment 0'")
-            return False
-        
-        # 从segment0之后开始查找segment1
-        search_start = start_pos + len('segment 0')
-        end_pos = content.find('segment 1', search_start)
-        if end_pos == -1:
-            print("未找到 'segment 1'")
-            return False
-        
-        # 提取内容（不包含segment0和segment1这两行）
-        # 找到segment0行的结束位置
-        start_line_end = content.find('\n', start_pos)
-        if start_line_end == -1:
-            start_line_end = len(content)
-        
-        # 提取segment0行之后到segment1行之前的内容
-        extracted_content = content[start_line_end + 1:end_pos].strip()
-        
-        # 写入输出文件
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(extracted_content)
-        
+        with open(input_file, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                print("未找到 'segment 0'")
+                return False
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                bounds = find_content_range(buf)
+                if bounds is None:
+                    return False
+                with open(output_file, 'wb') as out_f:
+                    copy_range(buf, bounds[0], bounds[1], out_f)
+
         print(f"成功提取内容到 {output_file}")
         return True
-        
+
     except Exception as e:
         print(f"错误：{e}")
         return False
@@ -47,4 +63,4 @@ if __name__ == "__main__":
         print("用法：python simple_extract.py <输入文件> <输出文件>")
         sys.exit(1)
     
-    extract_segment(sys.argv[1], sys.argv[2]) 
\ No newline at end of file
+    extract_segment(sys.argv[1], sys.argv[2])
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件夹分组（split_folders_copy.sh 的零拷贝版本）
+
+把源文件夹下的子文件夹分成若干组，输出到与源文件夹同级的 <源文件夹名>-<组号>。
+除了复制和移动，还可以用硬链接、符号链接建组，或者只写一个清单文件
+<源文件夹名>-<组号>.manifest（每行一个成员的绝对路径），p_test.py / shard_runner.py
+可以直接把清单文件当作输入。链接操作并行执行；可以按总大小而不是固定个数分组。
+
+用法: python split_folders.py <源文件夹路径> [-n 每组数量] [--mode copy|move|hardlink|symlink|manifest]
+                              [--balance count|size] [-j N]
+"""
+
+import argparse
+import os
+import shutil
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from manifest import MANIFEST_SUFFIX, write_manifest
+import run_stats
+from shard_runner import partition_by_cost
+
+MODES = ('copy', 'move', 'hardlink', 'symlink', 'manifest')
+MODE_NAMES = {
+    'copy': "复制",
+    'move': "移动",
+    'hardlink': "硬链接",
+    'symlink': "符号链接",
+    'manifest': "清单",
+}
+
+
+def dir_size(path):
+    """目录下所有文件的总字节数"""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+
+def copy_counted(src, dst):
+    """shutil.copy2，并把复制的字节数计入 bytes_written"""
+    dst = shutil.copy2(src, dst)
+    run_stats.count_file('bytes_written', dst)
+    return dst
+
+
+def place_member(src, target_dir, mode):
+    """按 mode 把一个子文件夹放进分组目录"""
+    dst = os.path.join(target_dir, os.path.basename(src))
+    if mode == 'copy':
+        shutil.copytree(src, dst, copy_function=copy_counted)
+    elif mode == 'move':
+        shutil.move(src, dst)
+    elif mode == 'hardlink':
+        # 目录结构照常创建，文件全部硬链接到原文件
+        shutil.copytree(src, dst, copy_function=os.link)
+    elif mode == 'symlink':
+        os.symlink(os.path.abspath(src), dst)
+
+
+def make_groups(subdirs, group_size, balance='count'):
+    """
+    计算分组
+
+    组数与原脚本相同：ceil(子文件夹数 / group_size)。balance='count' 时按顺序每组
+    group_size 个；balance='size' 时按目录总大小均衡分配。
+
+    Returns:
+        list: [[子文件夹, ...], ...]
+    """
+    num_groups = (len(subdirs) + group_size - 1) // group_size
+    if balance == 'count':
+        return [subdirs[i:i + group_size] for i in range(0, len(subdirs), group_size)]
+    sizes = {path: dir_size(path) for path in subdirs}
+    return [members for _, members in partition_by_cost(sizes, num_groups)]
+
+
+def split_folders(source_dir, group_size=100, mode='copy', balance='count', jobs=1):
+    """
+    分组并输出
+
+    Returns:
+        list: [(分组路径, 成员数)]
+    """
+    source_dir = os.path.abspath(source_dir)
+    source_name = os.path.basename(source_dir)
+    source_parent = os.path.dirname(source_dir)
+
+    subdirs = sorted(entry.path for entry in os.scandir(source_dir) if entry.is_dir())
+    print(f"发现 {len(subdirs)} 个子文件夹")
+    if not subdirs:
+        print("没有找到子文件夹，退出")
+        return []
+
+    groups = make_groups(subdirs, group_size, balance)
+    print(f"将分成 {len(groups)} 个组")
+
+    outputs = []
+    tasks = []
+    for group, members in enumerate(groups, 1):
+        if mode == 'manifest':
+            target = os.path.join(source_parent, f"{source_name}-{group}{MANIFEST_SUFFIX}")
+            write_manifest(target, members)
+            run_stats.count_file('bytes_written', target)
+        else:
+            target = os.path.join(source_parent, f"{source_name}-{group}")
+            os.makedirs(target, exist_ok=True)
+            tasks.extend((src, target) for src in members)
+        print(f"创建分组 {group}: {target} (包含 {len(members)} 个文件夹)")
+        outputs.append((target, len(members)))
+
+    if tasks:
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            futures = [pool.submit(place_member, src, target, mode) for src, target in tasks]
+            for (src, _), future in zip(tasks, futures):
+                try:
+                    future.result()
+                except OSError as e:
+                    print(f"  错误: {MODE_NAMES[mode]} {src} 失败: {e}")
+    return outputs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文件夹分组")
+    parser.add_argument('source_dir', help="源文件夹路径")
+    parser.add_argument('-n', '--group-size', type=int, default=100, help="每组的数量（默认 100）")
+    parser.add_argument('--mode', choices=MODES, default='copy', help="建组方式（默认 copy）")
+    parser.add_argument('--balance', choices=('count', 'size'), default='count',
+                        help="count: 按顺序每组固定个数；size: 按总大小均衡（默认 count）")
+    parser.add_argument('-j', '--jobs', type=int, default=0,
+                        help="并行操作数，0 表示CPU个数（默认 0）")
+    run_stats.add_stats_argument(parser)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if not os.path.isdir(args.source_dir):
+        print(f"错误：源文件夹不存在: {args.source_dir}")
+        sys.exit(1)
+    if args.group_size <= 0:
+        print("错误：每组的数量必须大于 0")
+        sys.exit(1)
+
+    print("开始处理文件夹分组...")
+    print(f"源文件夹: {args.source_dir}")
+    print(f"每组数量: {args.group_size}")
+    print(f"操作模式: {MODE_NAMES[args.mode]}")
+    print(f"分组方式: {'按大小均衡' if args.balance == 'size' else '按个数'}")
+    print("==================================")
+
+    jobs = args.jobs if args.jobs > 0 else (os.cpu_count() or 1)
+    with run_stats.phase('split'):
+        outputs = split_folders(args.source_dir, args.group_size, args.mode, args.balance, jobs)
+    run_stats.count(groups=len(outputs), folders=sum(count for _, count in outputs))
+
+    print("==================================")
+    print("分组完成！")
+    print(f"分成了 {len(outputs)} 个组")
+    print("输出:")
+    for target, count in outputs:
+        print(f"  {target} ({count} 个文件夹)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+预先构建的带索引符号表文件
+
+按 符号表管理功能说明.md 中的规则，顺序读取一次软件AST dump：
+    - 收集 bundle/function 的 proto 和 def，同名只保留一份，proto 优先于 def，
+      def 保存的是它的第一个子节点（代表其原型结构）
+    - 收集 jmp / func::CallOp 引用，目标名称为引用节点第一个子节点的文本，
+      按所在的 def 记录
+结果写成一个文件：各条目的文本依次写在前面，文件末尾是 名称 -> 字节偏移 的索引和
+固定长度的尾部。查询时读尾部和索引，再直接 seek 到条目，不需要重新遍历AST。
+读取器可以按 references 计算 jmp/call 目标的传递闭包，并拼出闭包中各目标的原型文本
+（补全文本），结果按函数缓存在读取器中，不写入文件。
+
+文件格式：
+    条目文本 ...（每个条目为原型子树的 dump 行，缩进从 0 开始）
+    JSON 索引（symbols: {名称: [偏移, 长度, 'proto'|'def', 是否bundle]}，
+               references: {所在函数: [目标, ...]}，unresolved: [...]）
+    尾部 24 字节：MAGIC (8) | 索引偏移 (8，小端) | 索引长度 (8，小端)
+
+用法:
+    python symbol_table.py build <软件AST文件> <符号表文件>
+    python symbol_table.py show <符号表文件> [名称 ...]
+    python symbol_table.py patch <符号表文件> <函数名>
+"""
+
+import argparse
+import json
+import os
+import struct
+import sys
+
+from ast_dump import parse_line
+import run_stats
+
+MAGIC = b'SYMTAB01'
+FOOTER = struct.Struct('<8sQQ')
+TABLE_VERSION = 1
+
+PROTO_TYPES = ('BUNDLE_PROTO', 'FUNCTION_PROTO')
+DEF_TYPES = ('BUNDLE_DEF', 'FUNCTION_DEF')
+# 引用节点：按节点文本或类型识别
+REFERENCE_TEXTS = ('jmp', 'func::CallOp')
+REFERENCE_TYPES = ('JMP', 'FUNC_CALL')
+
+KIND_PROTO = 'proto'
+KIND_DEF = 'def'
+TOP_LEVEL = ''  # 不在任何 def 中的引用
+
+
+class _Capture:
+    """正在收集的原型子树"""
+
+    __slots__ = ('indent', 'kind', 'is_bundle', 'lines', 'indents', 'name_pos', 'unit')
+
+    def __init__(self, indent, kind, is_bundle, name_pos, unit=None):
+        self.indent = indent
+        self.kind = kind
+        self.is_bundle = is_bundle
+        self.lines = []
+        self.indents = []
+        # 名称在子树中的位置：proto 为 proto->down->down（第 3 个节点），
+        # def 保存的是 def->down，名称为其第一个子节点（第 2 个节点）
+        self.name_pos = name_pos
+        # def 对应的 [缩进, 名称]，读到名称后填入，用于记录引用所在的函数
+        self.unit = unit
+
+    def add(self, indent, line):
+        self.indents.append(indent)
+        self.lines.append(line)
+
+    def name(self):
+        if len(self.lines) <= self.name_pos:
+            return None
+        if any(self.indents[i] >= self.indents[i + 1] for i in range(self.name_pos)):
+            return None
+        return parse_line(self.lines[self.name_pos])[1]
+
+    def text(self):
+        return ''.join(line[self.indent:] for line in self.lines)
+
+
+def iter_symbol_events(lines):
+    """
+    顺序遍历 dump，产出符号表事件
+
+    Yields:
+        ('symbol', 名称, 类别, 是否bundle, 原型文本)
+        ('reference', 所在函数, 目标名称)
+    """
+    captures = []
+    pending_def = None    # (def 的缩进, 是否bundle)
+    pending_ref = None    # 引用节点的缩进
+    units = []            # [[def 的缩进, 名称]]，名称尚未读到时为 None
+
+    def finish(capture):
+        name = capture.name()
+        if name is not None:
+            return ('symbol', name, capture.kind, capture.is_bundle, capture.text())
+        return None
+
+    for line in lines:
+        if not line.strip():
+            # 空行（如 extractFuncs_ipat_88.py 输出的函数文件）不是分隔行，与 ast_dump.iter_nodes 一致
+            continue
+        if not line.endswith('\n'):
+            line += '\n'
+        parsed = parse_line(line)
+        if parsed is None:
+            # 分隔行：所有子树在此结束
+            for capture in captures:
+                event = finish(capture)
+                if event:
+                    yield event
+            captures.clear()
+            units.clear()
+            pending_def = pending_ref = None
+            continue
+
+        indent, text, node_type, _, _ = parsed
+        node_type = node_type.upper()
+
+        # 结束缩进不大于当前行的子树
+        while captures and captures[-1].indent >= indent:
+            event = finish(captures.pop())
+            if event:
+                yield event
+        while units and units[-1][0] >= indent:
+            units.pop()
+        for capture in captures:
+            capture.add(indent, line)
+
+        # def 的第一个子节点、def 名称和引用目标都紧跟在对应节点之后
+        if pending_def is not None:
+            def_indent, is_bundle = pending_def
+            pending_def = None
+            if indent > def_indent:
+                capture = _Capture(indent, KIND_DEF, is_bundle, 1, units[-1] if units else None)
+                capture.add(indent, line)
+                captures.append(capture)
+        for capture in captures:
+            if capture.unit is not None and capture.unit[1] is None:
+                capture.unit[1] = capture.name()
+        if pending_ref is not None:
+            if indent > pending_ref:
+                yield ('reference', units[-1][1] or TOP_LEVEL if units else TOP_LEVEL, text)
+            pending_ref = None
+
+        if node_type in PROTO_TYPES:
+            capture = _Capture(indent, KIND_PROTO, node_type.startswith('BUNDLE'), 2)
+            capture.add(indent, line)
+            captures.append(capture)
+        elif node_type in DEF_TYPES:
+            pending_def = (indent, node_type.startswith('BUNDLE'))
+            units.append([indent, None])
+        elif text in REFERENCE_TEXTS or node_type in REFERENCE_TYPES:
+            pending_ref = indent
+
+    for capture in reversed(captures):
+        event = finish(capture)
+        if event:
+            yield event
+
+
+def transitive_closure(references, name):
+    """
+    name 直接或间接引用的所有目标（不含 name 自身），按广度优先顺序
+
+    Args:
+        references (dict): {所在函数: [目标, ...]}
+        name (str): 起点
+    """
+    seen = {name}
+    order = []
+    queue = list(references.get(name, ()))
+    i = 0
+    while i < len(queue):
+        target = queue[i]
+        i += 1
+        if target in seen:
+            continue
+        seen.add(target)
+        order.append(target)
+        queue.extend(references.get(target, ()))
+    return order
+
+
+def build_symbol_table(software_file, output_file):
+    """
+    顺序读取一次软件AST，写出带索引的符号表文件
+
+    Returns:
+        dict: 写入的索引
+    """
+    symbols = {}
+    references = {}
+    tmp_path = output_file + '.tmp'
+    st = os.stat(software_file)
+
+    with open(software_file, 'r', encoding='utf-8', errors='surrogateescape') as f, \
+            open(tmp_path, 'wb') as out_f:
+        for event in iter_symbol_events(f):
+            if event[0] == 'reference':
+                _, caller, target = event
+                targets = references.setdefault(caller, [])
+                if target not in targets:
+                    targets.append(target)
+                continue
+
+            _, name, kind, is_bundle, text = event
+            old = symbols.get(name)
+            # 同名只保留一份：proto 优先于 def，同类保留先出现的
+            if old is not None and (old[2] == KIND_PROTO or kind == KIND_DEF):
+                continue
+            data = text.encode('utf-8', 'surrogateescape')
+            symbols[name] = [out_f.tell(), len(data), kind, is_bundle]
+            out_f.write(data)
+
+        targets = {t for ts in references.values() for t in ts}
+        index = {
+            'version': TABLE_VERSION,
+            'source': {'path': os.path.abspath(software_file), 'size': st.st_size,
+                       'mtime_ns': st.st_mtime_ns},
+            'symbols': symbols,
+            'references': references,
+            'unresolved': sorted(targets - symbols.keys()),
+        }
+        data = json.dumps(index, ensure_ascii=False).encode('utf-8')
+        index_offset = out_f.tell()
+        out_f.write(data)
+        out_f.write(FOOTER.pack(MAGIC, index_offset, len(data)))
+    os.replace(tmp_path, output_file)
+    return index
+
+
+class SymbolTableReader:
+    """符号表文件的读取器：打开时只读尾部和索引，查询时直接 seek 到条目"""
+
+    def __init__(self, path):
+        self._f = open(path, 'rb')
+        self._f.seek(-FOOTER.size, os.SEEK_END)
+        magic, index_offset, index_length = FOOTER.unpack(self._f.read(FOOTER.size))
+        if magic != MAGIC:
+            self._f.close()
+            raise ValueError(f"不是符号表文件: {path}")
+        self._f.seek(index_offset)
+        self.index = json.loads(self._f.read(index_length).decode('utf-8'))
+        if self.index.get('version') != TABLE_VERSION:
+            self._f.close()
+            raise ValueError(f"不支持的符号表版本: {self.index.get('version')}")
+        self.symbols = self.index['symbols']
+        self.references = self.index['references']
+        self._closures = {}  # 名称 -> 闭包中有原型的目标
+        self._patches = {}   # 名称 -> 补全文本
+
+    def close(self):
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __contains__(self, name):
+        return name in self.symbols
+
+    def lookup(self, name):
+        """名称对应的原型文本，没有时返回 None"""
+        entry = self.symbols.get(name)
+        if entry is None:
+            return None
+        offset, length = entry[0], entry[1]
+        self._f.seek(offset)
+        return self._f.read(length).decode('utf-8', 'surrogateescape')
+
+    def closure(self, name):
+        """name 直接或间接引用、并且有原型的目标，按广度优先顺序"""
+        targets = self._closures.get(name)
+        if targets is None:
+            targets = self._closures[name] = [t for t in transitive_closure(self.references, name)
+                                               if t in self.symbols]
+        return targets
+
+    def patch_text(self, name):
+        """name 的补全文本（闭包中各目标的原型文本依次拼接），name 没有引用时返回空串"""
+        text = self._patches.get(name)
+        if text is None:
+            text = self._patches[name] = ''.join(self.lookup(t) for t in self.closure(name))
+        return text
+
+    def is_stale(self, software_file):
+        """软件AST在建表后是否发生了变化"""
+        st = os.stat(software_file)
+        source = self.index['source']
+        return source['size'] != st.st_size or source['mtime_ns'] != st.st_mtime_ns
+
+
+def main():
+    parser = argparse.ArgumentParser(description="预先构建的带索引符号表文件")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_build = sub.add_parser('build', help="从软件AST构建符号表文件")
+    p_build.add_argument('software_file', help="软件AST文件")
+    p_build.add_argument('output', help="符号表文件")
+
+    p_show = sub.add_parser('show', help="查看符号表文件")
+    p_show.add_argument('table', help="符号表文件")
+    p_show.add_argument('names', nargs='*', help="要查看原型的名称")
+
+    p_patch = sub.add_parser('patch', help="输出函数的补全文本")
+    p_patch.add_argument('table', help="符号表文件")
+    p_patch.add_argument('name', help="函数/bundle 名称")
+
+    for p in (p_build, p_show, p_patch):
+        run_stats.add_stats_argument(p)
+    args = parser.parse_args()
+    run_stats.start(args.stats)
+
+    if args.command == 'build':
+        if not os.path.isfile(args.software_file):
+            print(f"错误: 软件AST文件不存在: {args.software_file}")
+            sys.exit(1)
+        with run_stats.phase('build'):
+            index = build_symbol_table(args.software_file, args.output)
+        run_stats.count_file('bytes_read', args.software_file)
+        run_stats.count_file('bytes_written', args.output)
+        run_stats.count(functions=len(index['symbols']), files_created=1)
+        protos = sum(1 for entry in index['symbols'].values() if entry[2] == KIND_PROTO)
+        print(f"符号表大小: {len(index['symbols'])} (proto {protos}, def {len(index['symbols']) - protos})")
+        print(f"引用数量: {sum(len(t) for t in index['references'].values())}")
+        print(f"未解析引用数量: {len(index['unresolved'])}")
+        print(f"符号表已保存到: {args.output}")
+        return
+
+    try:
+        reader = SymbolTableReader(args.table)
+    except (OSError, ValueError) as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+    with reader:
+        if args.command == 'patch':
+            print(f"{args.name} 的引用闭包: {', '.join(reader.closure(args.name)) or '无'}")
+            print(reader.patch_text(args.name), end='')
+            return
+        if not args.names:
+            print(f"来源: {reader.index['source']['path']}")
+            print(f"符号表大小: {len(reader.symbols)}")
+            print(f"未解析引用数量: {len(reader.index['unresolved'])}")
+            print("-" * 50)
+            for name, (offset, length, kind, is_bundle) in sorted(reader.symbols.items()):
+                label = "bundle" if is_bundle else "function"
+                print(f"{name:<30} {label:<8} {kind:<5} @{offset} ({length} 字节)")
+            return
+        for name in args.names:
+            text = reader.lookup(name)
+            if text is None:
+                print(f"未找到: {name}")
+            else:
+                print(f"=== {name} ===")
+                print(text, end='')
+
+
+if __name__ == "__main__":
+    main()
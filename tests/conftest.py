@@ -0,0 +1,30 @@
+# -*- coding: utf-8 -*-
+"""测试共用的夹具：用 gen_corpus.py 生成小语料，再用 extractFuncs_ipat_88.py 分割成函数文件"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extractFuncs_ipat_88 import write_functions  # noqa: E402
+from gen_corpus import generate  # noqa: E402
+
+
+@pytest.fixture
+def corpus_file(tmp_path):
+    """改写前的 680 格式 dump，带 segment 和 xxx 标记"""
+    path = tmp_path / 'corpus.txt'
+    generate(str(path), functions=24, segments=3, nodes=40, depth=5, acc_ratio=1.0,
+             cut_markers=True, seed=7)
+    return path
+
+
+@pytest.fixture
+def function_files(tmp_path, corpus_file):
+    """extractFuncs_ipat_88.py 输出的函数文件（每个节点行后都有一个空行）"""
+    output_dir = tmp_path / 'funcs'
+    with open(corpus_file, 'r', encoding='utf-8') as f:
+        write_functions(f, str(output_dir), verbose=False)
+    return sorted(output_dir.glob('*.txt'))
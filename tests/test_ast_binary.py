@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from ast_binary import decode_file, encode_file
+from ast_dump import iter_nodes
+from process_680ast_fixed import rewrite_file_atomic
+
+
+def read_nodes(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return list(iter_nodes(f))
+
+
+def round_trip(path, tmp_path):
+    """text -> bin -> text，再转换一次，返回两次写回的文本路径"""
+    encode_file(str(path), str(tmp_path / 'a.bin'))
+    decode_file(str(tmp_path / 'a.bin'), str(tmp_path / 'a.txt'))
+    encode_file(str(tmp_path / 'a.txt'), str(tmp_path / 'b.bin'))
+    decode_file(str(tmp_path / 'b.bin'), str(tmp_path / 'b.txt'))
+    return tmp_path / 'a.txt', tmp_path / 'b.txt'
+
+
+def check_round_trip(path, tmp_path):
+    first, second = round_trip(path, tmp_path)
+    assert read_nodes(first) == read_nodes(path)
+    assert first.read_bytes() == second.read_bytes()
+
+
+def test_function_files_round_trip(function_files, tmp_path):
+    for path in function_files:
+        check_round_trip(path, tmp_path)
+
+
+@pytest.mark.parametrize('rewritten', [False, True])
+def test_dump_round_trip(corpus_file, tmp_path, rewritten):
+    path = corpus_file
+    if rewritten:
+        path = tmp_path / 'rewritten.txt'
+        rewrite_file_atomic(str(corpus_file), str(path))
+    check_round_trip(path, tmp_path)
@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+from ast_dump import NO_INDEX, NodeTable, iter_nodes, parse_line
+
+
+def leading_tree(path):
+    """函数文件开头 'Print Tree:' 之后到下一个分隔行之前的节点行"""
+    with open(path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    nodes = []
+    for line in lines[1:]:
+        parsed = parse_line(line)
+        if parsed is None:
+            if line.strip():
+                break
+            continue
+        nodes.append(parsed)
+    return nodes
+
+
+def test_blank_lines_keep_nesting(function_files):
+    assert function_files
+    for path in function_files:
+        nodes = leading_tree(path)
+        table = NodeTable.from_file(path)
+        # 第一棵树只有一个根（FUNCTION_DEF），深度与缩进一致
+        assert table.type_name(0) == 'FUNCTION_DEF'
+        assert table.subtree_end(0) == len(nodes)
+        for i, (indent, text, node_type, _, _) in enumerate(nodes):
+            assert table.depth[i] == indent // 2, (path, i)
+            assert table.text(i) == text
+
+        with open(path, 'r', encoding='utf-8') as f:
+            streamed = [depth for _, depth, _, _, _, _ in iter_nodes(f)]
+        assert streamed == list(table.depth)
+
+
+def test_separators_reset_tree():
+    lines = ["Print Tree:\n", "-> a (X)\n", "\n", "  -> b (X)\n", "xxx\n",
+             "  -> c (X)\n", "segment 1\n", "-> d (X)\n"]
+    table = NodeTable.from_lines(lines)
+    assert list(table.parent) == [NO_INDEX, 0, NO_INDEX, NO_INDEX]
+    assert list(table.depth) == [0, 1, 0, 0]
+    # 分隔行两侧的根不串成兄弟
+    assert list(table.next_sibling) == [NO_INDEX] * 4
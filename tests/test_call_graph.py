@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+from call_graph import build_call_graph, connect, query_reach
+from extractFuncs_ipat_88 import write_functions
+
+
+def function(name, callees):
+    lines = [f"  -> {name}_inner (LABEL)\n", f"  -> {name}_acc_start (LABEL)\n"]
+    lines += [f"    -> callActionName {callee} [x] (CALL)\n" for callee in callees]
+    return lines + [f"  -> {name}_end (LABEL)\n", "xxx\n", "xxx\n", "xxx\n"]
+
+
+def test_reach_follows_file_callers(tmp_path):
+    # foo 出现两次，第二个文件名为 foo_1
+    lines = function("top", ["foo"]) + function("foo", ["bar"]) + function("foo", ["baz"])
+    lines += function("bar", ["qux"])
+    output_dir = tmp_path / 'funcs'
+    write_functions(lines, str(output_dir), verbose=False)
+    assert (output_dir / 'foo_1.txt').exists()
+
+    db = str(tmp_path / 'graph.db')
+    build_call_graph(db, [str(output_dir)], jobs=1)
+    conn = connect(db)
+    try:
+        assert query_reach(conn, 'top') == [('foo', 1), ('bar', 2), ('baz', 2), ('qux', 3)]
+    finally:
+        conn.close()
@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from count_lines import count_files_cached
+
+
+def test_cache_is_per_mode(tmp_path):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    path = directory / 'a.txt'
+    path.write_bytes(b'a\rb\rc\n')  # 单独的 CR：解码计数 3 行，--fast 1 行
+    files = [path]
+
+    assert count_files_cached(directory, files, fast=False) == ([3], 1)
+    assert count_files_cached(directory, files, fast=True) == ([1], 1)
+    # 两种模式的缓存互不覆盖
+    assert count_files_cached(directory, files, fast=False) == ([3], 0)
+    assert count_files_cached(directory, files, fast=True) == ([1], 0)
@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+from dedup_functions import canonical_hash, group_equivalent
+from extractFuncs_ipat_88 import write_functions
+
+
+def split(tmp_path, name, body):
+    """把 body（start 到 _end 的节点行）按 extractFuncs_ipat_88.py 的格式写成函数文件"""
+    lines = ["  -> f_inner (LABEL)  (BB:2) (1, 1, 1, 1, 1)\n",
+             "  -> f_acc_start (LABEL)  (BB:2) (1, 2, 1, 1, 1)\n"]
+    lines += body
+    lines += ["  -> f_end (LABEL)  (BB:2) (1, 9, 1, 1, 1)\n", "xxx\n", "xxx\n", "xxx\n"]
+    output_dir = tmp_path / name
+    write_functions(lines, str(output_dir), verbose=False)
+    return output_dir / 'f.txt'
+
+
+def test_nesting_changes_hash(tmp_path):
+    nested = split(tmp_path, 'nested', ["  -> = (ASSIGN)  (BB:2) (1, 3, 1, 1, 1)\n",
+                                        "    -> r1 (REG)  (BB:2) (1, 4, 1, 1, 1)\n",
+                                        "      -> 3 (CONST)  (BB:2) (1, 5, 1, 1, 1)\n"])
+    flat = split(tmp_path, 'flat', ["  -> = (ASSIGN)  (BB:2) (1, 3, 1, 1, 1)\n",
+                                    "    -> r1 (REG)  (BB:2) (1, 4, 1, 1, 1)\n",
+                                    "    -> 3 (CONST)  (BB:2) (1, 5, 1, 1, 1)\n"])
+    # 只有 BB 和位置元组不同
+    renumbered = split(tmp_path, 'renumbered', ["  -> = (ASSIGN)  (BB:7) (4, 3, 1, 1, 1)\n",
+                                                "    -> r1 (REG)  (BB:7) (4, 4, 1, 1, 1)\n",
+                                                "      -> 3 (CONST)  (BB:7) (4, 5, 1, 1, 1)\n"])
+    assert canonical_hash(nested) != canonical_hash(flat)
+    assert canonical_hash(nested) == canonical_hash(renumbered)
+
+    classes = group_equivalent([str(nested), str(flat), str(renumbered)])
+    assert sorted(len(members) for _, members in classes) == [1, 2]
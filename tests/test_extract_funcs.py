@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+from extractFuncs_ipat_88 import iter_functions
+
+LINES = [
+    "  -> a_inner (LABEL)\n",
+    "  -> a_acc_start (LABEL)\n",
+    "    -> x (REG)\n",
+    "  -> b_acc_start (LABEL)\n",
+    "    -> y (REG)\n",
+    "  -> b_end (LABEL)\n",
+    "xxx\n", "xxx\n", "xxx\n",
+    "  -> c_acc_start (LABEL)\n",
+    "    -> z (REG)\n",
+]
+
+
+def test_missing_end_is_dropped(capsys):
+    functions = list(iter_functions(iter(LINES)))
+    assert functions == [("    -> x (REG)\n", LINES[3:9])]
+    out = capsys.readouterr().out
+    assert "函数 a " in out and "函数 c " in out
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from extract_segment import count_segment_markers, find_segment_bounds, iter_segment_lines
+
+LINES = [
+    "header\n",
+    "segment 1\n", "a\n",
+    "segment 1\n", "b\n",
+    "segment 2\n", "c\n",
+    "segment 1\n", "d\n",
+    "segment 10\n", "e\n",
+    "segment 3\n",
+]
+
+
+@pytest.mark.parametrize('number', [1, 2, 3, 10, 4])
+def test_stream_matches_bounds(number):
+    data = ''.join(LINES).encode('utf-8')
+    bounds = find_segment_bounds(data, {number})
+    expected = data[bounds[number][1]:bounds[number][2]].decode('utf-8') if number in bounds else ''
+    markers = max(count_segment_markers(data, number), 1)
+    assert ''.join(iter_segment_lines(iter(LINES), number, markers)) == expected
+
+
+def test_repeated_marker_restarts():
+    data = ''.join(LINES).encode('utf-8')
+    assert count_segment_markers(data, 1) == 2
+    assert list(iter_segment_lines(iter(LINES), 1, 2)) == ["b\n"]
+
+
+@pytest.mark.parametrize('number', [1, 2, 3, 10, 4])
+def test_default_streams_from_first_marker(number):
+    # 不知道同号标记个数时从第一个标记开始，重复的标记行被跳过
+    expected = {1: "a\nb\n", 2: "c\n", 3: "", 10: "e\n", 4: ""}[number]
+    assert ''.join(iter_segment_lines(iter(LINES), number)) == expected
+
+
+def test_large_segment_is_streamed():
+    consumed = []
+
+    def lines():
+        yield "segment 0\n"
+        for i in range(100000):
+            consumed.append(i)
+            yield f"line {i}\n"
+        yield "segment 1\n"
+
+    stream = iter_segment_lines(lines(), 0)
+    assert next(stream) == "line 0\n"
+    assert len(consumed) == 1
+    assert sum(1 for _ in stream) == 99999
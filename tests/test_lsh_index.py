@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import os
+
+from lsh_index import build_index, query_hardware
+from prefilter import read_candidates
+
+
+def test_recall_on_function_files(function_files, tmp_path):
+    """每个硬件函数文件都应检索到软件AST中与它相同的函数"""
+    software_file = tmp_path / 'software.txt'
+    with open(software_file, 'w', encoding='utf-8') as out_f:
+        for path in function_files:
+            out_f.write(path.read_text(encoding='utf-8'))
+    db = str(tmp_path / 'index.db')
+    assert build_index(db, str(software_file)) == len(function_files)
+
+    candidate_file = tmp_path / 'candidates.txt'
+    hardware, _ = query_hardware(db, [str(p) for p in function_files], str(candidate_file), top=3)
+    assert hardware == len(function_files)
+    candidates = read_candidates(str(candidate_file))
+    for path in function_files:
+        stem = os.path.splitext(path.name)[0]
+        assert stem in candidates.get(stem, ()), stem
+
+
+def test_query_warns_when_software_changed(function_files, tmp_path, capsys):
+    software_file = tmp_path / 'software.txt'
+    software_file.write_text(function_files[0].read_text(encoding='utf-8'), encoding='utf-8')
+    db = str(tmp_path / 'index.db')
+    build_index(db, str(software_file))
+    hardware = [str(function_files[0])]
+
+    query_hardware(db, hardware, str(tmp_path / 'a.txt'))
+    assert "警告" not in capsys.readouterr().out
+
+    with open(software_file, 'a', encoding='utf-8') as f:
+        f.write("\n")
+    query_hardware(db, hardware, str(tmp_path / 'b.txt'))
+    assert "在建索引后发生了变化" in capsys.readouterr().out
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+import sys
+
+from p_test import STATUS_SUCCESS, run_batch
+
+# 假的引擎：在 <输出目录>/<硬件名>/ 下写一个结果文件
+FAKE_ENGINE = '''#!{python}
+import os, sys
+hardware, software, output = sys.argv[1:4]
+name = os.path.splitext(os.path.basename(hardware))[0]
+os.makedirs(os.path.join(output, name), exist_ok=True)
+with open(os.path.join(output, name, 'soft.txt'), 'w') as f:
+    f.write('=== 匹配结果 1 ===\\n')
+print('找到 1 个匹配结果')
+'''
+
+
+def test_cache_keeps_hardware_name(tmp_path):
+    engine = tmp_path / 'engine.py'
+    engine.write_text(FAKE_ENGINE.format(python=sys.executable))
+    engine.chmod(0o755)
+    software = tmp_path / 'software.txt'
+    software.write_text("Print Tree:\n-> a (X)\n")
+    hardware_dir = tmp_path / 'hw'
+    hardware_dir.mkdir()
+    for name in ('foo.txt', 'foo_1.txt'):
+        (hardware_dir / name).write_text("Print Tree:\n-> b (X)\n")
+    hardware_files = sorted(str(p) for p in hardware_dir.iterdir())
+
+    for run in range(2):
+        output = tmp_path / f'out{run}'
+        results = run_batch(hardware_files, str(software), str(tmp_path / 'symbols'), str(output),
+                            str(engine), jobs=1, cache_dir=str(tmp_path / 'cache'))
+        assert [r['status'] for r in results] == [STATUS_SUCCESS] * 2
+        assert [r['cached'] for r in results] == [bool(run)] * 2
+        for r in results:
+            stem = 'foo' if r['hardware_file'].endswith('foo.txt') else 'foo_1'
+            subdirs = [p.name for p in (output / f"single_test{r['index']}").iterdir() if p.is_dir()]
+            assert subdirs == [stem]
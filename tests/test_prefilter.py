@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+import os
+
+from prefilter import hardware_fingerprint, prefilter, read_candidates, software_fingerprints
+
+
+def test_keeps_identical_functions(function_files, tmp_path):
+    """软件AST由函数文件拼接而成时，引擎对每个硬件文件都能以相似度 1 匹配到同名软件函数"""
+    software_file = tmp_path / 'software.txt'
+    with open(software_file, 'w', encoding='utf-8') as out_f:
+        for path in function_files:
+            out_f.write(path.read_text(encoding='utf-8'))
+
+    stems = [os.path.splitext(path.name)[0] for path in function_files]
+    software = {unit['name']: unit for unit in software_fingerprints(str(software_file))}
+    assert sorted(software) == sorted(stems)
+    for path, stem in zip(function_files, stems):
+        hw = hardware_fingerprint(str(path))
+        # 函数文件中 FUNCTION_DEF 之下至少有 FUNCTION_LABEL -> 名称 两层
+        assert hw['depth'] >= 3
+        assert abs(hw['depth'] - software[stem]['depth']) <= 1
+
+    candidate_file = tmp_path / 'candidates.txt'
+    prefilter([str(p) for p in function_files], str(software_file), str(candidate_file))
+    candidates = read_candidates(str(candidate_file))
+    for stem in stems:
+        assert stem in candidates.get(stem, ()), stem
+
+
+def dump_lines(nodes):
+    """[(深度, 文本, 类型)] -> dump 行"""
+    return ''.join(f"{'  ' * depth}-> {text} ({node_type})  (BB:1) (1, 1, 1, 1, 1)\n"
+                   for depth, text, node_type in nodes)
+
+
+def function(name, body):
+    return [(0, '{', 'FUNCTION_DEF'), (1, 'FUNCTION_LABEL', 'FUNCTION_LABEL'),
+            (2, name, 'IDENT'), (1, '{', 'BLOCK')] + body
+
+
+def test_keeps_match_that_needs_inlining(tmp_path):
+    """foo 内联前只有一个调用，内联 bar 之后才与硬件相同，不能因为节点数被筛掉"""
+    bar_body = []
+    for k in range(6):
+        bar_body += [(2, '=', 'ASSIGN'), (3, f'r{k}', 'REG'), (3, '+', 'BINARY_OP'),
+                     (4, f'v{k}', 'IDENT'), (4, '1', 'CONST')]
+    software_file = tmp_path / 'software.txt'
+    software_file.write_text(
+        "Print Tree:\n"
+        + dump_lines(function('foo', [(2, 'func::CallOp', 'FUNC_CALL'), (3, 'bar', 'IDENT')]))
+        + "Print Tree:\n" + dump_lines(function('bar', bar_body))
+        + "Print Tree:\n" + dump_lines(function('baz', [(2, 'return', 'RETURN')])),
+        encoding='utf-8')
+    hardware_file = tmp_path / 'hw_foo.txt'
+    hardware_file.write_text("Print Tree:\n" + dump_lines(function('foo', bar_body)), encoding='utf-8')
+
+    software = {unit['name']: unit for unit in software_fingerprints(str(software_file))}
+    assert software['foo']['inlinable'] and not software['bar']['inlinable']
+    # 内联前的 foo 比硬件小得多，按节点数比例本来会被筛掉
+    assert hardware_fingerprint(str(hardware_file))['nodes'] > 2 * software['foo']['nodes']
+
+    candidate_file = tmp_path / 'candidates.txt'
+    prefilter([str(hardware_file)], str(software_file), str(candidate_file))
+    kept = read_candidates(str(candidate_file))['hw_foo']
+    assert 'foo' in kept
+    # 不含引用的小函数仍然按上界筛掉
+    assert 'baz' not in kept
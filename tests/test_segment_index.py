@@ -0,0 +1,16 @@
+# -*- coding: utf-8 -*-
+from segment_index import extract_segments_indexed
+
+
+def test_unwritable_index_falls_back_to_memory(tmp_path, capsys):
+    input_file = tmp_path / 'dump.txt'
+    input_file.write_text("segment 0\na\nsegment 1\nb\n", encoding='utf-8')
+    # 临时文件的位置被目录占住，写索引时抛出 OSError（以 root 运行时 chmod 不起作用）
+    (tmp_path / 'dump.txt.segidx.tmp').mkdir()
+
+    output_file = tmp_path / 'out.txt'
+    results = extract_segments_indexed(str(input_file), [1], str(output_file), verbose=False)
+    assert results == {1: (str(output_file), 2, 1)}
+    assert output_file.read_text(encoding='utf-8') == "b\n"
+    assert "警告: 无法写入索引文件" in capsys.readouterr().out
+    assert not (tmp_path / 'dump.txt.segidx').exists()
@@ -0,0 +1,25 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+from shard_runner import link_into, run_sharded
+
+
+def test_duplicate_names_rejected(tmp_path):
+    for sub in ('a', 'b'):
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / 'foo.txt').write_text("-> x (X)\n")
+    manifest = tmp_path / 'hw.manifest'
+    manifest.write_text("a/foo.txt\nb/foo.txt\n")
+    with pytest.raises(ValueError, match='foo.txt'):
+        run_sharded(str(manifest), 'software.txt', str(tmp_path / 'out'), 'symbols', 'engine', 2)
+
+
+def test_link_into_existing_name(tmp_path):
+    src = tmp_path / 'foo.txt'
+    src.write_text("-> x (X)\n")
+    shard = tmp_path / 'shard'
+    shard.mkdir()
+    link_into(str(src), str(shard))
+    with pytest.raises(FileExistsError):
+        link_into(str(src), str(shard))
+    assert not (shard / 'foo.txt').is_symlink()
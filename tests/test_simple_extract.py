@@ -0,0 +1,32 @@
+# -*- coding: utf-8 -*-
+import pytest
+
+import first
+from simple_extract import extract_segment
+
+TEXT = "head\nsegment 0\n  a\nsegment 2\n  b  \n x segment 10\nc\n"
+
+
+def test_simple_extract_keeps_original_rules(tmp_path):
+    input_file = tmp_path / 'in.txt'
+    input_file.write_text(TEXT, encoding='utf-8')
+    output_file = tmp_path / 'out.txt'
+    assert extract_segment(str(input_file), str(output_file))
+    # 到 'segment 1' 子串出现的位置结束，两端空白去掉
+    assert output_file.read_text(encoding='utf-8') == "a\nsegment 2\n  b  \n x"
+
+
+def test_first_keeps_original_rules(tmp_path):
+    input_file = tmp_path / 'in.txt'
+    input_file.write_text(TEXT, encoding='utf-8')
+    output_file = tmp_path / 'out.txt'
+    first.func(str(input_file), str(output_file))
+    # 到含 'segment 1' 的行之前结束，内容原样保留
+    assert output_file.read_text(encoding='utf-8') == "  a\nsegment 2\n  b  \n"
+
+
+def test_first_segment_1_before_segment_0(tmp_path):
+    input_file = tmp_path / 'in.txt'
+    input_file.write_text("segment 1\nsegment 0\na\n", encoding='utf-8')
+    with pytest.raises(ValueError):
+        first.func(str(input_file), str(tmp_path / 'out.txt'))
@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+from symbol_table import TABLE_VERSION, SymbolTableReader, build_symbol_table
+
+SOFTWARE = """Print Tree:
+-> { (FUNCTION_DEF)
+
+  -> foo_body (BLOCK)
+
+    -> foo (IDENT)
+
+    -> jmp (JMP)
+
+      -> bar (IDENT)
+
+-> { (FUNCTION_DEF)
+  -> bar_body (BLOCK)
+    -> bar (IDENT)
+    -> func::CallOp (FUNC_CALL)
+      -> baz (IDENT)
+-> q (FUNCTION_PROTO)
+  -> y (LABEL)
+    -> baz (IDENT)
+"""
+
+
+def test_closure_and_patch_text(tmp_path):
+    software_file = tmp_path / 'software.txt'
+    software_file.write_text(SOFTWARE, encoding='utf-8')
+    table_file = tmp_path / 'software.symtab'
+    index = build_symbol_table(str(software_file), str(table_file))
+    assert index['version'] == TABLE_VERSION == 1
+    assert 'patches' not in index
+
+    with SymbolTableReader(str(table_file)) as reader:
+        assert sorted(reader.symbols) == ['bar', 'baz', 'foo']
+        assert reader.closure('foo') == ['bar', 'baz']
+        assert reader.patch_text('foo') == reader.lookup('bar') + reader.lookup('baz')
+        assert reader.closure('baz') == [] and reader.patch_text('baz') == ''